@@ -1,78 +1,440 @@
+""" Flask-App des Dashboards
+
+create_app() erstellt eine vollständige App-Instanz (Flask findet die Funktion unter diesem Namen selbst):
+    flask --app app run
+    gunicorn --preload -w 4 "app:create_app()"
+Mit --preload erstellt der Master-Prozess die App einmal - Templates sind dann bereits kompiliert und die Caches
+gefüllt, neu gestartete Worker übernehmen alles per fork und beantworten schon die erste Anfrage ohne Kaltstart.
+"""
+import time
+
+# Beginn des Imports für den Startbericht
+_import_start = time.perf_counter()
+
+import atexit
 import logging
+import os
+import threading
+import uuid
 
-from dotenv import dotenv_values
-from flask import Flask, request, session
+import click
+from flask import Flask, before_render_template, g, json, request, session, template_rendered
+from jinja2 import FileSystemBytecodeCache
 
 from klassen.controller.handler import StudiengangHandler
+from klassen.controller.service.anmeldung import AnmeldeDrossel, PasswortPruefer
+from klassen.controller.service.importer import StudiengangImporter
+from klassen.controller.service.kohorte import KohortenCache
 from klassen.controller.service.manager import StudiengangManager
 from klassen.controller.service.service import StudiengangService
+from klassen.controller.service.verlauf import VerlaufSchreiber
+from klassen.konfiguration import Konfiguration, Konfigurationsdatei, konfiguration as standard_konfiguration
+from klassen.metriken import anfrage_dauer, anfragen, metriken, template_dauer
+from klassen.protokoll import protokoll
 from klassen.repository.csv_data import StudiengangCSVData
+from klassen.repository.journal_data import StudiengangJournalData
+from klassen.repository.json_converter import StudiengangJSONConverter
 from klassen.repository.json_data import StudiengangJSONData
+from klassen.repository.sqlite_data import StudiengangSQLiteData
+from klassen.repository.verlauf_data import StudiengangVerlauf
+from klassen.view.html_cache import HTMLCache
+from klassen.view.statisch import StatischeDateien
 from klassen.view.view import StudiengangAnsicht
 
-# Konfigurationsdatei laden
-config = dotenv_values("app.config")
-
-# Erstellen des Haupt-Objekts
-dashboard_app = Flask(__name__)
-# Notwendig für Session-Cookie und Flash-Nachrichten
-dashboard_app.secret_key = config["SECRET_KEY"]
-
-# Kennwort als Hash-Wert für die Login-Seite aus .env Datei lesen
-password = config["PASSWORD_HASH"]
-
-# Instanziierung Studiengangverwaltung
-speicher = StudiengangJSONData() # Speichern und Laden im JSON Format
-importer = StudiengangCSVData() # Laden der CSV-Datei
-service = StudiengangService() # Berechnungen zum Studiengang (bspw. abgeschlossene Module)
-manager = StudiengangManager(speicher, importer) # Verwaltet den Studiengang, erstellt, lädt, speichert
-handler = StudiengangHandler() # Aktualisierung über Webformular
-ansicht = StudiengangAnsicht() # Gibt die Flask Templates zur Ansicht aus (HTML)
-
-# Logging Konfiguration, Ausgabe in Datei, Datei wird bei jedem Start überschrieben, nur Fehler werden geschrieben, Formatierung
-logging.basicConfig(filename='dashboard.log', filemode='w', level=logging.WARNING,
-                    format='%(asctime)s - %(levelname)s - %(message)s',
-                    datefmt='%Y-%m-%d %H:%M:%S')
-
-
-# Dashboard
-@dashboard_app.route('/')
-def dashboard():
-    # Aufruf der Ansicht -> Rückgabe: Flask Template für das Dashboard
-    # manager -> Laden des Studiengangs
-    # service -> Berechnungen für das Dashboard
-    return ansicht.dashboard(manager, service)
-
-
-# Login
-@dashboard_app.route('/login', methods=['GET', 'POST'])
-def login():
-    # Aufruf der Ansicht für den Login -> Rückgabe: Flask Template für Login Seite
-    # session -> Speichern des Cookies für Login
-    # request -> GET zum Anzeigen der Seite, POST für Login
-    # password -> Authentifizierung des Users, wird aus Config als Hash geladen
-    return ansicht.login(session, request, password)
-
-
-# Logout
-@dashboard_app.route('/logout')
-def logout():
-    # Aufruf der Ansicht für Logout -> Rückgabe: Weiterleitung zum Dashboard
-    # session -> löschen des Cookies für Login
-    return ansicht.logout(session)
-
-
-# Bearbeiten
-@dashboard_app.route('/edit', methods=['GET', 'POST'])
-def bearbeiten():
-    # Aufruf der Ansicht für Bearbeiten -> Rückgabe: Flask-Template fürs Bearbeiten oder Weiterleitung zum Login
-    # session -> Prüfung, ob Authentifiziert
-    # request -> GET zum Anzeigen der Seite, POST für Aktualisierung der Daten
-    # handler -> verantwortlich für die Weitergabe der Daten nach Aktualisierung über Webformular
-    # manager -> Laden des Studiengangs
-    return ansicht.bearbeiten(session, request, handler, manager)
+# Dauer des Imports aller Module (Flask, Jinja, Repositories, ...)
+_import_dauer = time.perf_counter() - _import_start
+
+# Felder, deren Änderung neue Repositories erfordert, und Felder, die erst nach einem Neustart wirken
+SPEICHER_FELDER = {"speicher", "json_datei", "sqlite_datei", "snapshot_format", "journal_max_bytes", "csv_datei",
+                   "repository_cache_groesse", "journal_archive"}
+NEUSTART_FELDER = {"login_prozesse", "login_warteschlange", "asgi_threads", "template_cache_verzeichnis", "statisch_verzeichnis", "log_datei",
+                   "log_format", "log_rotation", "log_max_bytes", "log_backups"}
+
+
+def speicher_erstellen(config: Konfiguration):
+    """ Speichern und Laden im JSON Format (optional mit Änderungsjournal) oder in einer SQLite-Datenbank für viele Mandanten """
+    if config.speicher == "sqlite":
+        return StudiengangSQLiteData(config.sqlite_datei)
+    if config.speicher == "journal":
+        return StudiengangJournalData(config.journal_max_bytes, config.snapshot_format, config.json_datei,
+                                      config.repository_cache_groesse, config.journal_archive)
+    return StudiengangJSONData(config.snapshot_format, config.json_datei, config.repository_cache_groesse)
+
+
+class Komponenten:
+    """ Alle Objekte einer App-Instanz, abgelegt in app.extensions["dashboard"] """
+
+    def __init__(self, app: Flask, konfiguration: Konfigurationsdatei):
+        config = konfiguration.aktuell
+        self.app = app
+        self.konfiguration = konfiguration
+        # Instanziierung Studiengangverwaltung
+        self.speicher = speicher_erstellen(config)
+        self.importer = StudiengangCSVData(config.csv_datei) # Laden der CSV-Datei
+        self.service = StudiengangService() # Berechnungen zum Studiengang (bspw. abgeschlossene Module)
+        self.verlauf = StudiengangVerlauf(config.verlauf_verzeichnis) # Verlauf der Kennzahlen je Mandant
+        self.manager = StudiengangManager(self.speicher, self.importer, self.verlauf) # Verwaltet den Studiengang, erstellt, lädt, speichert
+        # Verlauf wird im Hintergrund geschrieben, Speichern meldet nur Mandant und Version
+        self.verlauf_schreiber = VerlaufSchreiber(self.manager)
+        self.manager.beobachten(self.verlauf_schreiber.melden)
+        # beim Beenden noch wartende Einträge schreiben
+        atexit.register(self.verlauf_schreiber.leeren, 5.0)
+        self.handler = StudiengangHandler() # Aktualisierung über Webformular
+        self.ansicht = StudiengangAnsicht() # Gibt die Flask Templates zur Ansicht aus (HTML)
+        self.html_cache = HTMLCache(config.html_cache_groesse) # Gerenderte Dashboard-Seiten je Mandant und Version
+        self.statisch = StatischeDateien(app.static_folder, config.statisch_verzeichnis) # CSS und Bilder mit Fingerabdruck
+        self.importer_massen = StudiengangImporter(self.speicher) # Massenimport vieler CSV-Dateien im Hintergrund
+        # Spalten aller Studierenden für /api/kohorte - gespeicherte und importierte Studiengänge werden gemeldet
+        self.kohorten = KohortenCache(self.speicher, config.kohorte_neuaufbau_sekunden)
+        self.manager.beobachten(self.kohorten.melden)
+        self.importer_massen.beobachten(self.kohorten.melden)
+        # Passwortprüfung (scrypt) in eigenen Prozessen, begrenzte Warteschlange - Fehlversuche je Client gedrosselt
+        self.pruefer = PasswortPruefer(config.passwort_hash, config.login_prozesse, config.login_warteschlange)
+        self.drossel = AnmeldeDrossel(config.login_versuche, config.login_nachfuellen_sekunden)
+        # Dauer der einzelnen Startphasen in Sekunden
+        self.startbericht = {}
+
+    @property
+    def config(self) -> Konfiguration:
+        """ Aktuelle Konfiguration - Verzeichnis des Massenimports und Seitengröße werden je Anfrage gelesen """
+        return self.konfiguration.aktuell
+
+    def konfiguration_uebernehmen(self, alt: Konfiguration, neu: Konfiguration):
+        """ Übernimmt eine neu geladene Konfiguration - laufende Anfragen arbeiten mit den bisherigen Objekten weiter """
+        geaendert = alt.unterschiede(neu)
+        self.app.secret_key = neu.secret_key
+        self.pruefer.passwort_hash = neu.passwort_hash
+        self.drossel.versuche, self.drossel.nachfuellen_sekunden = neu.login_versuche, neu.login_nachfuellen_sekunden
+        self.html_cache.max_eintraege = neu.html_cache_groesse
+        self.kohorten.neuaufbau = neu.kohorte_neuaufbau_sekunden
+        protokoll.level_setzen(neu.log_level)
+        if geaendert & SPEICHER_FELDER:
+            # neue Repositories vollständig anlegen, dann in einem Schritt tauschen
+            self.speicher, self.importer = speicher_erstellen(neu), StudiengangCSVData(neu.csv_datei)
+            self.manager.speicher_tauschen(self.speicher, self.importer)
+            self.importer_massen.speicher = self.speicher
+            self.kohorten.speicher_tauschen(self.speicher)
+            # Versionen verschiedener Repositories sind nicht vergleichbar
+            self.html_cache.leeren()
+            self.service.ziel_auswertung.leeren()
+        if "verlauf_verzeichnis" in geaendert:
+            self.verlauf = self.manager.verlauf = StudiengangVerlauf(neu.verlauf_verzeichnis)
+        if geaendert & NEUSTART_FELDER:
+            logging.warning("Erst nach Neustart wirksam: %s", ", ".join(sorted(geaendert & NEUSTART_FELDER)))
+
+    def templates_kompilieren(self):
+        """ Kompiliert alle Templates vorab - aus dem Bytecode-Cache, falls ein anderer Prozess sie schon übersetzt hat """
+        for name in self.app.jinja_env.list_templates(extensions=["html"]):
+            self.app.jinja_env.get_template(name)
+
+    def vorwaermen(self):
+        """ Lädt den Studiengang und rendert das Dashboard einmal - füllt Repository-, Ziel- und HTML-Cache """
+        try:
+            with self.app.test_request_context('/'):
+                self.ansicht.dashboard(self.manager, self.service, request, session, self.html_cache)
+        except Exception as e:
+            # ohne warme Caches läuft die App trotzdem - die erste Anfrage lädt dann selbst
+            logging.error("Vorwärmen fehlgeschlagen: %s", e)
+        # keine Datenbankverbindung über fork weitergeben (--preload), jeder Worker öffnet seine eigene
+        schliessen = getattr(self.speicher, "schliessen", None)
+        if schliessen is not None:
+            schliessen()
+
+
+def komponenten(app: Flask | None = None) -> Komponenten:
+    """ Komponenten der App, ohne Angabe die der App der aktuellen Anfrage """
+    from flask import current_app
+    return (app or current_app).extensions["dashboard"]
+
+
+def create_app(konfiguration_datei: str | None = None, vorwaermen: bool | None = None) -> Flask:
+    """ Erstellt die App - Konfiguration, Repositories, Routen, vorkompilierte Templates und optional warme Caches """
+    start = time.perf_counter()
+    # Konfigurationsdatei einmal laden - geänderte Werte werden ohne Neustart übernommen (Datei ändern oder SIGHUP)
+    konfiguration = standard_konfiguration if konfiguration_datei is None else Konfigurationsdatei(konfiguration_datei)
+    config = konfiguration.aktuell
+    # Logging über eine Warteschlange, ein Hintergrund-Thread schreibt in die rotierende Log-Datei (Text oder JSON)
+    protokoll.einrichten(config)
+    nach_konfiguration = time.perf_counter()
+
+    # Erstellen des Haupt-Objekts
+    app = Flask(__name__)
+    # Notwendig für Session-Cookie und Flash-Nachrichten
+    app.secret_key = config.secret_key
+    # übersetzte Templates auf der Platte - ein neuer Prozess lädt den Bytecode, statt die Templates zu kompilieren
+    os.makedirs(config.template_cache_verzeichnis, exist_ok=True)
+    app.jinja_options = {**app.jinja_options, "bytecode_cache": FileSystemBytecodeCache(config.template_cache_verzeichnis)}
+
+    k = Komponenten(app, konfiguration)
+    app.extensions["dashboard"] = k
+    konfiguration.beobachten(k.konfiguration_uebernehmen)
+    konfiguration.signal_registrieren()
+    metriken_registrieren(k)
+    routen_registrieren(app, k)
+    nach_komponenten = time.perf_counter()
+
+    k.templates_kompilieren()
+    nach_templates = time.perf_counter()
+    # Fingerabdrücke und komprimierte Varianten vor dem ersten Rendern, damit jede Seite die neuen Namen enthält
+    k.statisch.erstellen()
+    nach_statisch = time.perf_counter()
+    if config.vorwaermen if vorwaermen is None else vorwaermen:
+        k.vorwaermen()
+    ende = time.perf_counter()
+
+    k.startbericht = {
+        "import": round(_import_dauer, 4),
+        "konfiguration": round(nach_konfiguration - start, 4),
+        "komponenten": round(nach_komponenten - nach_konfiguration, 4),
+        "templates": round(nach_templates - nach_komponenten, 4),
+        "statisch": round(nach_statisch - nach_templates, 4),
+        "vorwaermen": round(ende - nach_statisch, 4),
+        "gesamt": round(_import_dauer + ende - start, 4),
+    }
+    logging.warning("App gestartet (Sekunden): %s", ", ".join(f"{name}={dauer}" for name, dauer in k.startbericht.items()))
+    return app
+
+
+def metriken_registrieren(k: Komponenten):
+    """ Zähler der Caches werden erst beim Abruf von /metrics abgefragt """
+    metriken.abfrage("dashboard_html_cache", "Treffer und Fehlschläge des HTML-Caches",
+                     lambda: {"treffer": k.html_cache.treffer, "fehlschlaege": k.html_cache.fehlschlaege})
+    metriken.abfrage("dashboard_ziel_auswertung", "Treffer und Fehlschläge der zwischengespeicherten Zielauswertung",
+                     lambda: {"treffer": k.service.ziel_auswertung.treffer,
+                              "fehlschlaege": k.service.ziel_auswertung.fehlschlaege})
+    metriken.abfrage("dashboard_passwortpruefungen_laufend", "Laufende und wartende Passwortprüfungen",
+                     lambda: k.pruefer.in_bearbeitung)
+    metriken.abfrage("dashboard_anmeldungen_abgelehnt", "Abgelehnte Anmeldungen (gedrosselt oder überlastet)",
+                     lambda: {"gedrosselt": k.drossel.gedrosselt, "ueberlastet": k.pruefer.abgelehnt}, typ="counter")
+    metriken.abfrage("dashboard_konfiguration_neu_geladen", "Neu geladene und abgelehnte Konfigurationen",
+                     lambda: {"neu_geladen": k.konfiguration.neu_geladen,
+                              "fehlgeschlagen": k.konfiguration.fehlgeschlagen}, typ="counter")
+    # Repository kann getauscht werden - immer das aktuelle des Managers abfragen
+    metriken.abfrage("dashboard_repository_cache", "Treffer, Fehlschläge und Einträge des Repository-Caches",
+                     lambda: k.manager.speicher.cache_statistik() if hasattr(k.manager.speicher, "cache_statistik") else {})
+    metriken.abfrage("dashboard_kohorte", "Vollständige Aufbauten und einzeln neu eingelesene Studierende der Kohorte",
+                     lambda: {"neu_aufgebaut": k.kohorten.neu_aufgebaut, "aktualisiert": k.kohorten.aktualisiert},
+                     typ="counter")
+    metriken.abfrage("dashboard_verlauf_eintraege", "Im Hintergrund geschriebene, übersprungene und wartende Verlaufseinträge",
+                     lambda: {"geschrieben": k.verlauf_schreiber.geschrieben, "uebersprungen": k.verlauf_schreiber.uebersprungen,
+                              "fehlgeschlagen": k.verlauf_schreiber.fehlgeschlagen, "wartend": k.verlauf_schreiber.wartend})
+    metriken.abfrage("dashboard_start_sekunden", "Dauer der Startphasen der App (Import, Konfiguration, Templates, ...)",
+                     lambda: k.startbericht)
+    metriken.abfrage("dashboard_log_warteschlange", "Noch nicht in die Log-Datei geschriebene Einträge",
+                     lambda: protokoll.wartend)
+
+
+def routen_registrieren(app: Flask, k: Komponenten):
+    """ Hooks, Routen und Kommandos der App """
+
+    # Zeitmessung je Anfrage: Start merken, nach der Antwort Dauer und Status je Route erfassen
+    @app.before_request
+    def anfrage_start():
+        g.anfrage_start = time.perf_counter()
+        # ID der Anfrage für die Log-Einträge, von einem Proxy übernommen oder neu erzeugt
+        g.anfrage_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex[:16]
+        # geänderte Konfigurationsdatei übernehmen, die Datei wird höchstens alle paar Sekunden geprüft
+        k.konfiguration.pruefen()
+
+    @app.after_request
+    def anfrage_ende(antwort):
+        # Route als Muster (z.B. /api/modul/<int:semester>/<int:index>), damit nicht jede URL ein eigenes Label bekommt
+        route = request.url_rule.rule if request.url_rule else "unbekannt"
+        start = g.pop('anfrage_start', None)
+        if start is not None:
+            dauer = time.perf_counter() - start
+            anfrage_dauer.beobachten(dauer, route=route, methode=request.method)
+            # Zugriffszeile nur bei LOG_LEVEL=INFO, sonst verwirft das Level sie vor jeder Formatierung
+            logging.info("%s %s %s", request.method, request.path, antwort.status_code,
+                         extra={"dauer_ms": round(dauer * 1000, 2)})
+        anfragen.erhoehen(route=route, methode=request.method, status=antwort.status_code)
+        if 'anfrage_id' in g:
+            antwort.headers['X-Request-ID'] = g.anfrage_id
+        return antwort
+
+    # Zeitmessung der Templates über die Signale von Flask, verschachtelte Templates über einen Stapel
+    @before_render_template.connect_via(app)
+    def template_start(sender, template, context, **extra):
+        g.setdefault('template_start', []).append(time.perf_counter())
+
+    @template_rendered.connect_via(app)
+    def template_ende(sender, template, context, **extra):
+        starts = g.get('template_start')
+        if starts:
+            template_dauer.beobachten(time.perf_counter() - starts.pop(), template=template.name)
+
+    # statische Dateien: url_for liefert den Namen mit Fingerabdruck, ausgeliefert werden sie unveränderlich und
+    # vorab komprimiert - wiederholte Seitenaufrufe laden CSS und Favicon aus dem Browser-Cache, ohne Anfrage
+    app.url_defaults(k.statisch.url_ersetzen)
+    app.view_functions['static'] = lambda filename: k.statisch.ausliefern(filename, request)
+
+    # Dashboard
+    @app.route('/')
+    def dashboard():
+        # Aufruf der Ansicht -> Rückgabe: Flask Template für das Dashboard
+        # manager -> Laden des Studiengangs
+        # service -> Berechnungen für das Dashboard
+        # request, session, html_cache -> bedingte Anfragen (304) und zwischengespeicherte Seiten
+        return k.ansicht.dashboard(k.manager, k.service, request, session, k.html_cache)
+
+    # Login
+    @app.route('/login', methods=['GET', 'POST'])
+    def login():
+        # Aufruf der Ansicht für den Login -> Rückgabe: Flask Template für Login Seite
+        # session -> Speichern des Cookies für Login
+        # request -> GET zum Anzeigen der Seite, POST für Login
+        # pruefer -> Authentifizierung des Users gegen den Hash aus der Config, in eigenen Prozessen
+        # drossel -> begrenzt Fehlversuche je Client
+        return k.ansicht.login(session, request, k.pruefer, k.drossel)
+
+    # Logout
+    @app.route('/logout')
+    def logout():
+        # Aufruf der Ansicht für Logout -> Rückgabe: Weiterleitung zum Dashboard
+        # session -> löschen des Cookies für Login
+        return k.ansicht.logout(session)
+
+    # Bearbeiten
+    @app.route('/edit', methods=['GET', 'POST'])
+    def bearbeiten():
+        # Aufruf der Ansicht für Bearbeiten -> Rückgabe: Flask-Template fürs Bearbeiten oder Weiterleitung zum Login
+        # session -> Prüfung, ob Authentifiziert
+        # request -> GET zum Anzeigen der Seite, POST für Aktualisierung der Daten
+        # handler -> verantwortlich für die Weitergabe der Daten nach Aktualisierung über Webformular
+        # manager -> Laden des Studiengangs
+        # edit_seitengroesse -> höchstens so viele Module je Seite, sonst ein ganzes Semester
+        return k.ansicht.bearbeiten(session, request, k.handler, k.manager, k.config.edit_seitengroesse)
+
+    # Einzelnes Modul ändern
+    @app.route('/api/modul/<int:semester>/<int:index>', methods=['PATCH'])
+    def modul_patch(semester, index):
+        # Aufruf der Ansicht für Einzeländerungen -> Rückgabe: JSON mit neuer Version oder Fehlermeldung
+        # semester, index -> Nummer des Semesters und Position des Moduls im Semester
+        return k.ansicht.modul_patch(session, request, k.handler, k.manager, semester, index)
+
+    # Studiengang als JSON (nur lesend), Feldauswahl über ?felder=titel,semester
+    @app.route('/api/studiengang')
+    def studiengang_api():
+        # Aufruf der Ansicht -> Rückgabe: JSON des Studiengangs mit ETag
+        return k.ansicht.studiengang_api(k.manager, request)
+
+    # Kennzahlen der Dashboard-Seite als JSON, Feldauswahl über ?felder=notendurchschnitt,erreichte_credits
+    @app.route('/api/kennzahlen')
+    def kennzahlen_api():
+        # Aufruf der Ansicht -> Rückgabe: JSON der Kennzahlen mit ETag
+        return k.ansicht.kennzahlen_api(k.manager, k.service, request)
+
+    # Verlauf der Kennzahlen als JSON, verdichtet auf ?punkte=200 im Zeitraum ?von=2024-01-01&bis=2024-12-31
+    @app.route('/api/verlauf')
+    def verlauf_api():
+        # Aufruf der Ansicht -> Rückgabe: JSON mit einer Liste je Kennzahl und ETag
+        return k.ansicht.verlauf_api(k.manager, request)
+
+    # Push geänderter Kennzahlen (Server-Sent Events) gibt es nur im asynchronen Betrieb (asgi.py) -
+    # 204 beendet die Verbindungsversuche des Browsers, die Seite bleibt dann statisch
+    @app.route('/ereignisse')
+    def ereignisse():
+        return '', 204
+
+    # Export als CSV (Studienablaufplan mit Noten), gestreamt - ?mandanten=alle für alle Studiengänge
+    @app.route('/api/export.csv')
+    def csv_export():
+        # Aufruf der Ansicht für den Export -> Rückgabe: CSV-Datei, zeilenweise erzeugt
+        return k.ansicht.csv_export(session, request, k.manager)
+
+    # Messwerte im Prometheus-Textformat
+    @app.route('/metrics')
+    def metriken_ausgeben():
+        # Aufruf der Ansicht für die Messwerte -> Rückgabe: Text für Prometheus
+        return k.ansicht.metriken(metriken)
+
+    # Auswertungen über alle Mandanten
+    @app.route('/api/kohorte')
+    def kohorte():
+        # Aufruf der Ansicht für Kohorten-Auswertungen -> Rückgabe: JSON mit Notenverteilung, Bestehensquoten, Perzentilen
+        return k.ansicht.kohorte(session, k.kohorten)
+
+    # Massenimport starten
+    @app.route('/api/import', methods=['POST'])
+    def import_starten():
+        # Aufruf der Ansicht für den Import -> Rückgabe: 202 mit Auftrag, Fortschritt unter /api/import/<id>
+        return k.ansicht.import_starten(session, request, k.importer_massen, k.config.import_verzeichnis)
+
+    # Fortschritt des Massenimports
+    @app.route('/api/import/<auftrag_id>')
+    def import_status(auftrag_id):
+        return k.ansicht.import_status(session, k.importer_massen, auftrag_id)
+
+    # Massenimport über die Kommandozeile: flask --app app importieren import/*.csv
+    @app.cli.command('importieren')
+    @click.argument('dateien', nargs=-1, required=True)
+    def importieren(dateien):
+        auftrag = k.importer_massen.starten(dateien)
+        # Fortschritt jede Sekunde ausgeben, bis der Auftrag abgeschlossen ist
+        while not auftrag.warten(1):
+            click.echo(f"{auftrag.verarbeitet}/{len(auftrag.dateien)} Dateien eingelesen, {auftrag.gespeichert} gespeichert")
+        for mandant, fehler in auftrag.fehler.items():
+            for eintrag in fehler:
+                click.echo(f"{mandant}: Zeile {eintrag['zeile']}: {eintrag['fehler']}", err=True)
+        click.echo(f"Import {auftrag.status}.")
+
+    # Migration einer JSON-Datei in die SQLite-Datenbank: flask --app app migrieren data.json --mandant standard
+    @app.cli.command('migrieren')
+    @click.argument('json_datei')
+    @click.option('--mandant', default=None, help='Mandant, unter dem der Studiengang gespeichert wird')
+    def migrieren(json_datei, mandant):
+        # Ziel ist immer die SQLite-Datenbank aus der Konfiguration, unabhängig vom eingestellten Speicher
+        StudiengangSQLiteData(k.config.sqlite_datei).importieren_aus_json(json_datei, mandant)
+        click.echo(f"{json_datei} wurde migriert.")
+
+    # Export eines Studiengangs als JSON, unabhängig vom Speicherformat: flask --app app exportieren export.json
+    # (mit der Endung .csv als Studienablaufplan mit Noten)
+    @app.cli.command('exportieren')
+    @click.argument('ziel_datei')
+    @click.option('--mandant', default=None, help='Mandant, dessen Studiengang exportiert wird')
+    def exportieren(ziel_datei, mandant):
+        studiengang = k.manager.speicher.lesen(mandant)
+        if studiengang is None:
+            raise click.ClickException("Kein Studiengang vorhanden.")
+        if ziel_datei.lower().endswith('.csv'):
+            StudiengangCSVData(ziel_datei, mit_noten=True).speichern(studiengang)
+            click.echo(f"Studiengang nach {ziel_datei} exportiert.")
+            return
+        with open(ziel_datei, 'w', encoding='utf-8') as json_file:
+            json.dump(StudiengangJSONConverter.serialisieren(studiengang), json_file, indent=4, ensure_ascii=False)
+        click.echo(f"Studiengang nach {ziel_datei} exportiert.")
+
+    # Fingerabdrücke und komprimierte Varianten vorab erzeugen (z.B. beim Build): flask --app app statisch
+    @app.cli.command('statisch')
+    def statisch():
+        for name, neu in sorted(k.statisch.erstellen().items()):
+            click.echo(f"{name} -> {neu}")
+
+    # Dauer der Startphasen: flask --app app startbericht
+    @app.cli.command('startbericht')
+    def startbericht():
+        click.echo(json.dumps(k.startbericht, indent=2))
+
+
+# App für ältere Aufrufe (import app; app.dashboard_app, app.manager, ...) - wird erst beim ersten Zugriff erstellt
+_standard_app = None
+_standard_sperre = threading.Lock()
+
+
+def __getattr__(name):
+    global _standard_app
+    if name != "dashboard_app" and name not in ("config", "speicher", "importer", "service", "manager", "handler",
+                                                 "ansicht", "html_cache", "verlauf", "importer_massen", "pruefer",
+                                                 "drossel", "konfiguration"):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _standard_sperre:
+        if _standard_app is None:
+            _standard_app = create_app()
+    if name == "dashboard_app":
+        return _standard_app
+    return getattr(komponenten(_standard_app), name)
 
 
 # Auf allen verfügbaren Netzwerk-Schnittstellen auf Port 5000 lauschen
 if __name__ == '__main__':
-    dashboard_app.run(host="0.0.0.0", port=5000)
+    create_app().run(host="0.0.0.0", port=5000)
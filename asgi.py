@@ -0,0 +1,206 @@
+""" Asynchroner Betrieb des Dashboards unter einem ASGI-Server
+
+Start: uvicorn asgi:anwendung --port 5000 --timeout-graceful-shutdown 5   (oder python asgi.py)
+Mehrere Prozesse: uvicorn "asgi:anwendung_erstellen" --factory --workers 4 - jeder Worker erstellt seine eigene App.
+Dashboard und /metrics laufen als Coroutinen in der Ereignisschleife, Dateizugriffe im Thread-Pool des
+asynchronen Repositories. /ereignisse hält Server-Sent-Events-Verbindungen offen, ohne je einen Thread zu belegen.
+Alle übrigen Routen (Login, Bearbeiten, API) werden an die Flask-App weitergereicht. Offene Ereignisströme enden nicht
+von selbst - ohne Timeout beim Herunterfahren wartet uvicorn unbegrenzt auf sie.
+"""
+import asyncio
+import io
+import logging
+import sys
+from urllib.parse import parse_qs
+
+from asgiref.wsgi import WsgiToAsgi
+from flask import request, session
+
+import app as dashboard
+from klassen.metriken import metriken
+from klassen.repository.async_data import StudiengangAsyncData
+from klassen.view.ereignisse import EreignisVerteiler
+
+
+def anwendung_erstellen(flask_app=None):
+    """ Erstellt die ASGI-Anwendung über einer Flask-App (ohne Angabe über einer neuen aus create_app()) """
+    flask_app = flask_app or dashboard.create_app()
+    k = dashboard.komponenten(flask_app)
+    # Repository-Zugriffe asynchron über denselben (synchronen) Speicher wie die Flask-App
+    speicher_async = StudiengangAsyncData(k.manager.speicher, k.config.asgi_threads)
+    metriken.abfrage("dashboard_lesezugriffe_async", "Ausgeführte und gebündelte Lesezugriffe im asynchronen Betrieb",
+                     lambda: {"ausgefuehrt": speicher_async.ausgefuehrt, "gebuendelt": speicher_async.gebuendelt},
+                     typ="counter")
+    # Push geänderter Kennzahlen - der Manager meldet jede gespeicherte Änderung, die Versionsabfrage erkennt
+    # zusätzlich Änderungen anderer Prozesse
+    verteiler = EreignisVerteiler(speicher_async, k.manager, k.service, k.config.sse_intervall)
+    k.manager.beobachten(verteiler.melden)
+
+    def konfiguration_uebernehmen(alt, neu):
+        # nach der Flask-App registriert - der Manager hat dann bereits das neue Repository
+        verteiler.intervall = neu.sse_intervall
+        if speicher_async.speicher is not k.manager.speicher:
+            speicher_async.speicher = k.manager.speicher
+            verteiler.zuruecksetzen()
+
+    k.konfiguration.beobachten(konfiguration_uebernehmen)
+    metriken.abfrage("dashboard_sse_verbindungen", "Offene Server-Sent-Events-Verbindungen", lambda: verteiler.anzahl)
+    metriken.abfrage("dashboard_sse_ereignisse", "Gesendete Server-Sent-Events", lambda: verteiler.gesendet,
+                     typ="counter")
+
+    async def dashboard_route():
+        # wie die Route / in app.py, Laden und Versionsabfrage als Coroutinen
+        return await k.ansicht.dashboard_async(speicher_async, k.manager, k.service, request, session, k.html_cache)
+
+    async def metriken_route():
+        return k.ansicht.metriken(metriken)
+
+    def ereignisse_route(scope):
+        # Stand der geladenen Seite aus ?version=, danach nur neuere Kennzahlen - beim erneuten Verbinden sendet der
+        # Browser die ID (= Version) des zuletzt empfangenen Ereignisses
+        version = dict(scope["headers"]).get(b"last-event-id", b"").decode("latin-1")
+        if not version:
+            version = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("version", [""])[0]
+        return verteiler.ereignisse(None, int(version) if version.isdigit() else None)
+
+    # asynchrone Routen: (Methode, Pfad) -> Coroutine
+    routen = {
+        ("GET", "/"): dashboard_route,
+        ("GET", "/metrics"): metriken_route,
+    }
+    # Datenströme: (Methode, Pfad) -> Funktion, die zum Scope einen asynchronen Generator liefert
+    stroeme = {
+        ("GET", "/ereignisse"): ereignisse_route,
+    }
+    # beim Herunterfahren: offene Ereignisströme beenden, dann den Thread-Pool schließen
+    return DashboardASGI(flask_app, routen, stroeme, [verteiler.beenden, speicher_async.beenden])
+
+def _environ(scope):
+    """ Baut eine WSGI-Umgebung aus dem ASGI-Scope, damit Request, Session und url_for von Flask funktionieren """
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", ""),
+        "PATH_INFO": scope["path"],
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(),
+        "wsgi.errors": sys.stderr,
+    }
+    for name, wert in scope["headers"]:
+        name = name.decode("latin-1").upper().replace("-", "_")
+        wert = wert.decode("latin-1")
+        if name not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            name = "HTTP_" + name
+        # mehrfach gesendete Header zusammenfassen
+        environ[name] = f"{environ[name]},{wert}" if name in environ else wert
+    return environ
+
+
+class DashboardASGI:
+    """ ASGI-Anwendung: asynchrone Routen direkt, alles andere über die Flask-App im Thread-Pool """
+
+    def __init__(self, flask_app, routen: dict, stroeme: dict | None = None, beenden: list | None = None):
+        self.flask_app = flask_app
+        self.routen = routen
+        self.stroeme = stroeme or {}
+        # Funktionen, die beim Herunterfahren des Servers aufgerufen werden
+        self.beenden = beenden or []
+        self.wsgi = WsgiToAsgi(flask_app)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lebenszyklus(receive, send)
+            return
+        schluessel = (scope.get("method"), scope.get("path")) if scope["type"] == "http" else None
+        if schluessel in self.stroeme:
+            await self._strom(receive, send, self.stroeme[schluessel](scope))
+            return
+        route = self.routen.get(schluessel)
+        if route is None:
+            await self.wsgi(scope, receive, send)
+            return
+        await self._async_anfrage(scope, send, route)
+
+    async def _async_anfrage(self, scope, send, coroutine):
+        """ Führt eine asynchrone Route im Request-Kontext der Flask-App aus """
+        environ = _environ(scope)
+        # der Kontext liegt in einer ContextVar und gilt damit nur für diese Anfrage (eigener Task);
+        # beim Betreten ordnet Flask die URL ihrer Route zu, die Hooks (z.B. Zeitmessung) sehen dieselbe Route
+        with self.flask_app.request_context(environ):
+            try:
+                antwort = self.flask_app.preprocess_request()
+                if antwort is None:
+                    antwort = await coroutine()
+                antwort = self.flask_app.process_response(self.flask_app.make_response(antwort))
+            except Exception as e:
+                logging.error("Fehler in asynchroner Route %s: %s", scope['path'], e)
+                antwort = self.flask_app.process_response(self.flask_app.make_response(("Interner Fehler", 500)))
+        await send({"type": "http.response.start", "status": antwort.status_code,
+                    "headers": [(name.lower().encode("latin-1"), wert.encode("latin-1"))
+                                for name, wert in antwort.headers.items()]})
+        await send({"type": "http.response.body", "body": antwort.get_data()})
+
+    async def _strom(self, receive, send, strom):
+        """ Sendet einen Ereignisstrom, bis der Client trennt oder der Strom endet (ohne Flask-Hooks, da die Dauer
+        der Verbindung keine Antwortzeit ist) """
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"text/event-stream; charset=utf-8"), (b"cache-control", b"no-cache"),
+                                (b"x-accel-buffering", b"no")]})
+
+        async def senden():
+            async for teil in strom:
+                await send({"type": "http.response.body", "body": teil, "more_body": True})
+
+        async def getrennt():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+
+        aufgaben = [asyncio.ensure_future(senden()), asyncio.ensure_future(getrennt())]
+        try:
+            fertig, _ = await asyncio.wait(aufgaben, return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            # Server bricht beim Herunterfahren offene Verbindungen nach dem Timeout ab
+            fertig = {aufgaben[0]}
+        finally:
+            # der abgebrochene Generator meldet die Verbindung beim Verteiler ab
+            for aufgabe in aufgaben:
+                aufgabe.cancel()
+        # Strom beendet (z.B. Herunterfahren): Antwort abschließen, der Browser verbindet sich später neu
+        if aufgaben[0] in fertig:
+            try:
+                await send({"type": "http.response.body", "body": b""})
+            except Exception:
+                pass
+
+    async def _lebenszyklus(self, receive, send):
+        """ Start und Ende des Servers - beim Beenden den Thread-Pool schließen """
+        while True:
+            nachricht = await receive()
+            if nachricht["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif nachricht["type"] == "lifespan.shutdown":
+                for funktion in self.beenden:
+                    funktion()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+def __getattr__(name):
+    # uvicorn asgi:anwendung - erst beim Zugriff erstellt, damit --factory nicht zusätzlich eine zweite App erstellt
+    if name != "anwendung":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    global anwendung
+    anwendung = anwendung_erstellen(dashboard.dashboard_app)
+    return anwendung
+
+
+# Lokal mit uvicorn auf Port 5000 starten
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(anwendung_erstellen(), host="0.0.0.0", port=5000, timeout_graceful_shutdown=5)
@@ -0,0 +1,125 @@
+""" Vergleicht Anfragen pro Sekunde und p99-Latenz des Dashboards: synchroner Flask-Server gegen ASGI (uvicorn)
+
+Aufruf aus dem Projektverzeichnis: python -m benchmark.asgi --verbindungen 50 --dauer 10
+Beide Server laufen als eigene Prozesse in einem temporären Verzeichnis mit denselben Daten.
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJEKT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Startbefehle der Server, {port} wird ersetzt
+SERVER = {
+    "sync": [sys.executable, "-c",
+             "import app; app.dashboard_app.run(host='127.0.0.1', port={port}, threaded=True)"],
+    "asgi": [sys.executable, "-m", "uvicorn", "asgi:anwendung", "--host", "127.0.0.1", "--port", "{port}",
+             "--log-level", "warning"],
+}
+
+
+def freier_port():
+    """ Sucht einen freien TCP-Port """
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def verbindung(port: int, ende: float, zeiten: list, fehler: list, anfrage: bytes):
+    """ Eine Keep-Alive-Verbindung, die bis zum Ende Anfragen stellt und die Latenz jeder Antwort misst """
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        while time.perf_counter() < ende:
+            start = time.perf_counter()
+            writer.write(anfrage)
+            await writer.drain()
+            kopf = await reader.readuntil(b"\r\n\r\n")
+            status = int(kopf.split(b" ", 2)[1])
+            laenge = 0
+            for zeile in kopf.split(b"\r\n"):
+                if zeile.lower().startswith(b"content-length:"):
+                    laenge = int(zeile.split(b":", 1)[1])
+            await reader.readexactly(laenge)
+            zeiten.append(time.perf_counter() - start)
+            if status != 200:
+                fehler.append(status)
+            # der Werkzeug-Entwicklungsserver schließt die Verbindung nach jeder Antwort
+            if b"connection: close" in kopf.lower() or reader.at_eof():
+                writer.close()
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    finally:
+        writer.close()
+
+
+async def last_erzeugen(port: int, verbindungen: int, dauer: float):
+    """ Erzeugt Last mit mehreren gleichzeitigen Verbindungen und gibt die Kennwerte zurück """
+    anfrage = f"GET / HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\n\r\n".encode()
+    zeiten, fehler = [], []
+    start = time.perf_counter()
+    ende = start + dauer
+    await asyncio.gather(*[verbindung(port, ende, zeiten, fehler, anfrage) for _ in range(verbindungen)])
+    gesamt = time.perf_counter() - start
+    zeiten.sort()
+    return {
+        "anfragen": len(zeiten),
+        "anfragen_pro_sekunde": round(len(zeiten) / gesamt, 1),
+        "p50_ms": round(zeiten[len(zeiten) // 2] * 1000, 2) if zeiten else None,
+        "p99_ms": round(zeiten[min(len(zeiten) - 1, int(len(zeiten) * 0.99))] * 1000, 2) if zeiten else None,
+        "fehler": len(fehler)
+    }
+
+
+def warten_bis_bereit(port: int, timeout: float = 20.0):
+    """ Wartet, bis der Server Verbindungen annimmt """
+    grenze = time.time() + timeout
+    while time.time() < grenze:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server auf Port {port} nicht erreichbar.")
+
+
+def messen(name: str, verzeichnis: str, verbindungen: int, dauer: float):
+    """ Startet den Server, wärmt ihn auf und misst unter Last """
+    port = freier_port()
+    befehl = [teil.replace("{port}", str(port)) for teil in SERVER[name]]
+    umgebung = dict(os.environ, PYTHONPATH=PROJEKT)
+    prozess = subprocess.Popen(befehl, cwd=verzeichnis, env=umgebung, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL)
+    try:
+        warten_bis_bereit(port)
+        # Aufwärmen: Studiengang anlegen, Caches füllen
+        asyncio.run(last_erzeugen(port, 1, 0.5))
+        return asyncio.run(last_erzeugen(port, verbindungen, dauer))
+    finally:
+        prozess.terminate()
+        prozess.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--verbindungen", type=int, default=50)
+    parser.add_argument("--dauer", type=float, default=10.0)
+    args = parser.parse_args()
+
+    ergebnis = {"verbindungen": args.verbindungen, "dauer_s": args.dauer}
+    for name in SERVER:
+        # jeder Server bekommt ein eigenes Verzeichnis mit Konfiguration und Studienablaufplan
+        with tempfile.TemporaryDirectory() as verzeichnis:
+            for datei in ("app.config", "studienablaufplan.csv"):
+                shutil.copy(os.path.join(PROJEKT, datei), verzeichnis)
+            ergebnis[name] = messen(name, verzeichnis, args.verbindungen, args.dauer)
+    print(json.dumps(ergebnis, indent=2))
+
+
+if __name__ == "__main__":
+    main()
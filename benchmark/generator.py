@@ -0,0 +1,81 @@
+import datetime
+import random
+
+from werkzeug.datastructures import MultiDict
+
+from klassen.domain.modul import Modul
+from klassen.domain.pruefungsleistung import Pruefungsleistung
+from klassen.domain.semester import Semester
+from klassen.domain.studiengang import Studiengang
+from klassen.domain.ziel_note import NotenZiel
+from klassen.domain.ziel_zeit import ZeitZiel
+
+# typische Prüfungsformen aus dem Studienablaufplan
+PRUEFUNGSARTEN = ["Klausur", "Portfolio", "Advanced Workbook", "Fallstudie", "Projektbericht", "Hausarbeit"]
+# mögliche Noten im deutschen Notensystem, 5.0 = nicht bestanden
+NOTEN = [1.0, 1.3, 1.7, 2.0, 2.3, 2.7, 3.0, 3.3, 3.7, 4.0, 5.0]
+
+
+def erzeuge_studiengang(zufall: random.Random, semester: int = 6, module_pro_semester: int = 6,
+                        anteil_benotet: float = 0.5, anteil_anerkannt: float = 0.1) -> Studiengang:
+    """ Erzeugt einen zufälligen, aber reproduzierbaren Studiengang der gewünschten Größe """
+    semester_liste = []
+    for nummer in range(1, semester + 1):
+        module = []
+        for position in range(module_pro_semester):
+            pruefungsleistung = Pruefungsleistung(zufall.choice(PRUEFUNGSARTEN), None, False)
+            wurf = zufall.random()
+            # ein Teil der Module ist anerkannt, ein weiterer Teil benotet, der Rest offen
+            if wurf < anteil_anerkannt:
+                pruefungsleistung.setze_anerkannt(True)
+            elif wurf < anteil_anerkannt + anteil_benotet:
+                pruefungsleistung.setze_note(zufall.choice(NOTEN))
+            module.append(Modul(f"Modul {nummer}.{position + 1}", zufall.choice([5, 5, 5, 10]), pruefungsleistung))
+        semester_liste.append(Semester(nummer, module))
+    start_datum = datetime.datetime(2020, 1, 1) + datetime.timedelta(days=zufall.randrange(0, 1500))
+    ziele = {"zeit": ZeitZiel(zufall.choice([1095, 1460, 2190])), "note": NotenZiel(zufall.choice([1.5, 2.0, 2.5]))}
+    return Studiengang(f"Studiengang {zufall.randrange(1000)}", start_datum, semester_liste, ziele)
+
+
+def erzeuge_mandanten(seed: int, anzahl: int, **groesse) -> dict:
+    """ Erzeugt reproduzierbar die Studiengänge mehrerer Mandanten - groesse wird an erzeuge_studiengang weitergegeben """
+    zufall = random.Random(seed)
+    return {f"m{i:06d}": erzeuge_studiengang(zufall, **groesse) for i in range(anzahl)}
+
+
+def csv_zeilen(studiengang: Studiengang) -> list[dict]:
+    """ Gibt die Module als Zeilen im Aufbau des Studienablaufplans zurück (wie csv.DictReader sie liefert) """
+    return [{"Semester": str(semester.nummer), "Modul": modul.titel, "ECTS": str(modul.credits),
+             "Pruefungsleistung": str(modul.pruefungsleistung.pruefungsart)}
+            for semester in studiengang.semester for modul in semester.module]
+
+
+def formular_daten(studiengang: Studiengang, semester_nummer: int | None = None) -> MultiDict:
+    """ Gibt die Daten zurück, die das Formular der Bearbeiten-Seite für den Studiengang absendet -
+    mit semester_nummer nur die Module dieses Semesters, wie die Seite je Semester """
+    daten = MultiDict([
+        ("version", str(studiengang.version)),
+        ("studien_titel", studiengang.titel),
+        ("start_datum", studiengang.start_datum.strftime('%Y-%m-%d')),
+        ("ziel_tage", str(studiengang.ziele['zeit'].zeitziel_in_tagen)),
+        ("ziel_note", str(studiengang.ziele['note'].notendurchschnitt))
+    ])
+    if semester_nummer is not None:
+        semester = studiengang.hole_semester(semester_nummer)
+        daten.add("semester", str(semester_nummer))
+        daten.add("start", "0")
+        daten.add("anzahl", str(len(semester.module)))
+    # je Modul eine Tabellenzeile, die Felder stehen in derselben Reihenfolge wie im Template
+    for semester in studiengang.semester:
+        if semester_nummer is not None and semester.nummer != semester_nummer:
+            continue
+        for modul in semester.module:
+            pl = modul.pruefungsleistung
+            if semester_nummer is None:
+                daten.add("mod_semester", str(semester.nummer))
+            daten.add("mod_titel", modul.titel)
+            daten.add("mod_pruefung", str(pl.pruefungsart))
+            daten.add("mod_credits", str(modul.credits))
+            daten.add("mod_note", "" if pl.note is None else str(pl.note).replace('.', ','))
+            daten.add("mod_check", "on" if pl.modul_anerkannt else "off")
+    return daten
@@ -0,0 +1,130 @@
+""" Misst die vektorisierten Kohorten-Auswertungen und vergleicht sie mit Schleifen über die Domänenobjekte, dazu den
+Weg einer Anfrage an /api/kohorte über den KohortenCache: erster Aufbau, unveränderte Kohorte, nach einer Änderung
+
+Aufruf aus dem Projektverzeichnis: python -m benchmark.kohorte --studierende 100000
+"""
+import argparse
+import datetime
+import json
+import random
+import time
+
+import numpy as np
+
+from benchmark.generator import erzeuge_studiengang
+from klassen.controller.service.kohorte import KohortenAnalyse, KohortenCache, KohortenSpeicher
+from klassen.repository.interface import IStudiengangRepository
+
+
+class VorlagenSpeicher(IStudiengangRepository):
+    """ Repository im Arbeitsspeicher: Mandant i nutzt die Vorlage i modulo Anzahl, gespeicherte Stände ersetzen sie -
+    so lassen sich 100.000 Mandanten ohne Millionen Domänenobjekte und ohne Dateizugriffe lesen """
+
+    def __init__(self, vorlagen: list, anzahl: int):
+        self.vorlagen = vorlagen
+        self.namen = [f"m{i}" for i in range(anzahl)]
+        self.gespeichert = {}
+
+    def mandanten(self):
+        return self.namen
+
+    def lesen(self, mandant: str | None = None):
+        studiengang = self.gespeichert.get(mandant)
+        if studiengang is None:
+            studiengang = self.vorlagen[int(mandant[1:]) % len(self.vorlagen)]
+        return studiengang
+
+    def laden(self, mandant: str | None = None):
+        return self.lesen(mandant).kopieren()
+
+    def speichern(self, studiengang, mandant: str | None = None):
+        studiengang.version += 1
+        self.gespeichert[mandant] = studiengang
+
+
+def synthetische_kohorte(studierende: int, module: int, seed: int) -> KohortenSpeicher:
+    """ Erzeugt die Spalten direkt als Arrays, ohne Millionen Domänenobjekte anzulegen """
+    rng = np.random.default_rng(seed)
+    zeilen = studierende * module
+    noten = rng.choice([1.0, 1.3, 1.7, 2.0, 2.3, 2.7, 3.0, 3.3, 3.7, 4.0, 5.0], size=zeilen)
+    wurf = rng.random(zeilen)
+    anerkannt = wurf < 0.1
+    # etwa die Hälfte der Module ist benotet, anerkannte Module haben keine Note
+    noten[(wurf >= 0.6) | anerkannt] = np.nan
+    return KohortenSpeicher(
+        mandanten=[f"m{i}" for i in range(studierende)],
+        modul_titel=[f"Modul {i}" for i in range(module)],
+        versatz=np.arange(0, zeilen + 1, module, dtype=np.int64),
+        modul_id=np.tile(np.arange(module, dtype=np.int32), studierende),
+        semester=np.tile(np.arange(module, dtype=np.int16) // 6 + 1, studierende),
+        ects=rng.choice(np.array([5, 5, 5, 10], dtype=np.int16), size=zeilen),
+        note=noten,
+        anerkannt=anerkannt,
+        ziel_note=rng.choice([1.5, 2.0, 2.5], size=studierende),
+        ziel_tage=rng.choice(np.array([1095, 1460, 2190], dtype=np.int32), size=studierende),
+        start_tag=(datetime.date(2020, 1, 1).toordinal() + rng.integers(0, 1500, size=studierende)).astype(np.int32)
+    )
+
+
+def messen(funktion):
+    """ Laufzeit eines Aufrufs in Millisekunden """
+    start = time.perf_counter()
+    funktion()
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--studierende", type=int, default=100000)
+    parser.add_argument("--module", type=int, default=36)
+    parser.add_argument("--vergleich", type=int, default=1000, help="Studierende für den Schleifen-Vergleich")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    ergebnis = {"studierende": args.studierende, "module": args.module}
+    start = time.perf_counter()
+    kohorte = synthetische_kohorte(args.studierende, args.module, args.seed)
+    ergebnis["aufbau_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    ergebnis["speicher_mb"] = round(sum(getattr(kohorte, feld).nbytes for feld in (
+        "versatz", "modul_id", "semester", "ects", "note", "anerkannt", "studierende")) / 1e6, 1)
+    analyse = KohortenAnalyse(kohorte)
+    ergebnis["vektorisiert_ms"] = {
+        "notenverteilung": messen(analyse.notenverteilung_pro_modul),
+        "bestehensquote": messen(analyse.bestehensquote_pro_modul),
+        "credit_perzentile": messen(analyse.credit_perzentile),
+        "zielerreichung": messen(analyse.zielerreichung)
+    }
+
+    # Vergleich: Kennzahlen je Studiengang-Objekt in einer Schleife, hochgerechnet auf die Kohorte
+    zufall = random.Random(args.seed)
+    studiengaenge = [(f"m{i}", erzeuge_studiengang(zufall)) for i in range(args.vergleich)]
+    jetzt = datetime.datetime.now()
+    schleife_ms = messen(lambda: [sg.berechne_kennzahlen(jetzt) for _, sg in studiengaenge])
+    ergebnis["schleife_kennzahlen_ms_hochgerechnet"] = round(schleife_ms * args.studierende / args.vergleich, 1)
+
+    # Anfrage an /api/kohorte: der Cache wird einmal aufgebaut, danach nur noch um gespeicherte Studiengänge ergänzt
+    speicher = VorlagenSpeicher([sg for _, sg in studiengaenge], args.studierende)
+    kohorten = KohortenCache(speicher, neuaufbau=0)
+    anfrage = lambda: json.dumps(kohorten.zusammenfassung())
+    geaendert = speicher.laden("m1")
+    geaendert.modul_aendern(1, 0, {"note": 1.0})
+
+    def nach_aenderung():
+        # wie StudiengangManager.modul_aktualisieren: speichern, Beobachter melden, danach die Anfrage
+        speicher.speichern(geaendert, "m1")
+        kohorten.melden("m1", geaendert.version)
+        anfrage()
+    ergebnis["anfrage_ms"] = {
+        "erster_aufbau": messen(anfrage),
+        "unveraendert": messen(anfrage),
+        "nach_aenderung": messen(nach_aenderung)
+    }
+    # Kontrolle: vektorisierte Durchschnitte entsprechen den Kennzahlen der Domänenobjekte
+    klein = KohortenAnalyse(KohortenSpeicher.aus_studiengaengen(studiengaenge))
+    assert klein.notendurchschnitte().tolist() == [sg.berechne_kennzahlen().notendurchschnitt for _, sg in studiengaenge]
+
+    print(json.dumps(ergebnis, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+""" Vergleicht Lade- und Speicherlatenz von JSON- und SQLite-Speicher bei vielen Mandanten
+
+Aufruf aus dem Projektverzeichnis: python -m benchmark.repository --mandanten 10000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from benchmark.generator import erzeuge_studiengang
+from klassen.repository.json_data import StudiengangJSONData
+from klassen.repository.sqlite_data import StudiengangSQLiteData
+
+
+def messen(funktion, mandanten):
+    """ Ruft die Funktion für jeden Mandanten auf und gibt die Einzelzeiten in Millisekunden zurück """
+    zeiten = []
+    for mandant in mandanten:
+        start = time.perf_counter()
+        funktion(mandant)
+        zeiten.append((time.perf_counter() - start) * 1000)
+    return zeiten
+
+
+def zusammenfassen(zeiten):
+    """ Median, 99. Perzentil und Summe der Messwerte """
+    zeiten = sorted(zeiten)
+    return {
+        "median_ms": round(statistics.median(zeiten), 4),
+        "p99_ms": round(zeiten[min(len(zeiten) - 1, int(len(zeiten) * 0.99))], 4),
+        "gesamt_s": round(sum(zeiten) / 1000, 3)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mandanten", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    zufall = random.Random(args.seed)
+    mandanten = [f"m{i:06d}" for i in range(args.mandanten)]
+    studiengaenge = {mandant: erzeuge_studiengang(zufall) for mandant in mandanten}
+    ergebnis = {"mandanten": args.mandanten}
+
+    with tempfile.TemporaryDirectory() as verzeichnis:
+        # JSON-Dateien im temporären Verzeichnis ablegen
+        speicher_json = StudiengangJSONData(dateiname=os.path.join(verzeichnis, "data.json"))
+        speicher_sqlite = StudiengangSQLiteData(os.path.join(verzeichnis, "data.sqlite3"))
+        for name, speicher in (("json", speicher_json), ("sqlite", speicher_sqlite)):
+            speichern = messen(lambda m: speicher.speichern(studiengaenge[m], m), mandanten)
+            # Lesereihenfolge mischen, damit nicht nur sequentiell gelesen wird
+            reihenfolge = mandanten[:]
+            zufall.shuffle(reihenfolge)
+            if name == "json":
+                # Cache leeren, damit tatsächlich von der Platte gelesen wird
+                speicher.cache_leeren()
+            laden = messen(speicher.laden, reihenfolge)
+            ergebnis[name] = {"speichern": zusammenfassen(speichern), "laden": zusammenfassen(laden)}
+
+    print(json.dumps(ergebnis, indent=2))
+
+
+if __name__ == "__main__":
+    main()
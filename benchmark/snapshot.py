@@ -0,0 +1,65 @@
+""" Vergleicht Lade- und Speicherzeit sowie Dateigröße von JSON- und Binär-Snapshots
+
+Aufruf aus dem Projektverzeichnis: python -m benchmark.snapshot --module 50 5000 500000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from benchmark.generator import erzeuge_studiengang
+from klassen.repository.json_data import StudiengangJSONData
+
+
+def messen(funktion, wiederholungen):
+    """ Kleinste Laufzeit aus mehreren Wiederholungen in Millisekunden """
+    zeiten = []
+    for _ in range(wiederholungen):
+        start = time.perf_counter()
+        funktion()
+        zeiten.append((time.perf_counter() - start) * 1000)
+    return round(min(zeiten), 3)
+
+
+def format_messen(studiengang, format, pfad, wiederholungen):
+    """ Speichert und lädt den Studiengang im angegebenen Format über die öffentlichen Methoden des Repositorys """
+    # Snapshot des vorigen Formats entfernen, die Kopie beginnt wieder bei Version 0
+    if os.path.exists(pfad):
+        os.remove(pfad)
+    kopie = studiengang.kopieren()
+    kopie.version = 0
+    speicher = StudiengangJSONData(format, pfad)
+    # speichern erhöht die Version der Kopie, sie passt dadurch immer zum gespeicherten Stand
+    speichern_ms = messen(lambda: speicher.speichern(kopie), wiederholungen)
+    # jedes Laden mit einer neuen Instanz, damit tatsächlich von der Platte gelesen wird
+    laden_ms = messen(lambda: StudiengangJSONData(format, pfad).laden(), wiederholungen)
+    assert StudiengangJSONData(format, pfad).laden() == kopie
+    return {"speichern_ms": speichern_ms, "laden_ms": laden_ms, "bytes": os.path.getsize(pfad)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--module", type=int, nargs="+", default=[50, 5000, 500000])
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    ergebnisse = []
+    with tempfile.TemporaryDirectory() as verzeichnis:
+        pfad = os.path.join(verzeichnis, "snapshot")
+        for anzahl in args.module:
+            # Module auf höchstens 50 Semester verteilen
+            semester = min(50, anzahl)
+            studiengang = erzeuge_studiengang(random.Random(args.seed), semester, anzahl // semester)
+            # kleine Dateien öfter messen, damit Schwankungen weniger ins Gewicht fallen
+            wiederholungen = max(1, min(50, 50000 // anzahl))
+            ergebnis = {"module": semester * (anzahl // semester)}
+            for format in ("json", "binaer"):
+                ergebnis[format] = format_messen(studiengang, format, pfad, wiederholungen)
+            ergebnisse.append(ergebnis)
+    print(json.dumps(ergebnisse, indent=2))
+
+
+if __name__ == "__main__":
+    main()
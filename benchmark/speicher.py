@@ -0,0 +1,91 @@
+""" Misst den Speicherbedarf geladener Studiengänge in Bytes pro Modul
+
+Vergleicht die aktuellen Domänenklassen (slots, Enum, internierte Titel) mit dem früheren Aufbau
+(Dataclasses mit __dict__, jeder Text als eigener String).
+Aufruf aus dem Projektverzeichnis: python -m benchmark.speicher --mandanten 2000
+"""
+import argparse
+import gc
+import json
+import random
+import tracemalloc
+from dataclasses import dataclass, field
+
+from benchmark.generator import erzeuge_studiengang
+from klassen.repository.json_converter import StudiengangJSONConverter
+
+
+@dataclass
+class AltePruefungsleistung:
+    """ Prüfungsleistung im früheren Aufbau """
+    pruefungsart: str
+    note: float | None = None
+    modul_anerkannt: bool | None = None
+
+
+@dataclass
+class AltesModul:
+    """ Modul im früheren Aufbau """
+    titel: str
+    credits: int
+    pruefungsleistung: AltePruefungsleistung
+
+
+@dataclass
+class AltesSemester:
+    """ Semester im früheren Aufbau """
+    nummer: int
+    module: list = field(default_factory=list)
+
+
+def alt_laden(daten):
+    """ Baut die Semester wie der frühere Converter auf, ohne Enum und ohne Internieren """
+    return [AltesSemester(sem_data['nummer'], [
+        AltesModul(mod_data['titel'], int(mod_data['ects']), AltePruefungsleistung(
+            mod_data['pruefungsleistung'], mod_data['note'], bool(mod_data['anerkannt'])))
+        for mod_data in sem_data['module']]) for sem_data in daten['semester']]
+
+
+def neu_laden(daten):
+    """ Lädt die Semester mit dem aktuellen Converter """
+    return StudiengangJSONConverter.deserialisieren(daten).semester
+
+
+def bytes_pro_modul(laden, dokumente, module):
+    """ Dauerhaft belegter Speicher nach dem Laden aller Dokumente, geteilt durch die Anzahl der Module """
+    gc.collect()
+    tracemalloc.start()
+    vorher = tracemalloc.get_traced_memory()[0]
+    # jedes Dokument wie beim Laden aus einer Datei parsen - die Rohdaten werden danach wieder freigegeben,
+    # übrig bleiben nur die Domänenobjekte und die von ihnen referenzierten Strings
+    geladen = [laden(json.loads(dokument)) for dokument in dokumente]
+    gc.collect()
+    belegt = tracemalloc.get_traced_memory()[0] - vorher
+    tracemalloc.stop()
+    del geladen
+    return round(belegt / module, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mandanten", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    zufall = random.Random(args.seed)
+    studiengaenge = [erzeuge_studiengang(zufall) for _ in range(args.mandanten)]
+    dokumente = [json.dumps(StudiengangJSONConverter.serialisieren(sg)) for sg in studiengaenge]
+    module = sum(len(semester.module) for sg in studiengaenge for semester in sg.semester)
+    vorher = bytes_pro_modul(alt_laden, dokumente, module)
+    nachher = bytes_pro_modul(neu_laden, dokumente, module)
+    print(json.dumps({
+        "mandanten": args.mandanten,
+        "module": module,
+        "bytes_pro_modul_vorher": vorher,
+        "bytes_pro_modul_nachher": nachher,
+        "ersparnis_prozent": round((1 - nachher / vorher) * 100, 1)
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
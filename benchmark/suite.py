@@ -0,0 +1,208 @@
+""" Misst die zentralen Abläufe des Dashboards mit erzeugten Studiengängen und gibt die Ergebnisse als JSON aus
+
+Aufruf aus dem Projektverzeichnis:
+    python -m benchmark.suite --semester 12 --module-pro-semester 20 --ausgabe ergebnis.json
+    python -m benchmark.suite --vergleich ergebnis.json --toleranz 0.2
+Mit --vergleich wird jede Messung mit einem früheren Lauf verglichen, langsamere Messungen werden als Regression
+gemeldet und der Exit-Code ist 1.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+from dotenv import dotenv_values
+
+from app import create_app, komponenten
+from benchmark.generator import csv_zeilen, erzeuge_mandanten, formular_daten
+from klassen.controller.handler import StudiengangHandler
+from klassen.controller.service.service import StudiengangService
+from klassen.repository.csv_converter import StudiengangCSVConverter
+from klassen.repository.json_converter import StudiengangJSONConverter
+from klassen.repository.json_data import StudiengangJSONData
+
+PROJEKT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class FormularZiel:
+    """ Nimmt den vom Handler aufgebauten Studiengang entgegen, ohne ihn zu speichern - gemessen wird nur das Formular """
+
+    def __init__(self, studiengang=None):
+        self.kopf = None if studiengang is None else studiengang.kopf_kopieren()
+
+    def studiengang_aktualisieren(self, studiengang, mandant=None):
+        self.studiengang = studiengang
+
+    def kopf_laden(self, mandant=None):
+        return self.kopf.kopf_kopieren(), []
+
+    def semester_aktualisieren(self, kopf, nummer, module, start=0, anzahl=None, mandant=None):
+        self.module = module
+
+
+def app_erstellen(verzeichnis: str):
+    """ Flask-App mit eigener Konfiguration im temporären Verzeichnis - JSON-Repository auf data.json, Log, Caches und
+    Verlauf ebenfalls dort, app.config und data.json des Projekts bleiben unberührt """
+    werte = dotenv_values(os.path.join(PROJEKT, "app.config"))
+    werte.update(SPEICHER="json", JSON_FILE="data.json", CSV_FILE=os.path.join(PROJEKT, "studienablaufplan.csv"))
+    # nur Einträge der Datei werden relativ zu ihr aufgelöst, Standardwerte relativ zum Arbeitsverzeichnis
+    werte.update(LOG_FILE="dashboard.log", TEMPLATE_CACHE_DIR="cache/templates", STATIC_CACHE_DIR="cache/static",
+                 VERLAUF_DIR="verlauf", IMPORT_DIR="import")
+    pfad = os.path.join(verzeichnis, "app.config")
+    with open(pfad, 'w', encoding='utf-8') as datei:
+        datei.writelines(f"{schluessel}={wert}\n" for schluessel, wert in werte.items())
+    return create_app(pfad, vorwaermen=False)
+
+
+def messen(funktion, wiederholungen: int, vorbereiten=None):
+    """ Führt die Funktion mehrfach aus - Rückgabe: Kennwerte der Laufzeit in Millisekunden
+    vorbereiten wird vor jeder Ausführung aufgerufen, ohne mitgemessen zu werden; sein Ergebnis wird übergeben """
+    zeiten = []
+    for _ in range(wiederholungen):
+        argumente = () if vorbereiten is None else (vorbereiten(),)
+        start = time.perf_counter()
+        funktion(*argumente)
+        zeiten.append((time.perf_counter() - start) * 1000)
+    zeiten.sort()
+    return {
+        "median_ms": round(statistics.median(zeiten), 4),
+        "min_ms": round(zeiten[0], 4),
+        "p95_ms": round(zeiten[min(len(zeiten) - 1, int(len(zeiten) * 0.95))], 4),
+        "wiederholungen": wiederholungen
+    }
+
+
+def alle_messen(studiengaenge: dict, wiederholungen: int, verzeichnis: str):
+    """ Führt alle Messungen aus und gibt sie nach Namen zurück """
+    ergebnisse = {}
+    mandanten = list(studiengaenge)
+    studiengang = studiengaenge[mandanten[0]]
+    jetzt = datetime.datetime.now()
+    kennzahlen = studiengang.berechne_kennzahlen(jetzt)
+
+    # Konverter
+    zeilen = csv_zeilen(studiengang)
+    ergebnisse["csv_deserialisieren"] = messen(lambda: StudiengangCSVConverter.deserialisieren(zeilen), wiederholungen)
+    daten = StudiengangJSONConverter.serialisieren(studiengang)
+    ergebnisse["json_serialisieren"] = messen(lambda: StudiengangJSONConverter.serialisieren(studiengang), wiederholungen)
+    ergebnisse["json_deserialisieren"] = messen(lambda: StudiengangJSONConverter.deserialisieren(daten), wiederholungen)
+
+    # Repository: Speichern und Laden über die Platte, der Cache wird vor jedem Laden geleert
+    speicher = StudiengangJSONData(dateiname=os.path.join(verzeichnis, "data.json"))
+    for mandant in mandanten:
+        speicher.speichern(studiengaenge[mandant].kopieren(), mandant)
+
+    def speichern(kopie):
+        speicher.speichern(kopie, mandanten[0])
+
+    ergebnisse["json_repository_speichern"] = messen(speichern, wiederholungen, lambda: speicher.laden(mandanten[0]))
+    ergebnisse["json_repository_laden"] = messen(lambda _: speicher.laden(mandanten[0]), wiederholungen,
+                                                 speicher.cache_leeren)
+    ergebnisse["json_repository_laden_cache"] = messen(lambda: speicher.laden(mandanten[0]), wiederholungen)
+    ergebnisse["json_repository_alle_mandanten_laden"] = messen(
+        lambda _: [speicher.laden(mandant) for mandant in mandanten], max(1, wiederholungen // 10), speicher.cache_leeren)
+
+    # Domäne: alle Kennzahlen einzeln und in einem Durchlauf
+    for name in ("berechne_kennzahlen", "berechne_notendurchschnitt", "berechne_abgeschlossene_module",
+                 "berechne_erreichte_credits", "berechne_vergangene_tage"):
+        ergebnisse[f"studiengang_{name}"] = messen(getattr(studiengang, name), wiederholungen)
+
+    # Service: Fortschrittsfunktionen mit und ohne vorberechnete Kennzahlen
+    service = StudiengangService()
+    for name in ("credits_fortschritt", "modul_fortschritt", "zeit_fortschritt"):
+        funktion = getattr(service, name)
+        ergebnisse[f"service_{name}"] = messen(lambda: funktion(studiengang), wiederholungen)
+        ergebnisse[f"service_{name}_kennzahlen"] = messen(lambda: funktion(studiengang, kennzahlen), wiederholungen)
+    for ziel in ("note", "zeit"):
+        ergebnisse[f"service_ziel_fortschritt_farbe_{ziel}"] = messen(
+            lambda: service.ziel_fortschritt_farbe(ziel, studiengang), wiederholungen)
+
+    # Handler: vollständiges Formular der Bearbeiten-Seite
+    formular = formular_daten(studiengang)
+    ergebnisse["handler_aktualisieren_aus_formular"] = messen(
+        lambda kopie: StudiengangHandler.aktualisieren_aus_formular(kopie, formular, FormularZiel()), wiederholungen,
+        studiengang.kopieren)
+    # Handler: Formular eines Semesters, wie es die Bearbeiten-Seite je Semester absendet
+    formular_semester = formular_daten(studiengang, studiengang.semester[0].nummer)
+    ziel = FormularZiel(studiengang)
+    ergebnisse["handler_semester_aus_formular"] = messen(
+        lambda: StudiengangHandler.semester_aus_formular(formular_semester, ziel), wiederholungen)
+
+    # Dashboard über den Test-Client einer eigenen Flask-App, deren Konfiguration auf dieselbe data.json zeigt
+    speicher.speichern(studiengang.kopieren())
+    flask_app = app_erstellen(verzeichnis)
+    client = flask_app.test_client()
+    with client.session_transaction() as sitzung:
+        sitzung['logged_in'] = True
+    ergebnisse["dashboard_rendern"] = messen(lambda _: client.get('/'), wiederholungen,
+                                             komponenten(flask_app).html_cache.leeren)
+    ergebnisse["dashboard_cache"] = messen(lambda: client.get('/'), wiederholungen)
+    return ergebnisse
+
+
+def vergleichen(ergebnisse: dict, frueher: dict, toleranz: float):
+    """ Gibt die Messungen zurück, deren Median um mehr als die Toleranz über dem früheren Lauf liegt """
+    regressionen = {}
+    for name, messung in ergebnisse.items():
+        alt = frueher.get(name)
+        if alt is None or alt["median_ms"] <= 0:
+            continue
+        faktor = messung["median_ms"] / alt["median_ms"]
+        if faktor > 1 + toleranz:
+            regressionen[name] = {"vorher_ms": alt["median_ms"], "nachher_ms": messung["median_ms"],
+                                  "faktor": round(faktor, 2)}
+    return regressionen
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mandanten", type=int, default=20)
+    parser.add_argument("--semester", type=int, default=6)
+    parser.add_argument("--module-pro-semester", type=int, default=6)
+    parser.add_argument("--anteil-benotet", type=float, default=0.5)
+    parser.add_argument("--anteil-anerkannt", type=float, default=0.1)
+    parser.add_argument("--wiederholungen", type=int, default=50)
+    parser.add_argument("--ausgabe", help="Ergebnis zusätzlich in diese Datei schreiben")
+    parser.add_argument("--vergleich", help="Ergebnis eines früheren Laufs zum Vergleich")
+    parser.add_argument("--toleranz", type=float, default=0.2, help="erlaubte Verlangsamung, 0.2 = 20 %%")
+    args = parser.parse_args()
+
+    parameter = {"seed": args.seed, "mandanten": args.mandanten, "semester": args.semester,
+                 "module_pro_semester": args.module_pro_semester, "anteil_benotet": args.anteil_benotet,
+                 "anteil_anerkannt": args.anteil_anerkannt, "wiederholungen": args.wiederholungen}
+    studiengaenge = erzeuge_mandanten(args.seed, args.mandanten, semester=args.semester,
+                                      module_pro_semester=args.module_pro_semester,
+                                      anteil_benotet=args.anteil_benotet, anteil_anerkannt=args.anteil_anerkannt)
+    with tempfile.TemporaryDirectory() as verzeichnis:
+        ergebnisse = alle_messen(studiengaenge, args.wiederholungen, verzeichnis)
+    bericht = {
+        "zeitpunkt": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plattform": platform.platform(),
+        "parameter": parameter,
+        "ergebnisse": ergebnisse
+    }
+    regressionen = {}
+    if args.vergleich:
+        with open(args.vergleich, 'r', encoding='utf-8') as datei:
+            frueher = json.load(datei)
+        if frueher.get("parameter") != parameter:
+            print("Warnung: Parameter des Vergleichslaufs weichen ab.", file=sys.stderr)
+        regressionen = vergleichen(ergebnisse, frueher["ergebnisse"], args.toleranz)
+        bericht["regressionen"] = regressionen
+    ausgabe = json.dumps(bericht, indent=2, ensure_ascii=False)
+    if args.ausgabe:
+        with open(args.ausgabe, 'w', encoding='utf-8') as datei:
+            datei.write(ausgabe)
+    print(ausgabe)
+    sys.exit(1 if regressionen else 0)
+
+
+if __name__ == "__main__":
+    main()
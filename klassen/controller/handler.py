@@ -7,14 +7,61 @@ from klassen.domain.modul import Modul
 from klassen.domain.pruefungsleistung import Pruefungsleistung
 from klassen.domain.semester import Semester
 from klassen.domain.studiengang import Studiengang
-from klassen.domain.ziel_note import NotenZiel
-from klassen.domain.ziel_zeit import ZeitZiel
+from klassen.domain.ziele import ZIELTYPEN
+from klassen.repository.interface import VersionsKonflikt
 
 
 class StudiengangHandler:
     @staticmethod
-    def aktualisieren_aus_formular(studiengang: Studiengang, form_data: MultiDict, manager):
+    def aktualisieren_aus_formular(studiengang: Studiengang, form_data: MultiDict, manager, mandant: str | None = None):
         """Aktualisiert ein Studiengang-Objekt aus dem WebFormular"""
+        # Formular muss auf dem aktuellen Stand basieren, sonst würden zwischenzeitliche Änderungen überschrieben
+        StudiengangHandler._version_pruefen(studiengang, form_data)
+        StudiengangHandler._kopf_aus_formular(studiengang, form_data)
+        # neues Dictionary anlegen
+        neue_semester_struktur = {}
+        for sem_num, modul in StudiengangHandler._module_aus_formular(form_data):
+            # Wenn Semester nicht im Dictionary vorhanden ist neu erstellen
+            if sem_num not in neue_semester_struktur:
+                neue_semester_struktur[sem_num] = []
+            # Modul an Semester anhängen
+            neue_semester_struktur[sem_num].append(modul)
+
+        # Semester dem Studiengang Objekt zuweisen - leere Liste erstellen
+        neue_semester_liste = []
+        # durch das Dictionary iterieren, Semester Objekte erstellen und der Liste hinzufügen
+        for semester_num in sorted(neue_semester_struktur.keys()):
+            neue_semester_liste.append(Semester(semester_num, neue_semester_struktur[semester_num]))
+        # Semester-Liste dem Studiengang zuweisen und an die Speichern Methode übergeben
+        studiengang.semester = neue_semester_liste
+        # Weitergabe des Studiengang-Objekts an den Manager zum Aktualisieren über Interface
+        manager.studiengang_aktualisieren(studiengang, mandant)
+
+    @staticmethod
+    def semester_aus_formular(form_data: MultiDict, manager, mandant: str | None = None) -> int:
+        """ Speichert Kopfdaten und die Module eines Semesters (bzw. einer Seite davon) aus dem Webformular,
+        die übrigen Semester bleiben unverändert - gibt die neue Version zurück """
+        nummer = int(form_data['semester'])
+        # Position des ersten und Anzahl der beim Öffnen angezeigten Module - genau dieser Ausschnitt wird ersetzt
+        start = int(form_data.get('start', 0))
+        anzahl = int(form_data['anzahl'])
+        kopf, _ = manager.kopf_laden(mandant)
+        StudiengangHandler._version_pruefen(kopf, form_data)
+        StudiengangHandler._kopf_aus_formular(kopf, form_data)
+        module = [modul for _, modul in StudiengangHandler._module_aus_formular(form_data, nummer)]
+        # kopf.version ist der Stand des Formulars - das Repository lehnt ab, wenn zwischenzeitlich gespeichert wurde
+        return manager.semester_aktualisieren(kopf, nummer, module, start, anzahl, mandant)
+
+    @staticmethod
+    def _version_pruefen(studiengang: Studiengang, form_data: MultiDict):
+        """ Löst VersionsKonflikt aus, wenn das Formular nicht auf dem aktuellen Stand basiert """
+        formular_version = form_data.get('version')
+        if formular_version is not None and formular_version != str(studiengang.version):
+            raise VersionsKonflikt(f"Formular basiert auf Version {formular_version}, aktuell ist Version {studiengang.version}.")
+
+    @staticmethod
+    def _kopf_aus_formular(studiengang: Studiengang, form_data: MultiDict):
+        """ Übernimmt Titel, Studienbeginn und Ziele aus dem Webformular """
         # Werte aus dem Formular extrahieren und den einzelnen Objekten zuweisen
         studiengang.titel = form_data.get('studien_titel', studiengang.titel)
         start_datum_raw = form_data.get('start_datum')
@@ -22,38 +69,44 @@ class StudiengangHandler:
             # versuchen das Datum umzuwandeln, Logausgabe wenn Fehler auftritt
             studiengang.start_datum = datetime.datetime.strptime(start_datum_raw, '%Y-%m-%d')
         except ValueError:
-            logging.error(f"Datum konnte nicht gelesen werden: {start_datum_raw}")
-        try:
-            # Ziele lesen - Standardwerte, falls keine vorhanden und schreiben in Studiengang-Objekt
-            neue_tage = int(form_data.get('ziel_tage', 0))
-            neue_note = float(form_data.get('ziel_note', '0').replace(',', '.'))
-            # Jahre in Tage umrechnen wenn Eingabe kleiner oder gleich 12
-            if neue_tage <= 12:
-                neue_tage = neue_tage * 365
-            # Zeit-Ziel setzen
-            studiengang.ziele['zeit'] = ZeitZiel(neue_tage)
-            # prüfen, ob der neue Notenschnitt plausible Werte hat, wenn nicht Standardwert
-            if neue_note >= 1.0 and neue_note <= 6.0:
-                studiengang.ziele['note'] = NotenZiel(neue_note)
-            else:
-                studiengang.ziele['note'] = NotenZiel(0.0)
-        except (ValueError, TypeError):
-            logging.error("Fehler bei Konvertieren der Ziele.")
+            logging.error("Datum konnte nicht gelesen werden: %s", start_datum_raw)
+        # Ziele aller registrierten Zieltypen lesen - Umrechnung und Plausibilitätsprüfung übernimmt der Zieltyp
+        for typ, klasse in ZIELTYPEN.items():
+            try:
+                ziel = klasse.aus_formular(form_data.get(klasse.formular_feld, '0' if klasse.pflicht else ''))
+            except (ValueError, TypeError, OverflowError):
+                logging.error("Fehler bei Konvertieren des Ziels %s.", typ)
+                continue
+            # leeres Feld: optionales Ziel entfernen, Pflichtziel unverändert lassen
+            if ziel is not None:
+                studiengang.ziele[typ] = ziel
+            elif not klasse.pflicht:
+                studiengang.ziele.pop(typ, None)
 
+    @staticmethod
+    def _module_aus_formular(form_data: MultiDict, semester_nummer: int | None = None):
+        """ Liest die Modulzeilen des Webformulars als Liste von (Semesternummer, Modul) - mit semester_nummer
+        gehören alle Zeilen zu diesem Semester und das Formular hat keine Semester-Spalte """
         # Module rekonstruieren - Listen für jede Spalte der Eingabefelder erstellen
         titel_liste = form_data.getlist('mod_titel')
-        sem_liste = form_data.getlist('mod_semester')
+        sem_liste = form_data.getlist('mod_semester') if semester_nummer is None else [semester_nummer] * len(titel_liste)
         pruefung_liste = form_data.getlist('mod_pruefung')
         credits_liste = form_data.getlist('mod_credits')
         noten_liste = form_data.getlist('mod_note')
         check_liste = form_data.getlist('mod_check')
-        # neues Dictionary anlegen
-        neue_semester_struktur = {}
+        # unterschiedlich lange Listen würden Werte verschiedener Zeilen vermischen - ablehnen statt Module zu verlieren
+        spalten = (sem_liste, pruefung_liste, credits_liste, noten_liste, check_liste)
+        if any(len(spalte) != len(titel_liste) for spalte in spalten):
+            raise ValueError("Formular unvollständig: die Spalten der Modultabelle sind unterschiedlich lang.")
+        module = []
         # durch erstellte Listen auf Basis der Länge iterieren
         for i in range(len(titel_liste)):
             try:
                 # einzelne Moduldaten aus Listen extrahieren
                 titel = titel_liste[i]
+                # leere neue Zeilen ignorieren
+                if not titel.strip():
+                    continue
                 sem_num = int(sem_liste[i])
                 mod_credits = int(credits_liste[i])
                 pruefung_typ = pruefung_liste[i]
@@ -76,23 +129,49 @@ class StudiengangHandler:
                 # Wenn im Formular "Anerk." angeklickt wurde Attribut anerkannt auf True setzen
                 if check_liste[i] == "on":
                     pl.setze_anerkannt(True)
-                modul = Modul(titel, mod_credits, pl)
-                # Wenn Semester nicht im Dictionary vorhanden ist neu erstellen
-                if sem_num not in neue_semester_struktur:
-                    neue_semester_struktur[sem_num] = []
-                # Modul an Semester anhängen
-                neue_semester_struktur[sem_num].append(modul)
-            # Fehler abfangen, wenn nicht alle Listen gleichgroß sind.
-            except (IndexError, ValueError) as e:
-                logging.error(f"Fehler bei Modul-Index {i}: {e}")
+                module.append((sem_num, Modul(titel, mod_credits, pl)))
+            # Zeilen mit ungültigen Werten (z.B. leere neue Zeile) werden übersprungen
+            except ValueError as e:
+                logging.error("Fehler bei Modul-Index %s: %s", i, e)
                 continue
+        return module
 
-        # Semester dem Studiengang Objekt zuweisen - leere Liste erstellen
-        neue_semester_liste = []
-        # durch das Dictionary iterieren, Semester Objekte erstellen und der Liste hinzufügen
-        for semester_num in sorted(neue_semester_struktur.keys()):
-            neue_semester_liste.append(Semester(semester_num, neue_semester_struktur[semester_num]))
-        # Semester-Liste dem Studiengang zuweisen und an die Speichern Methode übergeben
-        studiengang.semester = neue_semester_liste
-        # Weitergabe des Studiengang-Objekts an den Manager zum Aktualisieren über Interface
-        manager.studiengang_aktualisieren(studiengang)
\ No newline at end of file
+    @staticmethod
+    def aktualisieren_aus_patch(semester_nummer: int, index: int, daten: dict, manager, mandant: str | None = None):
+        """ Ändert nur die übergebenen Felder eines Moduls und gibt die neue Version zurück """
+        # nur die enthaltenen Felder prüfen und umwandeln, unbekannte Felder ablehnen
+        aenderungen = {}
+        for feld, wert in daten.items():
+            if feld == 'version':
+                continue
+            if feld in ('titel', 'pruefungsart'):
+                if not isinstance(wert, str) or not wert.strip():
+                    raise ValueError(f"Feld {feld} muss ein nicht leerer Text sein.")
+                aenderungen[feld] = wert.strip()
+            elif feld == 'credits':
+                # nur ganze Zahlen, 5.0 aus JSON ist erlaubt - 5.5 oder "5" nicht (kein stilles Abschneiden)
+                ganzzahlig = isinstance(wert, int) or (isinstance(wert, float) and wert.is_integer())
+                if isinstance(wert, bool) or not ganzzahlig or wert < 1:
+                    raise ValueError("ECTS müssen eine positive ganze Zahl sein.")
+                aenderungen[feld] = int(wert)
+            elif feld == 'note':
+                # leere Note entfernt die Note, aus , wird .
+                if wert is None or str(wert).strip() == "":
+                    aenderungen[feld] = None
+                else:
+                    note = float(str(wert).strip().replace(',', '.'))
+                    if not 0.0 <= note <= 6.0:
+                        raise ValueError("Note muss zwischen 0,0 und 6,0 liegen.")
+                    aenderungen[feld] = note
+            elif feld == 'anerkannt':
+                if not isinstance(wert, bool):
+                    raise ValueError("Feld anerkannt muss true oder false sein.")
+                aenderungen[feld] = wert
+            else:
+                raise ValueError(f"Unbekanntes Feld: {feld}")
+        if not aenderungen:
+            raise ValueError("Keine Änderungen übergeben.")
+        version = daten.get('version')
+        # Weitergabe der Änderungen an den Manager, gespeichert wird nur das betroffene Modul
+        return manager.modul_aktualisieren(semester_nummer, index, aenderungen,
+                                           None if version is None else int(version), mandant)
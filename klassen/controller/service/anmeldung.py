@@ -0,0 +1,127 @@
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from werkzeug.security import check_password_hash
+
+
+class Ueberlastet(Exception):
+    """ Zu viele Passwortprüfungen gleichzeitig - die Anfrage wird abgelehnt, statt zu warten """
+
+
+def passwort_pruefen(passwort_hash: str, passwort: str) -> bool:
+    """ Prüft das Passwort in einem Arbeitsprozess (scrypt belegt CPU und viel Speicher) """
+    return check_password_hash(passwort_hash, passwort)
+
+
+class PasswortPruefer:
+    """ Prüft Passwörter in einem begrenzten Prozess-Pool, damit die Webserver-Threads frei bleiben """
+
+    def __init__(self, passwort_hash: str, prozesse: int = 2, max_warteschlange: int = 8, timeout: float = 10.0):
+        self.passwort_hash = passwort_hash
+        self.prozesse = prozesse
+        self.timeout = timeout
+        # laufende plus wartende Prüfungen - ist das Limit erreicht, wird sofort abgelehnt
+        self.max_gleichzeitig = prozesse + max_warteschlange
+        self.in_bearbeitung = 0
+        self.abgelehnt = 0
+        self._sperre = threading.Lock()
+        # Pool wird erst bei der ersten Prüfung gestartet
+        self._pool = None
+
+    def _pool_holen(self):
+        """ Gibt den Prozess-Pool zurück und startet ihn bei Bedarf """
+        with self._sperre:
+            if self._pool is None:
+                # spawn statt fork, da der Webserver-Prozess Threads hat
+                self._pool = ProcessPoolExecutor(self.prozesse, mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+    def _pool_verwerfen(self, pool: ProcessPoolExecutor):
+        """ Verwirft einen unbrauchbaren Pool - die nächste Prüfung startet einen neuen """
+        with self._sperre:
+            # nur den defekten Pool entfernen, nicht einen inzwischen von einer anderen Anfrage neu gestarteten
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def pruefen(self, passwort: str) -> bool:
+        """ Prüft das Passwort - Ueberlastet, wenn die Warteschlange voll ist oder die Prüfung zu lange dauert """
+        with self._sperre:
+            if self.in_bearbeitung >= self.max_gleichzeitig:
+                self.abgelehnt += 1
+                raise Ueberlastet("Zu viele gleichzeitige Anmeldungen.")
+            self.in_bearbeitung += 1
+        try:
+            pool = self._pool_holen()
+            try:
+                auftrag = pool.submit(passwort_pruefen, self.passwort_hash, passwort)
+                return auftrag.result(timeout=self.timeout)
+            except TimeoutError:
+                auftrag.cancel()
+                raise Ueberlastet("Passwortprüfung hat zu lange gedauert.")
+            except BrokenProcessPool:
+                # ein Arbeitsprozess ist abgestürzt (z.B. vom OOM-Killer beendet) - der Pool nimmt keine Aufträge
+                # mehr an und wird ersetzt, diese Anfrage erhält 503
+                self._pool_verwerfen(pool)
+                raise Ueberlastet("Passwortprüfung vorübergehend nicht möglich.")
+        finally:
+            with self._sperre:
+                self.in_bearbeitung -= 1
+
+    def beenden(self):
+        """ Beendet die Arbeitsprozesse """
+        with self._sperre:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+class AnmeldeDrossel:
+    """ Token-Bucket je Client für fehlgeschlagene Anmeldungen: jeder Fehlversuch verbraucht ein Token,
+    Tokens werden mit fester Rate wieder aufgefüllt. Ohne Token wird abgelehnt, bevor ein Hash berechnet wird. """
+
+    def __init__(self, versuche: int = 5, nachfuellen_sekunden: float = 30.0, max_clients: int = 10000):
+        self.versuche = versuche # Größe des Buckets
+        self.nachfuellen_sekunden = nachfuellen_sekunden # Zeit für ein neues Token
+        self.max_clients = max_clients
+        # Client -> (Tokens, Zeitpunkt der letzten Aktualisierung), älteste Einträge zuerst
+        self._buckets = OrderedDict()
+        self._sperre = threading.Lock()
+        self.gedrosselt = 0
+
+    def _tokens(self, client: str, jetzt: float):
+        """ Aktueller Stand des Buckets, aufgefüllt bis jetzt """
+        eintrag = self._buckets.get(client)
+        if eintrag is None:
+            return float(self.versuche)
+        tokens, zeitpunkt = eintrag
+        return min(float(self.versuche), tokens + (jetzt - zeitpunkt) / self.nachfuellen_sekunden)
+
+    def wartezeit(self, client: str) -> float:
+        """ Sekunden bis zum nächsten erlaubten Versuch - 0, wenn der Client es sofort versuchen darf """
+        jetzt = time.monotonic()
+        with self._sperre:
+            tokens = self._tokens(client, jetzt)
+            if tokens >= 1:
+                return 0.0
+            self.gedrosselt += 1
+            return (1 - tokens) * self.nachfuellen_sekunden
+
+    def fehlversuch(self, client: str):
+        """ Verbraucht ein Token des Clients """
+        jetzt = time.monotonic()
+        with self._sperre:
+            self._buckets[client] = (max(0.0, self._tokens(client, jetzt) - 1), jetzt)
+            self._buckets.move_to_end(client)
+            # Speicher begrenzen: die am längsten inaktiven Clients vergessen
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+
+    def erfolg(self, client: str):
+        """ Nach erfolgreicher Anmeldung beginnt der Client wieder mit vollem Bucket """
+        with self._sperre:
+            self._buckets.pop(client, None)
@@ -0,0 +1,157 @@
+import csv
+import datetime
+import logging
+import multiprocessing
+import os
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+from klassen.repository.csv_data import StudiengangCSVData
+from klassen.repository.interface import IStudiengangRepository
+
+
+def csv_datei_einlesen(dateiname):
+    """ Liest eine CSV-Datei in einem Arbeitsprozess ein - Rückgabe: Mandant, Studiengang, Zeilenfehler """
+    fehler = []
+    # Mandant ist der Dateiname ohne Endung, z.B. mustermann.csv -> mustermann
+    mandant = os.path.splitext(os.path.basename(dateiname))[0]
+    try:
+        studiengang = StudiengangCSVData.datei_einlesen(dateiname, fehler)
+    # csv.Error z.B. bei zu langen Feldern - nur diese Datei ist betroffen, nicht der ganze Import
+    except (OSError, UnicodeDecodeError, csv.Error) as e:
+        return mandant, None, [{"zeile": None, "fehler": str(e)}]
+    return mandant, studiengang, fehler
+
+
+@dataclass
+class ImportAuftrag:
+    """ Fortschritt eines Massenimports von CSV-Dateien """
+    dateien: list[str]
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = "wartend" # wartend, laeuft, fertig, fehlgeschlagen
+    verarbeitet: int = 0 # eingelesene Dateien
+    gespeichert: int = 0 # erfolgreich gespeicherte Studiengänge
+    fehler: dict = field(default_factory=dict) # Mandant -> Liste der Fehler
+    gestartet: datetime.datetime | None = None
+    beendet: datetime.datetime | None = None
+    erledigt: threading.Event = field(default_factory=threading.Event, repr=False) # wird am Ende gesetzt
+    # schützt die Fehler, die der Import-Thread ergänzt, während Anfragen den Fortschritt ausgeben
+    sperre: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def warten(self, timeout: float | None = None) -> bool:
+        """ Wartet auf das Ende des Imports, True wenn abgeschlossen """
+        return self.erledigt.wait(timeout)
+
+    def fehler_vermerken(self, mandant: str, fehler: list):
+        """ Ergänzt die Fehler eines Mandanten - aufgerufen aus dem Import-Thread """
+        with self.sperre:
+            self.fehler.setdefault(mandant, []).extend(fehler)
+
+    def als_dict(self):
+        """ Fortschritt für die Ausgabe als JSON - die Fehler als Momentaufnahme, der Import läuft weiter """
+        with self.sperre:
+            fehler = {mandant: list(eintraege) for mandant, eintraege in self.fehler.items()}
+        return {
+            "id": self.id,
+            "status": self.status,
+            "dateien": len(self.dateien),
+            "verarbeitet": self.verarbeitet,
+            "gespeichert": self.gespeichert,
+            "fortschritt": round(self.verarbeitet / len(self.dateien) * 100, 1) if self.dateien else 100.0,
+            "fehler": fehler,
+            "gestartet": self.gestartet.isoformat() if self.gestartet else None,
+            "beendet": self.beendet.isoformat() if self.beendet else None
+        }
+
+
+class StudiengangImporter:
+    """ Importiert viele Studienablaufpläne im Hintergrund: Einlesen in einem Prozess-Pool, Speichern in Stapeln """
+
+    def __init__(self, speicher: IStudiengangRepository, prozesse: int | None = None, stapelgroesse: int = 100,
+                 max_auftraege: int = 100, aufbewahrung: float = 3600.0):
+        self.speicher = speicher
+        self.prozesse = prozesse
+        self.stapelgroesse = stapelgroesse
+        # beendete Aufträge bleiben aufbewahrung Sekunden abrufbar, höchstens max_auftraege insgesamt
+        self.max_auftraege = max_auftraege
+        self.aufbewahrung = aufbewahrung
+        # gestartete Aufträge nach ID, in Reihenfolge des Starts
+        self.auftraege = {}
+        self._sperre = threading.Lock()
+        # Funktionen (Mandant, Version), die für jeden gespeicherten Studiengang aufgerufen werden
+        self._beobachter = []
+
+    def beobachten(self, funktion):
+        """ Registriert eine Funktion, die für jeden importierten Studiengang mit Mandant und Version aufgerufen wird """
+        self._beobachter.append(funktion)
+
+    def starten(self, dateien: list[str]) -> ImportAuftrag:
+        """ Startet den Import im Hintergrund und gibt den Auftrag sofort zurück """
+        auftrag = ImportAuftrag(list(dateien))
+        with self._sperre:
+            self._aufraeumen()
+            self.auftraege[auftrag.id] = auftrag
+        threading.Thread(target=self.ausfuehren, args=(auftrag,), name=f"import-{auftrag.id}", daemon=True).start()
+        return auftrag
+
+    def auftrag(self, auftrag_id: str) -> ImportAuftrag | None:
+        """ Gibt den Auftrag mit der ID zurück """
+        with self._sperre:
+            return self.auftraege.get(auftrag_id)
+
+    def _aufraeumen(self):
+        """ Entfernt abgelaufene und, über der Höchstzahl, die ältesten beendeten Aufträge - laufende bleiben erhalten """
+        grenze = datetime.datetime.now() - datetime.timedelta(seconds=self.aufbewahrung)
+        beendet = [auftrag for auftrag in self.auftraege.values() if auftrag.erledigt.is_set()]
+        # Platz für den neuen Auftrag lassen
+        ueberzahl = len(self.auftraege) + 1 - self.max_auftraege
+        for auftrag in beendet:
+            if auftrag.beendet < grenze or ueberzahl > 0:
+                del self.auftraege[auftrag.id]
+                ueberzahl -= 1
+
+    def ausfuehren(self, auftrag: ImportAuftrag):
+        """ Führt den Import aus - blockiert bis alle Dateien verarbeitet sind """
+        auftrag.status = "laeuft"
+        auftrag.gestartet = datetime.datetime.now()
+        stapel = []
+        try:
+            # spawn statt fork, da der Webserver-Prozess Threads hat
+            with ProcessPoolExecutor(self.prozesse, mp_context=multiprocessing.get_context("spawn")) as pool:
+                # Ergebnisse kommen in Reihenfolge der Dateien, während weitere Dateien noch eingelesen werden
+                for mandant, studiengang, fehler in pool.map(csv_datei_einlesen, auftrag.dateien, chunksize=8):
+                    auftrag.verarbeitet += 1
+                    if fehler:
+                        auftrag.fehler_vermerken(mandant, fehler)
+                    if studiengang is not None:
+                        stapel.append((mandant, studiengang))
+                    if len(stapel) >= self.stapelgroesse:
+                        self._stapel_speichern(auftrag, stapel)
+                        stapel = []
+            self._stapel_speichern(auftrag, stapel)
+            auftrag.status = "fertig"
+        except Exception as e:
+            auftrag.status = "fehlgeschlagen"
+            logging.error("Import %s fehlgeschlagen: %s", auftrag.id, e)
+        auftrag.beendet = datetime.datetime.now()
+        auftrag.erledigt.set()
+        logging.info("Import %s: %d von %d Studiengängen gespeichert.", auftrag.id, auftrag.gespeichert,
+                     len(auftrag.dateien))
+
+    def _stapel_speichern(self, auftrag: ImportAuftrag, stapel: list):
+        """ Schreibt einen Stapel in das Repository und vermerkt Konflikte (Mandant existiert bereits) """
+        if not stapel:
+            return
+        fehler = self.speicher.speichern_mehrere(stapel)
+        for mandant, meldung in fehler.items():
+            auftrag.fehler_vermerken(mandant, [{"zeile": None, "fehler": meldung}])
+        auftrag.gespeichert += len(stapel) - len(fehler)
+        for funktion in self._beobachter:
+            try:
+                for mandant, studiengang in stapel:
+                    if mandant not in fehler:
+                        funktion(mandant, studiengang.version)
+            except Exception as e:
+                logging.error("Benachrichtigung über importierte Studiengänge fehlgeschlagen: %s", e)
@@ -0,0 +1,290 @@
+import datetime
+import logging
+import threading
+import time
+
+import numpy as np
+
+from klassen.repository.interface import IStudiengangRepository
+
+# Klassengrenzen der Notenverteilung: 1,0-1,5 | 1,5-2,5 | 2,5-3,5 | 3,5-4,0 | über 4,0 (nicht bestanden)
+NOTEN_KLASSEN = np.array([1.5, 2.5, 3.5, 4.0 + 1e-9])
+NOTEN_KLASSEN_NAMEN = ["1", "2", "3", "4", "5"]
+
+
+class KohortenSpeicher:
+    """ Spaltenweise Ablage der Module vieler Studierender: ein NumPy-Array je Feld, eine Zeile je Modul """
+
+    def __init__(self, mandanten: list, modul_titel: list[str], versatz: np.ndarray, modul_id: np.ndarray,
+                 semester: np.ndarray, ects: np.ndarray, note: np.ndarray, anerkannt: np.ndarray,
+                 ziel_note: np.ndarray, ziel_tage: np.ndarray, start_tag: np.ndarray):
+        self.mandanten = mandanten # Mandant je Studierendem
+        self.modul_titel = modul_titel # Titel je Modul-ID (Stringtabelle)
+        self.versatz = versatz # Zeilen von Studierendem i: versatz[i] bis versatz[i + 1]
+        self.modul_id = modul_id # Index in modul_titel
+        self.semester = semester
+        self.ects = ects
+        self.note = note # NaN, wenn keine Note eingetragen ist
+        self.anerkannt = anerkannt
+        self.ziel_note = ziel_note # Notenziel je Studierendem
+        self.ziel_tage = ziel_tage # Zeitziel je Studierendem
+        self.start_tag = start_tag # Studienbeginn je Studierendem als Ordinalzahl (date.toordinal)
+        # Studierenden-Index je Zeile, damit Summen je Studierendem mit bincount gebildet werden können
+        self.studierende = np.repeat(np.arange(len(mandanten), dtype=np.int32), np.diff(versatz))
+
+    @classmethod
+    def aus_studiengaengen(cls, eintraege):
+        """ Baut den Speicher aus (mandant, Studiengang)-Paaren in einem Durchlauf auf """
+        titel_ids = {}
+        mandanten, versatz = [], [0]
+        modul_id, semester, ects, note, anerkannt = [], [], [], [], []
+        ziel_note, ziel_tage, start_tag = [], [], []
+        for mandant, studiengang in eintraege:
+            mandanten.append(mandant)
+            for sem in studiengang.semester:
+                for modul in sem.module:
+                    pl = modul.pruefungsleistung
+                    modul_id.append(titel_ids.setdefault(modul.titel, len(titel_ids)))
+                    semester.append(sem.nummer)
+                    ects.append(modul.credits)
+                    note.append(np.nan if pl.note is None else pl.note)
+                    anerkannt.append(bool(pl.modul_anerkannt))
+            versatz.append(len(modul_id))
+            ziel_note.append(studiengang.ziele['note'].notendurchschnitt)
+            ziel_tage.append(studiengang.ziele['zeit'].zeitziel_in_tagen)
+            start_tag.append(studiengang.start_datum.toordinal())
+        return cls(mandanten, list(titel_ids), np.array(versatz, dtype=np.int64),
+                   np.array(modul_id, dtype=np.int32), np.array(semester, dtype=np.int16),
+                   np.array(ects, dtype=np.int16), np.array(note, dtype=np.float64),
+                   np.array(anerkannt, dtype=bool), np.array(ziel_note, dtype=np.float64),
+                   np.array(ziel_tage, dtype=np.int32), np.array(start_tag, dtype=np.int32))
+
+    def ersetzt(self, neu: "KohortenSpeicher", entfernt=()):
+        """ Neuer Speicher, in dem die Studierenden aus neu ersetzt oder angehängt und die aus entfernt gestrichen sind -
+        die übrigen werden mit Array-Operationen übernommen, ohne ihre Studiengänge erneut zu lesen """
+        position = {mandant: i for i, mandant in enumerate(self.mandanten)}
+        behalten = np.ones(len(self.mandanten), dtype=bool)
+        behalten[[position[mandant] for mandant in (*neu.mandanten, *entfernt) if mandant in position]] = False
+        zeilen = np.repeat(behalten, np.diff(self.versatz))
+        # Modul-IDs des neuen Teils auf die Stringtabelle des bestehenden abbilden, unbekannte Titel anhängen
+        titel_ids = {titel: i for i, titel in enumerate(self.modul_titel)}
+        abbildung = np.array([titel_ids.setdefault(titel, len(titel_ids)) for titel in neu.modul_titel], dtype=np.int32)
+        modul_id = np.concatenate([self.modul_id[zeilen], abbildung[neu.modul_id]])
+        modul_titel = list(titel_ids)
+        # Titel, die kein Studierender mehr belegt, aus der Tabelle entfernen
+        genutzt = np.bincount(modul_id, minlength=len(modul_titel)) > 0
+        if not genutzt.all():
+            modul_titel = [titel for titel, ja in zip(modul_titel, genutzt.tolist()) if ja]
+            modul_id = (np.cumsum(genutzt, dtype=np.int32) - 1)[modul_id]
+        anzahl = np.concatenate([np.diff(self.versatz)[behalten], np.diff(neu.versatz)])
+        return KohortenSpeicher(
+            [mandant for mandant, ja in zip(self.mandanten, behalten.tolist()) if ja] + list(neu.mandanten),
+            modul_titel, np.concatenate([[0], np.cumsum(anzahl)]).astype(np.int64), modul_id.astype(np.int32),
+            *(np.concatenate([getattr(self, feld)[zeilen], getattr(neu, feld)])
+              for feld in ("semester", "ects", "note", "anerkannt")),
+            *(np.concatenate([getattr(self, feld)[behalten], getattr(neu, feld)])
+              for feld in ("ziel_note", "ziel_tage", "start_tag")))
+
+    def __len__(self):
+        return len(self.mandanten)
+
+
+class KohortenCache:
+    """ Hält den Kohorten-Speicher zwischen den Anfragen: aufgebaut wird er einmal, danach werden nur die Studierenden
+    neu eingelesen, deren Studiengang gespeichert wurde (Meldung über StudiengangManager.beobachten). Änderungen anderer
+    Prozesse übernimmt ein vollständiger Neuaufbau im Hintergrund alle neuaufbau Sekunden. """
+
+    def __init__(self, speicher: IStudiengangRepository, neuaufbau: float = 300.0):
+        self.speicher = speicher
+        self.neuaufbau = neuaufbau # 0: nur gemeldete Änderungen übernehmen
+        self._kohorte = None
+        self._versionen = {} # Mandant -> Version im Speicher
+        self._aufgebaut = 0.0 # Zeitpunkt des letzten vollständigen Aufbaus (monotonic)
+        # gemeldete Mandanten - eigene Sperre, damit Speichern nie auf einen laufenden Aufbau wartet
+        self._gemeldet = set()
+        self._meldungen_sperre = threading.Lock()
+        # Meldungen während eines Neuaufbaus im Hintergrund, sie werden danach erneut übernommen
+        self._waehrend_neuaufbau = None
+        # nur ein Aufbau oder eine Aktualisierung gleichzeitig, weitere Anfragen warten auf das Ergebnis
+        self._sperre = threading.Lock()
+        # zuletzt ausgegebene Auswertung: (Kohorte, Datum, Zusammenfassung) - gültig, solange sich beides nicht ändert
+        self._zusammenfassung = None
+        self.aktualisiert = 0 # neu eingelesene Studierende
+        self.neu_aufgebaut = 0
+
+    def melden(self, mandant: str | None, version: int | None = None):
+        """ Beobachter: der Studiengang des Mandanten wurde gespeichert und wird beim nächsten Abruf neu eingelesen """
+        with self._meldungen_sperre:
+            self._gemeldet.add(mandant)
+            if self._waehrend_neuaufbau is not None:
+                self._waehrend_neuaufbau.add(mandant)
+
+    def speicher_tauschen(self, speicher: IStudiengangRepository):
+        """ Neues Repository (geänderte Konfiguration) - der Speicher wird beim nächsten Abruf neu aufgebaut """
+        with self._sperre:
+            self.speicher, self._kohorte, self._versionen = speicher, None, {}
+
+    @staticmethod
+    def _einlesen(speicher: IStudiengangRepository):
+        """ Liest die Studiengänge aller Mandanten nacheinander ein - Rückgabe: Kohorte und Version je Mandant """
+        versionen = {}
+
+        def eintraege():
+            for mandant in speicher.mandanten():
+                # nur lesen - die Spalten werden aus den Studiengängen kopiert, eine Kopie der Objekte ist nicht nötig
+                studiengang = speicher.lesen(mandant)
+                if studiengang is not None:
+                    versionen[mandant] = studiengang.version
+                    yield mandant, studiengang
+        return KohortenSpeicher.aus_studiengaengen(eintraege()), versionen
+
+    def kohorte(self) -> KohortenSpeicher:
+        """ Aktueller Kohorten-Speicher - der Aufruf liest höchstens die seit dem letzten Abruf gespeicherten Studiengänge """
+        with self._sperre:
+            if self._kohorte is None:
+                # erster Abruf: Meldungen bis hierher sind im Aufbau enthalten
+                with self._meldungen_sperre:
+                    self._gemeldet.clear()
+                self._kohorte, self._versionen = self._einlesen(self.speicher)
+                self._aufgebaut = time.monotonic()
+                self.neu_aufgebaut += 1
+            elif self.neuaufbau and time.monotonic() - self._aufgebaut > self.neuaufbau:
+                self._neuaufbau_starten()
+            with self._meldungen_sperre:
+                gemeldet, self._gemeldet = self._gemeldet, set()
+            if gemeldet:
+                self._aktualisieren(gemeldet)
+            return self._kohorte
+
+    def zusammenfassung(self):
+        """ Auswertungen der aktuellen Kohorte - ohne gespeicherte Änderung am selben Tag ohne neue Berechnung """
+        kohorte = self.kohorte()
+        heute = datetime.date.today()
+        gespeichert = self._zusammenfassung
+        if gespeichert is not None and gespeichert[0] is kohorte and gespeichert[1] == heute:
+            return gespeichert[2]
+        daten = KohortenAnalyse(kohorte).zusammenfassung()
+        self._zusammenfassung = (kohorte, heute, daten)
+        return daten
+
+    def _aktualisieren(self, mandanten: set):
+        """ Liest nur die gemeldeten Mandanten neu ein - unveränderte Versionen werden übersprungen """
+        neu, entfernt = [], set()
+        # Mandant None (Standard-Studiengang) zuerst, damit die Reihenfolge nicht von den Meldungen abhängt
+        for mandant in sorted(mandanten, key=lambda mandant: (mandant is not None, mandant or "")):
+            studiengang = self.speicher.lesen(mandant)
+            if studiengang is None:
+                if mandant in self._versionen:
+                    entfernt.add(mandant)
+            elif self._versionen.get(mandant) != studiengang.version:
+                neu.append((mandant, studiengang))
+        if not neu and not entfernt:
+            return
+        self._kohorte = self._kohorte.ersetzt(KohortenSpeicher.aus_studiengaengen(neu), entfernt)
+        for mandant in entfernt:
+            del self._versionen[mandant]
+        self._versionen.update((mandant, studiengang.version) for mandant, studiengang in neu)
+        self.aktualisiert += len(neu) + len(entfernt)
+
+    def _neuaufbau_starten(self):
+        """ Startet den vollständigen Neuaufbau im Hintergrund, bis dahin bleibt der bisherige Speicher gültig """
+        with self._meldungen_sperre:
+            if self._waehrend_neuaufbau is not None:
+                return
+            self._waehrend_neuaufbau = set()
+        threading.Thread(target=self._neu_aufbauen, args=(self.speicher,), name="kohorte-neuaufbau", daemon=True).start()
+
+    def _neu_aufbauen(self, speicher: IStudiengangRepository):
+        """ Baut den Speicher vollständig neu auf und tauscht ihn aus - z.B. für Mandanten anderer Prozesse """
+        try:
+            kohorte, versionen = self._einlesen(speicher)
+            with self._sperre:
+                if speicher is self.speicher:
+                    self._kohorte, self._versionen = kohorte, versionen
+                    self.neu_aufgebaut += 1
+                self._aufgebaut = time.monotonic()
+        except Exception as e:
+            logging.error("Neuaufbau der Kohorte fehlgeschlagen: %s", e)
+        finally:
+            with self._meldungen_sperre:
+                # während des Aufbaus gespeicherte Studiengänge sind evtl. noch im alten Stand eingelesen
+                self._gemeldet |= self._waehrend_neuaufbau
+                self._waehrend_neuaufbau = None
+
+
+class KohortenAnalyse:
+    """ Auswertungen über alle Studierenden einer Kohorte, ausschließlich mit vektorisierten Operationen """
+
+    def __init__(self, kohorte: KohortenSpeicher):
+        self.kohorte = kohorte
+        k = kohorte
+        # gemeinsam genutzte Masken einmalig berechnen
+        self.benotet = ~np.isnan(k.note)
+        self.bestanden = (self.benotet & (k.note <= 4.0)) | k.anerkannt
+
+    def notenverteilung_pro_modul(self):
+        """ Anzahl der Noten je Notenstufe für jedes Modul """
+        k = self.kohorte
+        klassen = len(NOTEN_KLASSEN_NAMEN)
+        stufe = np.searchsorted(NOTEN_KLASSEN, k.note[self.benotet], side='left')
+        # Modul-ID und Notenstufe zu einem Index zusammenfassen und in einem Schritt zählen
+        zaehler = np.bincount(k.modul_id[self.benotet].astype(np.int64) * klassen + stufe,
+                              minlength=len(k.modul_titel) * klassen).reshape(len(k.modul_titel), klassen)
+        return {titel: dict(zip(NOTEN_KLASSEN_NAMEN, zaehler[i].tolist())) for i, titel in enumerate(k.modul_titel)}
+
+    def bestehensquote_pro_modul(self):
+        """ Anteil bestandener (oder anerkannter) an allen abgelegten Prüfungen je Modul """
+        k = self.kohorte
+        abgelegt = np.bincount(k.modul_id, weights=self.benotet | k.anerkannt, minlength=len(k.modul_titel))
+        bestanden = np.bincount(k.modul_id, weights=self.bestanden, minlength=len(k.modul_titel))
+        quote = np.divide(bestanden, abgelegt, out=np.zeros_like(bestanden), where=abgelegt > 0)
+        return dict(zip(k.modul_titel, np.round(quote * 100, 1).tolist()))
+
+    def credit_fortschritt(self):
+        """ Erreichte ECTS in Prozent der Gesamt-ECTS je Studierendem """
+        k = self.kohorte
+        gesamt = np.bincount(k.studierende, weights=k.ects, minlength=len(k))
+        erreicht = np.bincount(k.studierende, weights=np.where(self.bestanden, k.ects, 0), minlength=len(k))
+        return np.divide(erreicht, gesamt, out=np.zeros_like(erreicht), where=gesamt > 0) * 100
+
+    def credit_perzentile(self, perzentile=(10, 25, 50, 75, 90)):
+        """ Perzentile des Credit-Fortschritts über alle Studierenden """
+        if len(self.kohorte) == 0:
+            return {str(p): 0.0 for p in perzentile}
+        werte = np.percentile(self.credit_fortschritt(), perzentile)
+        return {str(p): round(float(w), 1) for p, w in zip(perzentile, werte)}
+
+    def notendurchschnitte(self):
+        """ Gerundeter Notendurchschnitt je Studierendem, 0.0 ohne Noten (wie Studiengang.berechne_kennzahlen) """
+        k = self.kohorte
+        summe = np.bincount(k.studierende, weights=np.where(self.benotet, k.note, 0), minlength=len(k))
+        anzahl = np.bincount(k.studierende, weights=self.benotet, minlength=len(k))
+        mittel = np.divide(summe, anzahl, out=np.zeros_like(summe), where=anzahl > 0)
+        gerundet = np.round(mittel, 1)
+        # np.round rechnet mit mittel * 10 und weicht bei Werten nahe x,x5 von round() ab -
+        # diese wenigen Werte einzeln wie im Domänenmodell runden
+        zehntel = mittel * 10
+        grenzfall = np.flatnonzero(np.abs(zehntel - np.floor(zehntel) - 0.5) < 1e-6)
+        gerundet[grenzfall] = [round(wert, 1) for wert in mittel[grenzfall].tolist()]
+        return gerundet
+
+    def zielerreichung(self, heute: datetime.date | None = None):
+        """ Anteil der Studierenden, die ihr Noten- bzw. Zeitziel aktuell erreichen """
+        k = self.kohorte
+        if len(k) == 0:
+            return {"note": 0.0, "zeit": 0.0}
+        heute = heute or datetime.date.today()
+        noten_erreicht = self.notendurchschnitte() <= k.ziel_note
+        zeit_erreicht = (heute.toordinal() - k.start_tag) <= k.ziel_tage
+        return {"note": round(float(noten_erreicht.mean()) * 100, 1), "zeit": round(float(zeit_erreicht.mean()) * 100, 1)}
+
+    def zusammenfassung(self):
+        """ Alle Auswertungen für die Ausgabe als JSON """
+        return {
+            "studierende": len(self.kohorte),
+            "module": len(self.kohorte.modul_titel),
+            "notenverteilung": self.notenverteilung_pro_modul(),
+            "bestehensquote": self.bestehensquote_pro_modul(),
+            "credit_perzentile": self.credit_perzentile(),
+            "zielerreichung": self.zielerreichung()
+        }
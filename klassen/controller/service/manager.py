@@ -1,33 +1,105 @@
 import logging
 
 from klassen.domain.studiengang import Studiengang
-from klassen.repository.interface import IStudiengangRepository
+from klassen.repository.interface import IStudiengangRepository, VersionsKonflikt
+from klassen.repository.verlauf_data import StudiengangVerlauf
 
 
 class StudiengangManager:
 
-    def __init__(self, speicher: IStudiengangRepository, importer: IStudiengangRepository):
+    def __init__(self, speicher: IStudiengangRepository, importer: IStudiengangRepository,
+                 verlauf: StudiengangVerlauf | None = None):
         self.speicher = speicher
         self.importer = importer
+        # Verlauf der Kennzahlen, jede gespeicherte Änderung hängt einen Eintrag an (optional) - geschrieben wird er im
+        # Hintergrund vom VerlaufSchreiber, der als Beobachter registriert ist
+        self.verlauf = verlauf
+        # Funktionen (Mandant, Version), die nach jeder gespeicherten Änderung aufgerufen werden (z.B. Push an Clients)
+        self._beobachter = []
 
-    def studiengang_laden(self) -> Studiengang:
+    def speicher_tauschen(self, speicher: IStudiengangRepository, importer: IStudiengangRepository):
+        """ Tauscht die Repositories (z.B. nach geänderter Konfiguration) - laufende Aufrufe beenden ihren Zugriff
+        auf den bisherigen Repositories, neue Aufrufe nutzen die neuen """
+        self.speicher, self.importer = speicher, importer
+
+    def beobachten(self, funktion):
+        """ Registriert eine Funktion, die nach jeder gespeicherten Änderung mit Mandant und neuer Version aufgerufen wird """
+        self._beobachter.append(funktion)
+
+    def _melden(self, mandant: str | None, version: int):
+        """ Benachrichtigt alle Beobachter - ein Fehler dort darf das Speichern nicht rückgängig machen """
+        for funktion in self._beobachter:
+            try:
+                funktion(mandant, version)
+            except Exception as e:
+                logging.error("Benachrichtigung über Version %s fehlgeschlagen: %s", version, e)
+
+    def studiengang_laden(self, mandant: str | None = None) -> Studiengang:
         """ Versucht JSON zu laden - falls nicht vorhanden,  wird neu erstellt und gespeichert. """
-        # Studiengang über Repository Interface laden
-        studiengang = self.speicher.laden()
+        # Repository einmal lesen, damit Laden und Anlegen denselben Speicher nutzen, auch wenn er getauscht wird
+        speicher = self.speicher
+        # Studiengang des Mandanten über Repository Interface laden
+        studiengang = speicher.laden(mandant)
         if studiengang is None:  # None bedeutet hier, dass keine JSON-Datei zum Laden gefunden wurde, also kein Studiengang existiert
             logging.info("Kein JSON gefunden. Versuche aus CSV zu erstellen.")
             # Studiengang neu erstellen und Daten aus CSV einlesen
-            studiengang = self._studiengang_erstellen()
+            studiengang = self._studiengang_erstellen(mandant)
             # Über Repository Interface speichern
-            self.speicher.speichern(studiengang)
+            try:
+                speicher.speichern(studiengang, mandant)
+                # neuer Studiengang, z.B. erster Eintrag des Verlaufs: Stand beim Anlegen
+                self._melden(mandant, studiengang.version)
+            except VersionsKonflikt:
+                # eine parallele Anfrage hat den Studiengang bereits angelegt - deren Stand verwenden
+                studiengang = speicher.laden(mandant)
+        return studiengang
+
+    def studiengang_lesen(self, mandant: str | None = None) -> Studiengang:
+        """ Gespeicherter Stand ohne Kopie, nur zum Lesen (Anzeige, APIs, Export) - legt den Studiengang bei Bedarf an """
+        studiengang = self.speicher.lesen(mandant)
+        if studiengang is None:
+            studiengang = self.studiengang_laden(mandant)
         return studiengang
 
-    def _studiengang_erstellen(self) -> Studiengang:
+    def studiengang_version(self, mandant: str | None = None) -> int | None:
+        """ Gibt die gespeicherte Version zurück, ohne den Studiengang zu laden - None, wenn noch keiner existiert """
+        return self.speicher.version(mandant)
+
+    def kopf_laden(self, mandant: str | None = None):
+        """ Kopf des Studiengangs und (Nummer, Anzahl Module) je Semester - legt den Studiengang bei Bedarf an """
+        ergebnis = self.speicher.kopf_laden(mandant)
+        if ergebnis is None:
+            # erstellt und speichert den Studiengang aus der CSV-Datei, danach existiert der Kopf
+            self.studiengang_laden(mandant)
+            ergebnis = self.speicher.kopf_laden(mandant)
+        return ergebnis
+
+    def semester_laden(self, nummer: int, start: int = 0, anzahl: int | None = None, mandant: str | None = None):
+        """ Module start bis start+anzahl eines Semesters, ohne die übrigen Semester zu laden """
+        return self.speicher.semester_laden(nummer, start, anzahl, mandant)
+
+    def semester_aktualisieren(self, kopf: Studiengang, nummer: int, module: list, start: int = 0,
+                               anzahl: int | None = None, mandant: str | None = None) -> int:
+        """ Weitergabe von Kopf und Ausschnitt eines Semesters an das Repo, gibt die neue Version zurück """
+        neue_version = self.speicher.semester_speichern(kopf, nummer, module, start, anzahl, mandant)
+        self._melden(mandant, neue_version)
+        return neue_version
+
+    def _studiengang_erstellen(self, mandant: str | None = None) -> Studiengang:
         """ Erstellt einen Studiengang, liest optional CSV-Datei ein und erstellt daraus Module"""
         # gibt vom Repository Interface erstellten Studiengang zurück
-        return self.importer.laden()
+        return self.importer.laden(mandant)
+
+    def modul_aktualisieren(self, semester_nummer: int, index: int, aenderungen: dict, version: int | None = None,
+                            mandant: str | None = None) -> int:
+        """ Weitergabe einer Einzeländerung an das Repo, gibt die neue Version zurück """
+        neue_version = self.speicher.modul_aktualisieren(semester_nummer, index, aenderungen, version, mandant)
+        self._melden(mandant, neue_version)
+        return neue_version
 
-    def studiengang_aktualisieren(self, studiengang):
+    def studiengang_aktualisieren(self, studiengang, mandant: str | None = None):
         """ Weitergabe des Studiengangs an das Repo """
         # erhält einen Studiengang und reicht ihn an das Repository Interface zum Speichern weiter
-        self.speicher.speichern(studiengang)
+        self.speicher.speichern(studiengang, mandant)
+        # nach dem Speichern enthält der Studiengang die neue Version
+        self._melden(mandant, studiengang.version)
@@ -1,46 +1,60 @@
+from klassen.controller.service.ziele import ZielAuswertung
+from klassen.domain.kennzahlen import Kennzahlen
 from klassen.domain.studiengang import Studiengang
+from klassen.metriken import kennzahlen_dauer, zeitmessung
 
 
 class StudiengangService:
     """ Bereitet Daten des Studiengangs für das GUI auf """
+
+    def __init__(self, ziel_auswertung: ZielAuswertung | None = None):
+        # Auswertung aller Ziele, zwischengespeichert je Mandant und Version - gehört zu dieser Instanz (App)
+        self.ziel_auswertung = ZielAuswertung() if ziel_auswertung is None else ziel_auswertung
+
+    @staticmethod
+    @zeitmessung(kennzahlen_dauer)
+    def kennzahlen_berechnen(studiengang: Studiengang, jetzt=None) -> Kennzahlen:
+        """ Berechnet die Kennzahlen - die Dauer wird als Metrik erfasst, nicht im Domänenmodell """
+        return studiengang.berechne_kennzahlen(jetzt)
+
     @staticmethod
-    def credits_fortschritt(studiengang: Studiengang):
+    def credits_fortschritt(studiengang: Studiengang, kennzahlen: Kennzahlen | None = None):
         """ Berechnet den Prozentwert des Fortschrittbalkens der erreichten ECTS für das GUI """
-        gesamt_credits = 0
-        # iteriert über alle Module jeden Semesters und addiert die ECTS
-        for semester in studiengang.semester:
-            for modul in semester.module:
-                gesamt_credits += modul.credits
+        # Kennzahlen nur berechnen, wenn kein Schnappschuss übergeben wurde
+        if kennzahlen is None:
+            kennzahlen = StudiengangService.kennzahlen_berechnen(studiengang)
         try:
             # teilt die schon erhaltenen ECTS durch die Gesamtanzahl, um einen Prozentwert zu erhalten
-            fortschritt = studiengang.berechne_erreichte_credits() / gesamt_credits * 100
+            fortschritt = kennzahlen.erreichte_credits / kennzahlen.gesamt_credits * 100
         # falls keine Module angelegt sind, wird der Fortschritt auf 0% gesetzt
         except ZeroDivisionError:
             fortschritt = 0
         return fortschritt
 
     @staticmethod
-    def modul_fortschritt(studiengang: Studiengang):
+    def modul_fortschritt(studiengang: Studiengang, kennzahlen: Kennzahlen | None = None):
         """ Berechnet den Prozentwert des Fortschrittbalkens der abgeschlossenen Module für das GUI """
-        gesamt_module = 0
-        # iteriert über die Semester des Studiengangs und addiert die Anzahl der Module
-        for semester in studiengang.semester:
-            gesamt_module += len(semester.module)
+        # Kennzahlen nur berechnen, wenn kein Schnappschuss übergeben wurde
+        if kennzahlen is None:
+            kennzahlen = StudiengangService.kennzahlen_berechnen(studiengang)
         try:
             # teilt die abgeschlossenen Module durch die Gesamtanzahl Module
-            fortschritt = studiengang.berechne_abgeschlossene_module() / gesamt_module * 100
+            fortschritt = kennzahlen.abgeschlossene_module / kennzahlen.gesamt_module * 100
         # falls keine Module angelegt sind, wird der Fortschritt auf 0% gesetzt
         except ZeroDivisionError:
             fortschritt = 0
         return fortschritt
 
     @staticmethod
-    def zeit_fortschritt(studiengang: Studiengang):
+    def zeit_fortschritt(studiengang: Studiengang, kennzahlen: Kennzahlen | None = None):
         """ Berechnet den Prozentwert des Fortschrittbalkens der vergangenen Tage bezogen auf das ZeitZiel für das GUI """
+        # Kennzahlen nur berechnen, wenn kein Schnappschuss übergeben wurde
+        if kennzahlen is None:
+            kennzahlen = StudiengangService.kennzahlen_berechnen(studiengang)
         try:
             # berechnet Prozentwert für den Zeit-Fortschrittsbalken. min() sorgt dafür, dass der Wert nicht über 100 sein kann
             zeit_fortschritt = min(
-                studiengang.berechne_vergangene_tage() / studiengang.ziele['zeit'].zeitziel_in_tagen * 100, 100)
+                kennzahlen.vergangene_tage / studiengang.ziele['zeit'].zeitziel_in_tagen * 100, 100)
             # falls Ergebnis negativ, 0 setzen - kommt vor, wenn Startdatum in der Zukunft liegt
             if zeit_fortschritt < 0:
                 zeit_fortschritt = 0
@@ -49,12 +63,38 @@ class StudiengangService:
             zeit_fortschritt = 0
         return zeit_fortschritt
 
-    @staticmethod
-    def ziel_fortschritt_farbe(ziel: str, studiengang: Studiengang):
+    def ziel_fortschritt_farbe(self, ziel: str, studiengang: Studiengang, kennzahlen: Kennzahlen | None = None,
+                               mandant: str | None = None):
         """ Gibt die Farbe des Zielbalkens an - erreicht=grün, nicht erreicht=rot - anwendbar auf alle Ziele"""
-        # Farbe für die Ziel-Balken
-        if not studiengang.ziele[ziel].ist_ziel_erreicht(studiengang):
+        # Farbe für die Ziel-Balken, alle Ziele werden gemeinsam ausgewertet
+        if not self.ziel_auswertung.auswerten(studiengang, kennzahlen, mandant)[ziel].erreicht:
             balken_farbe = "#ff6666" # rot wenn Ziel nicht erreicht
         else:
             balken_farbe = "#aaddaa" # grün wenn Ziel erreicht
-        return balken_farbe
\ No newline at end of file
+        return balken_farbe
+
+    def kennzahlen_daten(self, studiengang: Studiengang, kennzahlen: Kennzahlen | None = None, mandant: str | None = None):
+        """ Stellt die Werte der Dashboard-Seite als Dictionary zusammen (z.B. für die JSON-API) """
+        # Kennzahlen nur berechnen, wenn kein Schnappschuss übergeben wurde
+        if kennzahlen is None:
+            kennzahlen = self.kennzahlen_berechnen(studiengang)
+        ergebnisse = self.ziel_auswertung.auswerten(studiengang, kennzahlen, mandant)
+        return {
+            "version": studiengang.version,
+            "stichtag": kennzahlen.stichtag.date().isoformat(),
+            "vergangene_tage": kennzahlen.vergangene_tage,
+            "ziel_tage": studiengang.ziele['zeit'].zeitziel_in_tagen,
+            "zeit_fortschritt": round(self.zeit_fortschritt(studiengang, kennzahlen), 1),
+            "abgeschlossene_module": kennzahlen.abgeschlossene_module,
+            "gesamt_module": kennzahlen.gesamt_module,
+            "modul_fortschritt": round(self.modul_fortschritt(studiengang, kennzahlen), 1),
+            "erreichte_credits": kennzahlen.erreichte_credits,
+            "gesamt_credits": kennzahlen.gesamt_credits,
+            "credit_fortschritt": round(self.credits_fortschritt(studiengang, kennzahlen), 1),
+            "notendurchschnitt": kennzahlen.notendurchschnitt,
+            "ziel_notendurchschnitt": studiengang.ziele['note'].notendurchschnitt,
+            # je Ziel, ob es aktuell erreicht ist, und was in den offenen Modulen dafür noch nötig ist
+            "ziele": {typ: ergebnis.erreicht for typ, ergebnis in ergebnisse.items()},
+            "zielwerte": {typ: ziel.wert for typ, ziel in studiengang.ziele.items()},
+            "prognosen": {typ: ergebnis.prognose for typ, ergebnis in ergebnisse.items() if ergebnis.prognose is not None}
+        }
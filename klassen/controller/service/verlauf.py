@@ -0,0 +1,77 @@
+import logging
+import queue
+import threading
+import time
+
+from klassen.controller.service.manager import StudiengangManager
+
+
+class VerlaufSchreiber:
+    """ Hängt gespeicherte Stände im Hintergrund an den Verlauf an: Speichern meldet nur Mandant und Version (Beobachter
+    des Managers), ein Thread liest den Stand ohne Kopie aus dem Repository und schreibt den Eintrag. Speichern wartet so
+    weder auf Laden und Kennzahlen noch auf die Verlaufsdatei. """
+
+    def __init__(self, manager: StudiengangManager):
+        self.manager = manager
+        # (Mandant, Version, Zeitpunkt des Speicherns)
+        self._warteschlange = queue.Queue()
+        self._thread = None
+        self._sperre = threading.Lock()
+        self.geschrieben = 0
+        self.uebersprungen = 0 # inzwischen überholte Versionen - der neuere Stand hat eine eigene Meldung
+        self.fehlgeschlagen = 0
+
+    @property
+    def wartend(self):
+        """ Gemeldete, noch nicht geschriebene Einträge """
+        return self._warteschlange.unfinished_tasks
+
+    def melden(self, mandant: str | None, version: int):
+        """ Beobachter: merkt den gespeicherten Stand mit dem Zeitpunkt des Speicherns vor """
+        if self.manager.verlauf is None:
+            return
+        self._warteschlange.put((mandant, version, time.time()))
+        self._starten()
+
+    def _starten(self):
+        """ Startet den Thread bei Bedarf - auch erneut in einem per fork gestarteten Worker (gunicorn --preload) """
+        with self._sperre:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._abarbeiten, name="verlauf-schreiber", daemon=True)
+                self._thread.start()
+
+    def _abarbeiten(self):
+        """ Schreibt die gemeldeten Stände nacheinander - ein Fehler verwirft nur diesen Eintrag """
+        while True:
+            mandant, version, zeit = self._warteschlange.get()
+            try:
+                self._eintragen(mandant, version, zeit)
+            except Exception as e:
+                self.fehlgeschlagen += 1
+                logging.error("Verlauf für Mandant %s nicht geschrieben: %s", mandant, e)
+            finally:
+                self._warteschlange.task_done()
+
+    def _eintragen(self, mandant: str | None, version: int, zeit: float):
+        """ Hängt den gemeldeten Stand an - aus dem Cache des Repositorys, ohne den Studiengang zu kopieren """
+        verlauf = self.manager.verlauf
+        if verlauf is None:
+            return
+        studiengang = self.manager.speicher.lesen(mandant)
+        # nur genau den gemeldeten Stand eintragen - ist schon ein neuerer gespeichert, folgt dessen Meldung
+        if studiengang is None or studiengang.version != version:
+            self.uebersprungen += 1
+            return
+        verlauf.anhaengen(studiengang, mandant, zeit)
+        self.geschrieben += 1
+
+    def leeren(self, timeout: float | None = None) -> bool:
+        """ Wartet, bis alle gemeldeten Einträge geschrieben sind (z.B. beim Beenden) - True, wenn nichts mehr wartet """
+        ende = None if timeout is None else time.monotonic() + timeout
+        while self.wartend:
+            if ende is not None and time.monotonic() > ende:
+                return False
+            # nach fork wartende Einträge aus dem Master übernimmt ein neuer Thread
+            self._starten()
+            time.sleep(0.01)
+        return True
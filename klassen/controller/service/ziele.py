@@ -0,0 +1,64 @@
+import datetime
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from klassen.domain.kennzahlen import Kennzahlen
+from klassen.domain.studiengang import Studiengang
+
+
+@dataclass(frozen=True, slots=True)
+class ZielErgebnis:
+    """ Ergebnis eines Ziels: erreicht ja/nein und was in den offenen Modulen noch nötig ist """
+    erreicht: bool
+    prognose: dict | None = None
+
+
+class ZielAuswertung:
+    """ Wertet alle Ziele eines Studiengangs in einem gemeinsamen Durchlauf aus - ein Kennzahlen-Schnappschuss für alle
+    Ziele, das Ergebnis wird je Mandant, Version, Tag und Zielwerten zwischengespeichert (LRU) """
+
+    def __init__(self, max_eintraege: int = 256):
+        self.max_eintraege = max_eintraege
+        # Schlüssel -> {Typ: ZielErgebnis}, Reihenfolge entspricht der letzten Nutzung
+        self._eintraege = OrderedDict()
+        self._sperre = threading.Lock()
+        self.treffer = 0
+        self.fehlschlaege = 0
+
+    @staticmethod
+    def _schluessel(studiengang: Studiengang, stichtag: datetime.date, mandant: str | None):
+        """ Ergebnisse hängen nur vom gespeicherten Stand, vom Tag und von den Zielwerten ab """
+        ziele = tuple(sorted((typ, ziel.wert) for typ, ziel in studiengang.ziele.items()))
+        return mandant, studiengang.version, stichtag, ziele
+
+    def auswerten(self, studiengang: Studiengang, kennzahlen: Kennzahlen | None = None, mandant: str | None = None):
+        """ Gibt {Typ: ZielErgebnis} für alle Ziele des Studiengangs zurück """
+        stichtag = kennzahlen.stichtag.date() if kennzahlen is not None else datetime.date.today()
+        # Version 0: noch nie gespeichert (z.B. frisch importiert) - ohne Version kein sicherer Schlüssel
+        schluessel = self._schluessel(studiengang, stichtag, mandant) if studiengang.version else None
+        if schluessel is not None:
+            with self._sperre:
+                ergebnisse = self._eintraege.get(schluessel)
+                if ergebnisse is not None:
+                    self._eintraege.move_to_end(schluessel)
+                    self.treffer += 1
+                    return ergebnisse
+                self.fehlschlaege += 1
+        # Kennzahlen nur berechnen, wenn kein Schnappschuss übergeben wurde - einmal für alle Ziele
+        if kennzahlen is None:
+            kennzahlen = studiengang.berechne_kennzahlen()
+        ergebnisse = {typ: ZielErgebnis(ziel.ist_ziel_erreicht(studiengang, kennzahlen), ziel.prognose(kennzahlen))
+                      for typ, ziel in studiengang.ziele.items()}
+        if schluessel is not None:
+            with self._sperre:
+                self._eintraege[schluessel] = ergebnisse
+                self._eintraege.move_to_end(schluessel)
+                while len(self._eintraege) > self.max_eintraege:
+                    self._eintraege.popitem(last=False)
+        return ergebnisse
+
+    def leeren(self):
+        """ Verwirft alle Ergebnisse (z.B. nach dem Wechsel des Repositorys) """
+        with self._sperre:
+            self._eintraege.clear()
@@ -0,0 +1,27 @@
+import datetime
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Kennzahlen:
+    """ Unveränderlicher Schnappschuss aller Kennzahlen eines Studiengangs zu einem Stichtag """
+    stichtag: datetime.datetime # Zeitpunkt, auf den sich die Berechnung bezieht (eine Uhr pro Anfrage)
+    vergangene_tage: int # Tage seit Studienbeginn, negativ wenn der Beginn in der Zukunft liegt
+    notendurchschnitt: float # gerundeter Durchschnitt aller eingetragenen Noten, 0.0 wenn keine Noten vorhanden
+    abgeschlossene_module: int # Module mit bestandener Note oder Anerkennung
+    erreichte_credits: int # ECTS der bestandenen oder anerkannten Module
+    gesamt_module: int # Anzahl aller Module des Studiengangs
+    gesamt_credits: int # ECTS aller Module des Studiengangs
+    # Summen für Ziele und Prognosen, im selben Durchlauf berechnet
+    benotete_module: int = 0 # Module mit eingetragener Note
+    notensumme: float = 0.0 # Summe aller eingetragenen Noten
+    benotete_credits: int = 0 # ECTS der Module mit eingetragener Note
+    gewichtete_notensumme: float = 0.0 # Summe aus Note mal ECTS
+    fehlversuche: int = 0 # Module mit nicht bestandener Note (über 4,0)
+    offene_module: int = 0 # Module ohne Note und ohne Anerkennung
+    offene_credits: int = 0 # ECTS der offenen Module
+
+    @property
+    def gewichteter_notendurchschnitt(self):
+        """ Nach ECTS gewichteter Durchschnitt der eingetragenen Noten, 0.0 wenn keine Noten vorhanden """
+        return round(self.gewichtete_notensumme / self.benotete_credits, 1) if self.benotete_credits else 0.0
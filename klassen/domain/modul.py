@@ -1,10 +1,27 @@
-from dataclasses import dataclass
-
-from klassen.domain.pruefungsleistung import Pruefungsleistung
-
-@dataclass
-class Modul:
-    """ Module des Semesters mit Prüfungsleistung """
-    titel: str
-    credits: int
-    pruefungsleistung: Pruefungsleistung
\ No newline at end of file
+from dataclasses import dataclass
+
+from klassen.domain.pruefungsleistung import Pruefungsleistung
+
+@dataclass(slots=True)
+class Modul:
+    """ Module des Semesters mit Prüfungsleistung """
+    titel: str
+    credits: int
+    pruefungsleistung: Pruefungsleistung
+
+    def aendern(self, aenderungen: dict):
+        """ Übernimmt einzelne Felder (titel, credits, pruefungsart, note, anerkannt) aus einem Dictionary """
+        if 'titel' in aenderungen:
+            self.titel = aenderungen['titel']
+        if 'credits' in aenderungen:
+            self.credits = aenderungen['credits']
+        if 'pruefungsart' in aenderungen:
+            self.pruefungsleistung.setze_pruefungsart(aenderungen['pruefungsart'])
+        if 'note' in aenderungen:
+            self.pruefungsleistung.setze_note(aenderungen['note'])
+        if 'anerkannt' in aenderungen:
+            self.pruefungsleistung.setze_anerkannt(aenderungen['anerkannt'])
+
+    def kopieren(self):
+        """ Gibt eine unabhängige Kopie des Moduls samt Prüfungsleistung zurück """
+        return Modul(self.titel, self.credits, self.pruefungsleistung.kopieren())
\ No newline at end of file
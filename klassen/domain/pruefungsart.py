@@ -0,0 +1,29 @@
+import sys
+from enum import Enum
+
+
+class Pruefungsart(str, Enum):
+    """ Prüfungsarten der Module - als str-Enum weiterhin mit Texten vergleichbar und als Text serialisierbar """
+    KLAUSUR = "Klausur"
+    PORTFOLIO = "Portfolio"
+    ADVANCED_WORKBOOK = "Advanced Workbook"
+    FALLSTUDIE = "Fallstudie"
+    PROJEKTBERICHT = "Projektbericht"
+    PROJEKTPRAESENTATION = "Projektpräsentation"
+    HAUSARBEIT = "Hausarbeit"
+    SEMINARARBEIT = "Seminararbeit"
+    BACHELORARBEIT = "Bachelorarbeit"
+
+    def __str__(self):
+        # Ausgabe in Templates und Logs als Text, nicht als Pruefungsart.KLAUSUR
+        return self.value
+
+    @classmethod
+    def aus_text(cls, text):
+        """ Gibt die passende Prüfungsart zurück - unbekannte Texte bleiben als internierter String erhalten """
+        if isinstance(text, cls):
+            return text
+        try:
+            return cls(text)
+        except ValueError:
+            return sys.intern(text) if type(text) is str else text
@@ -1,18 +1,31 @@
-from dataclasses import dataclass
-from enum import Enum
-
-
-@dataclass
-class Pruefungsleistung:
-    """ Prüfungsleistung eines Moduls """
-    pruefungsart: Enum
-    note: float | None = None # Entweder float oder None - Standardwert = None
-    modul_anerkannt: bool | None = None # Entweder bool oder None - Standardwert = None
-
-    def setze_note(self, note: float):
-        """ Note für die Prüfungsleistung eintragen """
-        self.note = note
-
-    def setze_anerkannt(self, modul_anerkannt: bool):
-        """ Deaktiviert eine Prüfungsleistung, wenn das Modul anerkannt wurde """
-        self.modul_anerkannt = modul_anerkannt
\ No newline at end of file
+from dataclasses import dataclass
+
+from klassen.domain.pruefungsart import Pruefungsart
+
+
+@dataclass(slots=True) # slots statt __dict__ - spart Speicher, wenn viele Studiengänge geladen sind
+class Pruefungsleistung:
+    """ Prüfungsleistung eines Moduls """
+    pruefungsart: Pruefungsart | str # unbekannte Prüfungsarten bleiben als Text erhalten
+    note: float | None = None # Entweder float oder None - Standardwert = None
+    modul_anerkannt: bool | None = None # Entweder bool oder None - Standardwert = None
+
+    def __post_init__(self):
+        # bekannte Prüfungsarten als Enum-Mitglied ablegen, jede Instanz teilt sich dasselbe Objekt
+        self.pruefungsart = Pruefungsart.aus_text(self.pruefungsart)
+
+    def setze_pruefungsart(self, pruefungsart: Pruefungsart | str):
+        """ Prüfungsart der Prüfungsleistung ändern """
+        self.pruefungsart = Pruefungsart.aus_text(pruefungsart)
+
+    def setze_note(self, note: float):
+        """ Note für die Prüfungsleistung eintragen """
+        self.note = note
+
+    def setze_anerkannt(self, modul_anerkannt: bool):
+        """ Deaktiviert eine Prüfungsleistung, wenn das Modul anerkannt wurde """
+        self.modul_anerkannt = modul_anerkannt
+
+    def kopieren(self):
+        """ Gibt eine unabhängige Kopie der Prüfungsleistung zurück """
+        return Pruefungsleistung(self.pruefungsart, self.note, self.modul_anerkannt)
\ No newline at end of file
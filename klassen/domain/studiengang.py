@@ -1,61 +1,165 @@
-import datetime
-from dataclasses import field, dataclass
-
-from klassen.domain.semester import Semester
-
-@dataclass
-class Studiengang:
-    """ Stellt den Studiengang mit Semestern und Modulen dar """
-    titel: str
-    start_datum: datetime.datetime # Beginn des Studiengangs
-    # default_factory erzeugt bei jedem neuen Objekt eine neue Liste/Dict
-    semester: list["Semester"] = field(default_factory=list) # Liste von Semestern
-    ziele: dict = field(default_factory=dict) # Dictionary von Zielen
-
-    def berechne_notendurchschnitt(self):
-        """ Berechnet den Notendurchschnitt der eingetragenen Noten """
-        notenliste = []
-        notendurchschnitt = 0.0
-        # trägt alle Noten der Module aus den Semestern in einer Liste zusammen
-        for semester in self.semester:
-            notenliste = notenliste + semester.hole_modul_noten()
-        # versucht Notenschnitt zu berechnen, wenn keine Noten eingetragen sind, ist mit einer Division durch 0 zu rechnen da die Notenliste in diesem Fall leer ist
-        try:
-            # iteriert über zuvor erstellte Notenliste und addiert Noten
-            for note in notenliste:
-                notendurchschnitt += note
-            # Division der addierten Noten durch die Länge der Notenliste
-            notendurchschnitt = notendurchschnitt / len(notenliste)
-            # gerundeten Wert zurückgeben
-            return round(notendurchschnitt, 1)
-        except ZeroDivisionError:
-            # Wenn Notenliste leer dann 0.0 zurückgeben
-            return 0.0
-
-    def berechne_abgeschlossene_module(self):
-        """ Berechnet wie viele Module abgeschlossen sind (Note eingetragen) """
-        abgeschlossene_module = 0
-        # iteriert über Semester-Liste
-        for semester in self.semester:
-            # iteriert über die Liste der Noten aus einem Semester
-            for note in semester.hole_modul_noten():
-                # wenn Note eingetragen und kleiner gleich 4 ist, wird abgeschlossene_module um 1 erhöht
-                if note is not None and note <= 4:
-                    abgeschlossene_module += 1
-            # iteriert über anerkannte Module des Semesters, erhöht für jedes anerkannte Modul abgeschlossene_module um 1
-            for _ in semester.hole_anerkannte_module():
-                abgeschlossene_module += 1
-        return abgeschlossene_module
-
-    def berechne_erreichte_credits(self):
-        """ Berechnet wie viele Credits durch abgeschlossene Module erreicht wurden """
-        erreichte_credits = 0
-        # iteriert über die Semester-Liste und addiert die ECTS-Werte der Module
-        for semester in self.semester:
-            erreichte_credits += semester.berechne_modul_credits()
-        return erreichte_credits
-
-    def berechne_vergangene_tage(self):
-        """ Berechnet die Differenz in Tagen von Heute zum eingetragenem Studienbeginn """
-        # berechnet die Differenz des aktuellen Datums und des Start-Datums
-        return (datetime.datetime.now() - self.start_datum).days
+import copy
+import datetime
+from dataclasses import field, dataclass
+
+from klassen.domain.kennzahlen import Kennzahlen
+from klassen.domain.semester import Semester
+
+@dataclass
+class Studiengang:
+    """ Stellt den Studiengang mit Semestern und Modulen dar """
+    titel: str
+    start_datum: datetime.datetime # Beginn des Studiengangs
+    # default_factory erzeugt bei jedem neuen Objekt eine neue Liste/Dict
+    semester: list["Semester"] = field(default_factory=list) # Liste von Semestern
+    ziele: dict = field(default_factory=dict) # Dictionary von Zielen
+    version: int = 0 # gespeicherter Stand, wird bei jedem Speichern vom Repository erhöht
+
+    def kopieren(self):
+        """ Gibt eine unabhängige Kopie des Studiengangs zurück, Änderungen an der Kopie wirken sich nicht auf das Original aus """
+        # Ziele sind kleine Datenklassen, daher genügt eine flache Kopie je Ziel
+        ziele = {name: copy.copy(ziel) for name, ziel in self.ziele.items()}
+        return Studiengang(self.titel, self.start_datum, [semester.kopieren() for semester in self.semester], ziele,
+                           self.version)
+
+    def kopf_kopieren(self):
+        """ Kopie von Titel, Studienbeginn, Zielen und Version - ohne Semester und Module """
+        ziele = {name: copy.copy(ziel) for name, ziel in self.ziele.items()}
+        return Studiengang(self.titel, self.start_datum, [], ziele, self.version)
+
+    def kopf_uebernehmen(self, kopf: "Studiengang"):
+        """ Übernimmt Titel, Studienbeginn und Ziele aus einem Kopf (Studiengang ohne Semester) """
+        self.titel = kopf.titel
+        self.start_datum = kopf.start_datum
+        self.ziele = {name: copy.copy(ziel) for name, ziel in kopf.ziele.items()}
+
+    def teilkopie(self, semester_nummer: int):
+        """ Kopie für eine Änderung am Semester mit der Nummer: nur dessen Modulliste wird kopiert, die übrigen Semester
+        und alle Module teilt sie mit dem Original (Copy-on-Write) - Module daher nur über modul_aendern ändern """
+        ziele = {name: copy.copy(ziel) for name, ziel in self.ziele.items()}
+        semester = [Semester(semester.nummer, list(semester.module)) if semester.nummer == semester_nummer else semester
+                    for semester in self.semester]
+        return Studiengang(self.titel, self.start_datum, semester, ziele, self.version)
+
+    def modul_aendern(self, semester_nummer: int, index: int, aenderungen: dict):
+        """ Ersetzt das Modul durch eine geänderte Kopie - das bisherige Modul-Objekt bleibt unverändert """
+        modul = self.hole_modul(semester_nummer, index).kopieren()
+        modul.aendern(aenderungen)
+        for semester in self.semester:
+            if semester.nummer == semester_nummer:
+                semester.module[index] = modul
+                return modul
+
+    def hole_semester(self, nummer: int, start: int = 0, anzahl: int | None = None) -> Semester:
+        """ Kopie der Module start bis start+anzahl des Semesters - ein leeres Semester, wenn es die Nummer nicht gibt """
+        for semester in self.semester:
+            if semester.nummer == nummer:
+                ende = None if anzahl is None else start + anzahl
+                return Semester(nummer, [modul.kopieren() for modul in semester.module[start:ende]])
+        return Semester(nummer, [])
+
+    def module_ersetzen(self, nummer: int, module: list, start: int = 0, anzahl: int | None = None):
+        """ Ersetzt die Module start bis start+anzahl des Semesters - legt es bei Bedarf an, ein leeres wird entfernt """
+        for position, semester in enumerate(self.semester):
+            if semester.nummer == nummer:
+                ende = len(semester.module) if anzahl is None else start + anzahl
+                semester.module[start:ende] = module
+                if not semester.module:
+                    del self.semester[position]
+                return
+            # Semester sind nach Nummer sortiert, ein neues wird an der passenden Stelle eingefügt
+            if semester.nummer > nummer:
+                if module:
+                    self.semester.insert(position, Semester(nummer, list(module)))
+                return
+        if module:
+            self.semester.append(Semester(nummer, list(module)))
+
+    def hole_modul(self, semester_nummer: int, index: int):
+        """ Gibt das Modul an Position index im Semester mit der angegebenen Nummer zurück """
+        for semester in self.semester:
+            if semester.nummer == semester_nummer:
+                if 0 <= index < len(semester.module):
+                    return semester.module[index]
+                break
+        raise LookupError(f"Modul {index} in Semester {semester_nummer} nicht vorhanden.")
+
+    def berechne_kennzahlen(self, jetzt: datetime.datetime | None = None) -> Kennzahlen:
+        """ Berechnet alle Kennzahlen in einem Durchlauf über Semester und Module """
+        # eine Uhr für die gesamte Berechnung, damit alle Werte auf denselben Zeitpunkt bezogen sind
+        if jetzt is None:
+            jetzt = datetime.datetime.now()
+        notensumme = 0.0
+        notenanzahl = 0
+        benotete_credits = 0
+        gewichtete_notensumme = 0.0
+        fehlversuche = 0
+        offene_module = 0
+        offene_credits = 0
+        abgeschlossene_module = 0
+        erreichte_credits = 0
+        gesamt_module = 0
+        gesamt_credits = 0
+        # jedes Modul wird genau einmal betrachtet
+        for semester in self.semester:
+            for modul in semester.module:
+                note = modul.pruefungsleistung.note
+                anerkannt = modul.pruefungsleistung.modul_anerkannt
+                bestanden = note is not None and note <= 4.0
+                gesamt_module += 1
+                gesamt_credits += modul.credits
+                # alle eingetragenen Noten fließen in den Durchschnitt ein
+                if note is not None:
+                    notensumme += note
+                    notenanzahl += 1
+                    benotete_credits += modul.credits
+                    gewichtete_notensumme += note * modul.credits
+                    if not bestanden:
+                        fehlversuche += 1
+                # weder Note noch Anerkennung: Modul ist noch offen
+                elif not anerkannt:
+                    offene_module += 1
+                    offene_credits += modul.credits
+                # bestandene und anerkannte Module werden jeweils als abgeschlossen gezählt
+                if bestanden:
+                    abgeschlossene_module += 1
+                if anerkannt:
+                    abgeschlossene_module += 1
+                # ECTS zählen, wenn bestanden oder anerkannt
+                if bestanden or anerkannt:
+                    erreichte_credits += modul.credits
+        # wenn keine Noten eingetragen sind, ist der Durchschnitt 0.0
+        notendurchschnitt = round(notensumme / notenanzahl, 1) if notenanzahl else 0.0
+        return Kennzahlen(
+            stichtag=jetzt,
+            vergangene_tage=(jetzt - self.start_datum).days,
+            notendurchschnitt=notendurchschnitt,
+            abgeschlossene_module=abgeschlossene_module,
+            erreichte_credits=erreichte_credits,
+            gesamt_module=gesamt_module,
+            gesamt_credits=gesamt_credits,
+            benotete_module=notenanzahl,
+            notensumme=notensumme,
+            benotete_credits=benotete_credits,
+            gewichtete_notensumme=gewichtete_notensumme,
+            fehlversuche=fehlversuche,
+            offene_module=offene_module,
+            offene_credits=offene_credits
+        )
+
+    def berechne_notendurchschnitt(self):
+        """ Berechnet den Notendurchschnitt der eingetragenen Noten """
+        return self.berechne_kennzahlen().notendurchschnitt
+
+    def berechne_abgeschlossene_module(self):
+        """ Berechnet wie viele Module abgeschlossen sind (Note eingetragen) """
+        return self.berechne_kennzahlen().abgeschlossene_module
+
+    def berechne_erreichte_credits(self):
+        """ Berechnet wie viele Credits durch abgeschlossene Module erreicht wurden """
+        return self.berechne_kennzahlen().erreichte_credits
+
+    def berechne_vergangene_tage(self):
+        """ Berechnet die Differenz in Tagen von Heute zum eingetragenem Studienbeginn """
+        # berechnet die Differenz des aktuellen Datums und des Start-Datums
+        return (datetime.datetime.now() - self.start_datum).days
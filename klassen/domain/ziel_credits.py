@@ -0,0 +1,42 @@
+from dataclasses import dataclass
+
+from klassen.domain.kennzahlen import Kennzahlen
+from klassen.domain.studiengang import Studiengang
+from klassen.domain.ziel_interface import IZiel, anzahl, ziel_typ
+
+# ein Semester in Tagen, für die Anzahl der begonnenen Semester seit Studienbeginn
+SEMESTER_TAGE = 183
+
+
+@ziel_typ
+@dataclass(slots=True)
+class CreditsZiel(IZiel):
+    """ Gibt die angestrebten ECTS pro Semester an """
+    typ = "credits"
+    feld = "credits_pro_semester"
+    schluessel = "credits_pro_semester"
+    formular_feld = "ziel_credits"
+    bezeichnung = "ECTS pro Semester"
+    credits_pro_semester: int
+
+    @classmethod
+    def aus_wert(cls, wert):
+        return cls(anzahl(wert))
+
+    @staticmethod
+    def begonnene_semester(kennzahlen: Kennzahlen):
+        """ Anzahl der seit Studienbeginn begonnenen Semester - 0, wenn das Studium noch nicht begonnen hat """
+        if kennzahlen.vergangene_tage < 0:
+            return 0
+        return kennzahlen.vergangene_tage // SEMESTER_TAGE + 1
+
+    def ist_ziel_erreicht(self, studiengang: Studiengang, kennzahlen: Kennzahlen | None = None):
+        """ Prüft, ob bisher im Schnitt mindestens die angestrebten ECTS pro Semester erreicht wurden """
+        if kennzahlen is None:
+            kennzahlen = studiengang.berechne_kennzahlen()
+        return bool(kennzahlen.erreichte_credits >= self.credits_pro_semester * self.begonnene_semester(kennzahlen))
+
+    def prognose(self, kennzahlen: Kennzahlen):
+        """ ECTS, die bis zum Ende des laufenden Semesters noch fehlen """
+        soll = self.credits_pro_semester * self.begonnene_semester(kennzahlen)
+        return {"fehlende_credits": max(0, soll - kennzahlen.erreichte_credits)}
@@ -0,0 +1,32 @@
+from dataclasses import dataclass
+
+from klassen.domain.kennzahlen import Kennzahlen
+from klassen.domain.studiengang import Studiengang
+from klassen.domain.ziel_interface import IZiel, anzahl, ziel_typ
+
+
+@ziel_typ
+@dataclass(slots=True)
+class FehlversuchsZiel(IZiel):
+    """ Gibt die höchstens erlaubte Anzahl nicht bestandener Prüfungen an """
+    typ = "fehlversuche"
+    feld = "max_fehlversuche"
+    schluessel = "max_fehlversuche"
+    formular_feld = "ziel_fehlversuche"
+    bezeichnung = "Max. Fehlversuche"
+    max_fehlversuche: int
+
+    @classmethod
+    def aus_wert(cls, wert):
+        return cls(anzahl(wert))
+
+    def ist_ziel_erreicht(self, studiengang: Studiengang, kennzahlen: Kennzahlen | None = None):
+        """ Prüft, ob die Zahl der nicht bestandenen Prüfungen im erlaubten Rahmen liegt """
+        if kennzahlen is None:
+            kennzahlen = studiengang.berechne_kennzahlen()
+        # je Modul ist nur die letzte Note gespeichert - als Fehlversuch zählt eine Note schlechter als 4,0
+        return bool(kennzahlen.fehlversuche <= self.max_fehlversuche)
+
+    def prognose(self, kennzahlen: Kennzahlen):
+        """ Wie viele Fehlversuche noch erlaubt sind """
+        return {"verbleibende_fehlversuche": max(0, self.max_fehlversuche - kennzahlen.fehlversuche)}
@@ -0,0 +1,34 @@
+from dataclasses import dataclass
+
+from klassen.domain.kennzahlen import Kennzahlen
+from klassen.domain.studiengang import Studiengang
+from klassen.domain.ziel_interface import IZiel, ziel_typ
+from klassen.domain.ziel_note import benoetigte_note, note
+
+
+@ziel_typ
+@dataclass(slots=True)
+class GewichtetesNotenZiel(IZiel):
+    """ Gibt den Ziel-Notenschnitt gewichtet nach ECTS an """
+    typ = "note_gewichtet"
+    feld = "notendurchschnitt"
+    schluessel = "noten_schnitt_gewichtet"
+    formular_feld = "ziel_note_gewichtet"
+    bezeichnung = "Wunschnote (nach ECTS gewichtet)"
+    schritt = "0.1"
+    notendurchschnitt: float
+
+    @classmethod
+    def aus_wert(cls, wert):
+        return cls(note(wert))
+
+    def ist_ziel_erreicht(self, studiengang: Studiengang, kennzahlen: Kennzahlen | None = None):
+        """ Prüft, ob der nach ECTS gewichtete Notenschnitt kleiner gleich dem Ziel ist """
+        if kennzahlen is None:
+            kennzahlen = studiengang.berechne_kennzahlen()
+        return bool(kennzahlen.gewichteter_notendurchschnitt <= self.notendurchschnitt)
+
+    def prognose(self, kennzahlen: Kennzahlen):
+        """ Nötiger Durchschnitt der offenen Module, gewichtet nach deren ECTS """
+        return benoetigte_note(self.notendurchschnitt, kennzahlen.gewichtete_notensumme, kennzahlen.benotete_credits,
+                               kennzahlen.offene_credits)
@@ -1,13 +1,63 @@
 from abc import ABC, abstractmethod
+from typing import ClassVar
 
+from klassen.domain.kennzahlen import Kennzahlen
 from klassen.domain.studiengang import Studiengang
 
+# Register aller Zieltypen: Typ (Schlüssel im Dictionary der Ziele) -> Klasse, gefüllt über @ziel_typ
+ZIELTYPEN = {}
+
+
+def ziel_typ(klasse):
+    """ Klassen-Dekorator: registriert einen Zieltyp, damit Konverter, Handler und Templates ihn ohne Anpassung kennen """
+    ZIELTYPEN[klasse.typ] = klasse
+    return klasse
+
+
+def anzahl(wert) -> int:
+    """ Zielwert als Anzahl - ValueError bei nicht ganzzahligen, unendlichen oder negativen Werten """
+    zahl = float(wert)
+    # NaN und unendlich sind keine ganzen Zahlen
+    if not zahl.is_integer() or zahl < 0:
+        raise ValueError(f"Ungültige Anzahl: {wert!r}")
+    return int(zahl)
+
 
 class IZiel(ABC):
     """ Interface für Ziele des Studiengangs """
+    # leere slots, damit die Ziele mit slots=True keinen __dict__ erben
+    __slots__ = ()
+    # Beschreibung des Zieltyps für das Register - jedes Ziel hat genau einen Zielwert im Feld "feld"
+    typ: ClassVar[str] # Schlüssel im Dictionary der Ziele
+    feld: ClassVar[str] # Attribut mit dem Zielwert
+    schluessel: ClassVar[str] # Schlüssel in JSON-Datei und Journal
+    formular_feld: ClassVar[str] # Name des Eingabefelds auf der Bearbeiten-Seite
+    bezeichnung: ClassVar[str] # Beschriftung im GUI
+    schritt: ClassVar[str] = "1" # Schrittweite des Eingabefelds
+    pflicht: ClassVar[bool] = False # Pflichtziele hat jeder Studiengang, die übrigen sind optional
 
     @abstractmethod
-    def ist_ziel_erreicht(self, studiengang: Studiengang):
+    def ist_ziel_erreicht(self, studiengang: Studiengang, kennzahlen: Kennzahlen | None = None):
         pass
 
+    @property
+    def wert(self):
+        """ Zielwert des Ziels """
+        return getattr(self, self.feld)
+
+    @classmethod
+    def aus_wert(cls, wert):
+        """ Erstellt das Ziel aus einem gespeicherten Zielwert """
+        return cls(wert)
+
+    @classmethod
+    def aus_formular(cls, text: str):
+        """ Erstellt das Ziel aus der Eingabe im Webformular - None, wenn das Feld leer ist (Ziel entfernen) """
+        text = text.strip().replace(',', '.')
+        if not text:
+            return None
+        return cls.aus_wert(text)
 
+    def prognose(self, kennzahlen: Kennzahlen):
+        """ Was für das Ziel in den offenen Modulen noch nötig ist - None, wenn das Ziel keine Prognose hat """
+        return None
@@ -1,15 +1,67 @@
 from dataclasses import dataclass
 
+from klassen.domain.kennzahlen import Kennzahlen
 from klassen.domain.studiengang import Studiengang
-from klassen.domain.ziel_interface import IZiel
+from klassen.domain.ziel_interface import IZiel, ziel_typ
 
 
-@dataclass
+def benoetigte_note(ziel: float, summe: float, gewicht: float, offenes_gewicht: float):
+    """ Durchschnittsnote, die in den offenen Modulen noch nötig ist, damit der Gesamtschnitt das Ziel erreicht -
+    direkt aus (summe + x * offenes_gewicht) / (gewicht + offenes_gewicht) = ziel, ohne Kombinationen durchzuprobieren """
+    # ohne Zielwert (0,0) oder ohne offene Module gibt es nichts vorherzusagen
+    if ziel <= 0 or offenes_gewicht <= 0:
+        return None
+    note = (ziel * (gewicht + offenes_gewicht) - summe) / offenes_gewicht
+    return {
+        "benoetigte_note": round(note, 2),
+        # besser als 1,0 ist nicht möglich, schlechter als 4,0 wäre nicht bestanden - dann genügt jede bestandene Note
+        "erreichbar": note >= 1.0,
+        "jede_bestandene_note": note >= 4.0
+    }
+
+
+def note(wert) -> float:
+    """ Zielwert als Note - ValueError außerhalb von 1,0 bis 6,0 (auch bei NaN und unendlich) """
+    zahl = float(wert)
+    if not 1.0 <= zahl <= 6.0:
+        raise ValueError(f"Ungültige Note: {wert!r}")
+    return zahl
+
+
+@ziel_typ
+@dataclass(slots=True)
 class NotenZiel(IZiel):
     """ Gibt den Ziel-Notenschnitt an """
+    typ = "note"
+    feld = "notendurchschnitt"
+    schluessel = "noten_schnitt"
+    formular_feld = "ziel_note"
+    bezeichnung = "Wunschnote (Durchschnitt)"
+    schritt = "0.1"
+    pflicht = True
     notendurchschnitt: float
 
-    def ist_ziel_erreicht(self, studiengang: Studiengang):
+    @classmethod
+    def aus_wert(cls, wert):
+        return cls(float(wert))
+
+    @classmethod
+    def aus_formular(cls, text: str):
+        """ Wunschnote aus dem Formular - unplausible Werte ergeben das Ziel 0,0 (kein Ziel) """
+        ziel = super(NotenZiel, cls).aus_formular(text)
+        if ziel is not None and not 1.0 <= ziel.notendurchschnitt <= 6.0:
+            ziel = cls(0.0)
+        return ziel
+
+    def ist_ziel_erreicht(self, studiengang: Studiengang, kennzahlen: Kennzahlen | None = None):
         """ Prüft, ob das NotenZiel aktuell erreicht ist """
+        # Kennzahlen nur berechnen, wenn kein Schnappschuss übergeben wurde
+        if kennzahlen is None:
+            kennzahlen = studiengang.berechne_kennzahlen()
         # prüft, ob der aktuelle Notenschnitt kleiner gleich dem Ziel Notenschnitt ist
-        return bool(studiengang.berechne_notendurchschnitt() <= self.notendurchschnitt)
+        return bool(kennzahlen.notendurchschnitt <= self.notendurchschnitt)
+
+    def prognose(self, kennzahlen: Kennzahlen):
+        """ Nötiger Durchschnitt der offenen Module, jedes Modul zählt gleich """
+        return benoetigte_note(self.notendurchschnitt, kennzahlen.notensumme, kennzahlen.benotete_module,
+                               kennzahlen.offene_module)
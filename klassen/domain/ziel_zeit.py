@@ -1,15 +1,38 @@
 from dataclasses import dataclass
 
+from klassen.domain.kennzahlen import Kennzahlen
 from klassen.domain.studiengang import Studiengang
-from klassen.domain.ziel_interface import IZiel
+from klassen.domain.ziel_interface import IZiel, ziel_typ
 
 
-@dataclass
+@ziel_typ
+@dataclass(slots=True)
 class ZeitZiel(IZiel):
     """ Gibt die Ziel-Zeit in Tagen an """
+    typ = "zeit"
+    feld = "zeitziel_in_tagen"
+    schluessel = "zeit_tage"
+    formular_feld = "ziel_tage"
+    bezeichnung = "Zeitziel (<=12 = Jahre, >12 = Tage)"
+    pflicht = True
     zeitziel_in_tagen: int
 
-    def ist_ziel_erreicht(self, studiengang: Studiengang):
+    @classmethod
+    def aus_wert(cls, wert):
+        return cls(int(wert))
+
+    @classmethod
+    def aus_formular(cls, text: str):
+        """ Zeitziel aus dem Formular - Eingaben bis 12 sind Jahre und werden in Tage umgerechnet """
+        ziel = super(ZeitZiel, cls).aus_formular(text)
+        if ziel is not None and ziel.zeitziel_in_tagen <= 12:
+            ziel = cls(ziel.zeitziel_in_tagen * 365)
+        return ziel
+
+    def ist_ziel_erreicht(self, studiengang: Studiengang, kennzahlen: Kennzahlen | None = None):
         """ Prüft, ob das ZeitZiel aktuell erreicht ist """
+        # Kennzahlen nur berechnen, wenn kein Schnappschuss übergeben wurde
+        if kennzahlen is None:
+            kennzahlen = studiengang.berechne_kennzahlen()
         # prüft, ob die seit dem Beginn des Studiengangs vergangenen Tage kleiner gleich dem Ziel in Tagen ist
-        return bool(studiengang.berechne_vergangene_tage() <= self.zeitziel_in_tagen)
+        return bool(kennzahlen.vergangene_tage <= self.zeitziel_in_tagen)
@@ -0,0 +1,12 @@
+""" Alle Zieltypen des Studiengangs - der Import registriert sie in ZIELTYPEN
+
+Ein neuer Zieltyp braucht nur ein eigenes Modul mit einer von IZiel abgeleiteten, mit @ziel_typ dekorierten Klasse
+und einen Import hier - Konverter, Repositories, Handler und Templates lesen das Register.
+"""
+from klassen.domain.ziel_interface import ZIELTYPEN
+# Reihenfolge der Importe = Reihenfolge auf Dashboard und Bearbeiten-Seite
+from klassen.domain.ziel_zeit import ZeitZiel
+from klassen.domain.ziel_note import NotenZiel
+from klassen.domain.ziel_gewichtet import GewichtetesNotenZiel
+from klassen.domain.ziel_credits import CreditsZiel
+from klassen.domain.ziel_fehlversuche import FehlversuchsZiel
@@ -0,0 +1,234 @@
+import dataclasses
+import logging
+import os
+import signal
+import threading
+import time
+from dataclasses import dataclass
+
+from dotenv import dotenv_values
+
+# Einträge der Konfigurationsdatei -> Felder der Konfiguration
+SCHLUESSEL = {
+    "PASSWORD_HASH": "passwort_hash",
+    "SECRET_KEY": "secret_key",
+    "CSV_FILE": "csv_datei",
+    "JSON_FILE": "json_datei",
+    "SQLITE_FILE": "sqlite_datei",
+    "SPEICHER": "speicher",
+    "SNAPSHOT_FORMAT": "snapshot_format",
+    "JOURNAL_MAX_BYTES": "journal_max_bytes",
+    "JOURNAL_ARCHIVE": "journal_archive",
+    "HTML_CACHE_GROESSE": "html_cache_groesse",
+    "REPOSITORY_CACHE_GROESSE": "repository_cache_groesse",
+    "LOGIN_PROZESSE": "login_prozesse",
+    "LOGIN_WARTESCHLANGE": "login_warteschlange",
+    "LOGIN_VERSUCHE": "login_versuche",
+    "LOGIN_NACHFUELLEN_SEKUNDEN": "login_nachfuellen_sekunden",
+    "IMPORT_DIR": "import_verzeichnis",
+    "KOHORTE_NEUAUFBAU_SEKUNDEN": "kohorte_neuaufbau_sekunden",
+    "EDIT_SEITENGROESSE": "edit_seitengroesse",
+    "ASGI_THREADS": "asgi_threads",
+    "SSE_INTERVALL": "sse_intervall",
+    "TEMPLATE_CACHE_DIR": "template_cache_verzeichnis",
+    "VORWAERMEN": "vorwaermen",
+    "LOG_FILE": "log_datei",
+    "LOG_LEVEL": "log_level",
+    "LOG_FORMAT": "log_format",
+    "LOG_ROTATION": "log_rotation",
+    "LOG_MAX_BYTES": "log_max_bytes",
+    "LOG_BACKUPS": "log_backups",
+    "VERLAUF_DIR": "verlauf_verzeichnis",
+    "STATIC_CACHE_DIR": "statisch_verzeichnis",
+}
+# Pfade werden relativ zur Konfigurationsdatei aufgelöst, nicht zum aktuellen Arbeitsverzeichnis
+DATEIFELDER = ("csv_datei", "json_datei", "sqlite_datei", "import_verzeichnis", "template_cache_verzeichnis",
+               "log_datei", "verlauf_verzeichnis", "statisch_verzeichnis")
+# erlaubte Werte einzelner Felder
+ERLAUBT = {"speicher": ("json", "journal", "sqlite"), "snapshot_format": ("json", "binaer"),
+           "log_level": ("DEBUG", "INFO", "WARNING", "ERROR"), "log_format": ("text", "json"),
+           "log_rotation": ("groesse", "taeglich")}
+# Schreibweisen für Ja/Nein-Einträge
+WAHR = ("1", "true", "ja", "yes", "on")
+FALSCH = ("0", "false", "nein", "no", "off")
+
+
+@dataclass(frozen=True, slots=True)
+class Konfiguration:
+    """ Unveränderlicher, typisierter Stand der Konfigurationsdatei - Felder ohne Standardwert sind Pflicht """
+    passwort_hash: str
+    secret_key: str
+    csv_datei: str
+    json_datei: str
+    sqlite_datei: str = "data.sqlite3"
+    speicher: str = "journal" # journal (Änderungen werden angehängt), json oder sqlite
+    snapshot_format: str = "json" # json oder binaer
+    journal_max_bytes: int = 256 * 1024
+    journal_archive: int = 5 # verdichtete Journale, die als Änderungsprotokoll erhalten bleiben, 0: sofort löschen
+    html_cache_groesse: int = 256
+    repository_cache_groesse: int = 256 # Studiengänge im Cache des JSON-Repositorys, je Mandant einer
+    login_prozesse: int = 2
+    login_warteschlange: int = 8
+    login_versuche: int = 5
+    login_nachfuellen_sekunden: float = 30.0
+    import_verzeichnis: str = "import"
+    kohorte_neuaufbau_sekunden: float = 300.0 # Kohorte vollständig neu einlesen (Änderungen anderer Prozesse), 0: nie
+    edit_seitengroesse: int = 50
+    asgi_threads: int = 8
+    sse_intervall: float = 2.0
+    template_cache_verzeichnis: str = "cache/templates" # übersetzte Templates, von allen Prozessen geteilt
+    vorwaermen: bool = True # Caches vor der ersten Anfrage füllen
+    log_datei: str = "dashboard.log"
+    log_level: str = "WARNING"
+    log_format: str = "text" # text oder json (eine Zeile je Eintrag mit Anfrage-ID und Dauer)
+    log_rotation: str = "groesse" # groesse (ab log_max_bytes) oder taeglich
+    log_max_bytes: int = 10 * 1024 * 1024
+    log_backups: int = 5
+    verlauf_verzeichnis: str = "verlauf" # Verlauf der Kennzahlen, eine Datei je Mandant
+    statisch_verzeichnis: str = "cache/static" # statische Dateien mit Fingerabdruck und komprimierten Varianten
+
+    @classmethod
+    def aus_werten(cls, werte: dict, verzeichnis: str = ""):
+        """ Prüft und wandelt die Einträge der Datei - ValueError nennt alle fehlenden oder ungültigen Einträge """
+        felder = {feld.name: feld for feld in dataclasses.fields(cls)}
+        daten = {}
+        fehler = []
+        for schluessel, name in SCHLUESSEL.items():
+            wert = werte.get(schluessel)
+            feld = felder[name]
+            if wert is None or wert == "":
+                if feld.default is dataclasses.MISSING:
+                    fehler.append(f"{schluessel} fehlt")
+                continue
+            try:
+                wert = cls._wandeln(feld.type, wert)
+            except ValueError:
+                fehler.append(f"{schluessel} ist ungültig: {wert!r}")
+                continue
+            if name in ERLAUBT and wert not in ERLAUBT[name]:
+                fehler.append(f"{schluessel} muss einer der Werte {', '.join(ERLAUBT[name])} sein")
+                continue
+            if name in DATEIFELDER:
+                wert = os.path.join(verzeichnis, wert)
+            daten[name] = wert
+        if fehler:
+            raise ValueError("Ungültige Konfiguration: " + "; ".join(fehler))
+        return cls(**daten)
+
+    @staticmethod
+    def _wandeln(typ, wert: str):
+        """ Wandelt einen Eintrag in den Typ des Felds - bool("false") wäre wahr, daher eigene Schreibweisen """
+        if typ is bool:
+            if wert.lower() in WAHR:
+                return True
+            if wert.lower() in FALSCH:
+                return False
+            raise ValueError(wert)
+        return typ(wert)
+
+    @classmethod
+    def aus_datei(cls, pfad: str):
+        """ Liest die Konfigurationsdatei (Format KEY=wert) """
+        if not os.path.exists(pfad):
+            raise ValueError(f"Konfigurationsdatei {pfad} nicht gefunden.")
+        return cls.aus_werten(dotenv_values(pfad), os.path.dirname(os.path.abspath(pfad)))
+
+    def unterschiede(self, andere: "Konfiguration"):
+        """ Namen der Felder, die sich gegenüber einer anderen Konfiguration unterscheiden """
+        return {feld.name for feld in dataclasses.fields(self) if getattr(self, feld.name) != getattr(andere, feld.name)}
+
+
+class Konfigurationsdatei:
+    """ Hält die aktuelle Konfiguration und lädt sie bei Änderung der Datei oder auf SIGHUP neu, ohne Neustart.
+    Beobachter übernehmen die neuen Werte (z.B. Repositories tauschen), laufende Anfragen behalten ihren Stand. """
+
+    def __init__(self, pfad: str, intervall: float = 2.0):
+        self.pfad = pfad
+        self.intervall = intervall # höchstens so oft wird die Änderungszeit der Datei abgefragt
+        self._konfiguration = None
+        self._dateischluessel = None
+        self._naechste_pruefung = 0.0
+        # Funktionen (alt, neu), die nach jedem Neuladen mit geänderten Werten aufgerufen werden
+        self._beobachter = []
+        # nur ein Neuladen gleichzeitig, Beobachter sehen die Stände in der richtigen Reihenfolge
+        self._sperre = threading.Lock()
+        self.neu_geladen = 0
+        self.fehlgeschlagen = 0
+
+    @property
+    def aktuell(self) -> Konfiguration:
+        """ Aktuelle Konfiguration - beim ersten Zugriff wird die Datei gelesen, Fehler dort sind fatal """
+        konfiguration = self._konfiguration
+        if konfiguration is None:
+            with self._sperre:
+                if self._konfiguration is None:
+                    self._dateischluessel = self._schluessel()
+                    self._konfiguration = Konfiguration.aus_datei(self.pfad)
+                konfiguration = self._konfiguration
+        return konfiguration
+
+    def beobachten(self, funktion):
+        """ Registriert eine Funktion, die nach dem Neuladen mit alter und neuer Konfiguration aufgerufen wird """
+        self._beobachter.append(funktion)
+
+    def _schluessel(self):
+        """ Änderungszeit, Größe und Inode der Datei - None, wenn sie fehlt """
+        try:
+            status = os.stat(self.pfad)
+        except FileNotFoundError:
+            return None
+        return status.st_mtime_ns, status.st_size, status.st_ino
+
+    def pruefen(self):
+        """ Lädt neu, wenn sich die Datei geändert hat - günstig genug für jede Anfrage (höchstens ein stat je Intervall) """
+        jetzt = time.monotonic()
+        if jetzt < self._naechste_pruefung:
+            return False
+        self._naechste_pruefung = jetzt + self.intervall
+        if self._schluessel() == self._dateischluessel:
+            return False
+        return self.neu_laden()
+
+    def neu_laden(self):
+        """ Liest die Datei erneut - bei Fehlern bleibt die bisherige Konfiguration aktiv """
+        # stellt sicher, dass ein erster Stand existiert
+        self.aktuell
+        with self._sperre:
+            self._dateischluessel = self._schluessel()
+            try:
+                neu = Konfiguration.aus_datei(self.pfad)
+            except ValueError as e:
+                self.fehlgeschlagen += 1
+                logging.error("Konfiguration nicht neu geladen, bisherige bleibt aktiv: %s", e)
+                return False
+            alt = self._konfiguration
+            if neu == alt:
+                return False
+            self._konfiguration = neu
+            self.neu_geladen += 1
+            logging.warning("Konfiguration neu geladen, geändert: %s", ", ".join(sorted(alt.unterschiede(neu))))
+            for funktion in self._beobachter:
+                try:
+                    funktion(alt, neu)
+                except Exception as e:
+                    logging.error("Übernahme der neuen Konfiguration fehlgeschlagen: %s", e)
+        return True
+
+    def signal_registrieren(self):
+        """ SIGHUP lädt die Konfiguration neu (nicht unter Windows, nur im Haupt-Thread möglich) """
+        if not hasattr(signal, "SIGHUP"):
+            return False
+
+        def signal_empfangen(signum, frame):
+            # nicht im Signal-Handler selbst laden - der unterbrochene Thread könnte die Sperre halten
+            threading.Thread(target=self.neu_laden, name="konfiguration", daemon=True).start()
+
+        try:
+            signal.signal(signal.SIGHUP, signal_empfangen)
+        except ValueError:
+            return False
+        return True
+
+
+# gemeinsame Konfiguration des Prozesses, der Pfad kann über die Umgebung gesetzt werden
+konfiguration = Konfigurationsdatei(os.environ.get("DASHBOARD_CONFIG", "app.config"))
@@ -0,0 +1,180 @@
+import bisect
+import functools
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# Standard-Grenzen der Histogramme in Sekunden, von 0,1 ms bis 10 s
+STANDARD_GRENZEN = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _maskieren(wert):
+    """ Maskiert Backslash, Anführungszeichen und Zeilenumbruch in Label-Werten """
+    return str(wert).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels_text(labels: tuple, zusatz: str = ""):
+    """ Formatiert Labels im Prometheus-Textformat, z.B. {route="/",status="200"} """
+    teile = [f'{name}="{_maskieren(wert)}"' for name, wert in labels]
+    if zusatz:
+        teile.append(zusatz)
+    return "{" + ",".join(teile) + "}" if teile else ""
+
+
+def _zahl(wert):
+    """ Formatiert eine Zahl im Prometheus-Textformat """
+    if wert == math.inf:
+        return "+Inf"
+    return repr(float(wert)) if isinstance(wert, float) else str(wert)
+
+
+class Zaehler:
+    """ Monoton steigender Zähler, getrennt nach Labels """
+    typ = "counter"
+
+    def __init__(self, name: str, hilfe: str):
+        self.name = name
+        self.hilfe = hilfe
+        self._werte = {}
+        self._sperre = threading.Lock()
+
+    def erhoehen(self, wert: float = 1, **labels):
+        """ Erhöht den Zähler für die Labels """
+        schluessel = tuple(sorted(labels.items()))
+        with self._sperre:
+            self._werte[schluessel] = self._werte.get(schluessel, 0) + wert
+
+    def zeilen(self):
+        """ Gibt die Messwerte im Prometheus-Textformat zurück """
+        with self._sperre:
+            werte = list(self._werte.items())
+        return [f"{self.name}{_labels_text(labels)} {_zahl(wert)}" for labels, wert in werte]
+
+
+class Histogramm:
+    """ Verteilung von Messwerten (z.B. Laufzeiten in Sekunden) in festen Klassen, getrennt nach Labels """
+    typ = "histogram"
+
+    def __init__(self, name: str, hilfe: str, grenzen: tuple = STANDARD_GRENZEN):
+        self.name = name
+        self.hilfe = hilfe
+        self.grenzen = tuple(sorted(grenzen))
+        # Labels -> [Anzahl je Klasse (nicht kumuliert), Summe, Anzahl]
+        self._werte = {}
+        self._sperre = threading.Lock()
+
+    def beobachten(self, wert: float, **labels):
+        """ Nimmt einen Messwert auf - nur eine Suche in den Grenzen und drei Additionen unter der Sperre """
+        schluessel = tuple(sorted(labels.items()))
+        klasse = bisect.bisect_left(self.grenzen, wert)
+        with self._sperre:
+            eintrag = self._werte.get(schluessel)
+            if eintrag is None:
+                eintrag = self._werte[schluessel] = [[0] * (len(self.grenzen) + 1), 0.0, 0]
+            eintrag[0][klasse] += 1
+            eintrag[1] += wert
+            eintrag[2] += 1
+
+    @contextmanager
+    def messen(self, **labels):
+        """ Misst die Laufzeit des with-Blocks """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.beobachten(time.perf_counter() - start, **labels)
+
+    def zeilen(self):
+        """ Gibt die Messwerte im Prometheus-Textformat zurück, Klassen kumuliert wie von Prometheus erwartet """
+        with self._sperre:
+            werte = [(labels, list(klassen), summe, anzahl) for labels, (klassen, summe, anzahl) in self._werte.items()]
+        zeilen = []
+        for labels, klassen, summe, anzahl in werte:
+            kumuliert = 0
+            for grenze, klasse in zip(self.grenzen + (math.inf,), klassen):
+                kumuliert += klasse
+                grenze_text = 'le="' + _zahl(grenze) + '"'
+                zeilen.append(f"{self.name}_bucket{_labels_text(labels, grenze_text)} {kumuliert}")
+            zeilen.append(f"{self.name}_sum{_labels_text(labels)} {_zahl(summe)}")
+            zeilen.append(f"{self.name}_count{_labels_text(labels)} {anzahl}")
+        return zeilen
+
+
+class Abfrage:
+    """ Messwert, der erst bei der Ausgabe über eine Funktion abgefragt wird (z.B. Cache-Zähler) """
+
+    def __init__(self, name: str, hilfe: str, typ: str, funktion):
+        self.name = name
+        self.hilfe = hilfe
+        self.typ = typ
+        # Rückgabe der Funktion: Zahl oder Dictionary Label-Wert -> Zahl für das Label "art"
+        self.funktion = funktion
+
+    def zeilen(self):
+        """ Ruft die Funktion auf und gibt die Messwerte im Prometheus-Textformat zurück """
+        wert = self.funktion()
+        if isinstance(wert, dict):
+            return [f"{self.name}{_labels_text((('art', art),))} {_zahl(zahl)}" for art, zahl in wert.items()]
+        return [f"{self.name} {_zahl(wert)}"]
+
+
+class Metriken:
+    """ Sammelt alle Messgrößen des Prozesses und gibt sie im Prometheus-Textformat aus """
+
+    def __init__(self):
+        self._messgroessen = {}
+        self._sperre = threading.Lock()
+
+    def _registrieren(self, messgroesse):
+        """ Registriert eine Messgröße - ist der Name schon vergeben, wird die vorhandene zurückgegeben """
+        with self._sperre:
+            return self._messgroessen.setdefault(messgroesse.name, messgroesse)
+
+    def zaehler(self, name: str, hilfe: str) -> Zaehler:
+        return self._registrieren(Zaehler(name, hilfe))
+
+    def histogramm(self, name: str, hilfe: str, grenzen: tuple = STANDARD_GRENZEN) -> Histogramm:
+        return self._registrieren(Histogramm(name, hilfe, grenzen))
+
+    def abfrage(self, name: str, hilfe: str, funktion, typ: str = "gauge") -> Abfrage:
+        """ Registriert eine Abfrage - eine vorhandene mit gleichem Namen wird ersetzt (z.B. neue App-Instanz) """
+        abfrage = Abfrage(name, hilfe, typ, funktion)
+        with self._sperre:
+            self._messgroessen[name] = abfrage
+        return abfrage
+
+    def ausgeben(self):
+        """ Gibt alle Messgrößen im Prometheus-Textformat (Version 0.0.4) zurück """
+        with self._sperre:
+            messgroessen = list(self._messgroessen.values())
+        zeilen = []
+        for messgroesse in messgroessen:
+            zeilen.append(f"# HELP {messgroesse.name} {messgroesse.hilfe}")
+            zeilen.append(f"# TYPE {messgroesse.name} {messgroesse.typ}")
+            zeilen.extend(messgroesse.zeilen())
+        return "\n".join(zeilen) + "\n"
+
+
+def zeitmessung(histogramm: Histogramm, **labels):
+    """ Dekorator: misst jede Ausführung der Funktion im Histogramm """
+    def dekorator(funktion):
+        @functools.wraps(funktion)
+        def gemessen(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return funktion(*args, **kwargs)
+            finally:
+                histogramm.beobachten(time.perf_counter() - start, **labels)
+        return gemessen
+    return dekorator
+
+
+# gemeinsame Messgrößen des Prozesses
+metriken = Metriken()
+anfrage_dauer = metriken.histogramm("dashboard_anfrage_dauer_sekunden", "Dauer der HTTP-Anfragen je Route")
+anfragen = metriken.zaehler("dashboard_anfragen_gesamt", "Anzahl der HTTP-Anfragen je Route und Status")
+repository_dauer = metriken.histogramm("dashboard_repository_dauer_sekunden", "Laden und Speichern im Repository")
+converter_dauer = metriken.histogramm("dashboard_converter_dauer_sekunden", "Serialisieren und Deserialisieren")
+kennzahlen_dauer = metriken.histogramm("dashboard_kennzahlen_dauer_sekunden", "Berechnung der Kennzahlen")
+template_dauer = metriken.histogramm("dashboard_template_dauer_sekunden", "Rendern der Templates")
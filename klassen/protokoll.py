@@ -0,0 +1,117 @@
+import atexit
+import datetime
+import json
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+
+# Textformat der Log-Datei wie bisher
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+DATUM_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class AnfrageFilter(logging.Filter):
+    """ Ergänzt jeden Eintrag um die ID der laufenden Anfrage - läuft im Thread der Anfrage, vor der Warteschlange """
+
+    def filter(self, record):
+        if not hasattr(record, "anfrage_id"):
+            record.anfrage_id = None
+            # Import erst hier, damit die Protokollierung auch ohne Flask (z.B. Benchmarks) funktioniert
+            from flask import g, has_request_context
+            if has_request_context():
+                record.anfrage_id = g.get("anfrage_id")
+        return True
+
+
+class JSONFormatter(logging.Formatter):
+    """ Eine JSON-Zeile je Eintrag - mit Anfrage-ID und, falls angegeben, Dauer in Millisekunden """
+
+    def format(self, record):
+        eintrag = {
+            "zeit": datetime.datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "nachricht": record.getMessage(),
+        }
+        if getattr(record, "anfrage_id", None):
+            eintrag["anfrage_id"] = record.anfrage_id
+        if getattr(record, "dauer_ms", None) is not None:
+            eintrag["dauer_ms"] = record.dauer_ms
+        # über die Warteschlange ist ein Traceback bereits Teil der Nachricht
+        if record.exc_info:
+            eintrag["fehler"] = self.formatException(record.exc_info)
+        return json.dumps(eintrag, ensure_ascii=False)
+
+
+class Protokoll:
+    """ Protokollierung über eine Warteschlange: Anfragen legen Einträge nur ab, ein Hintergrund-Thread formatiert und
+    schreibt sie in die rotierende Log-Datei - eine langsame Platte verzögert keine Anfrage """
+
+    def __init__(self):
+        self.warteschlange = queue.SimpleQueue()
+        self._listener = None
+        self._datei_handler = None
+        self._queue_handler = None
+
+    @property
+    def wartend(self):
+        """ Noch nicht geschriebene Einträge """
+        return self.warteschlange.qsize()
+
+    def einrichten(self, config):
+        """ Richtet Warteschlange und Log-Datei nach der Konfiguration ein - ein erneuter Aufruf ersetzt beide """
+        self.beenden()
+        if config.log_rotation == "taeglich":
+            # um Mitternacht neue Datei, ältere erhalten das Datum als Endung
+            handler = TimedRotatingFileHandler(config.log_datei, when="midnight", backupCount=config.log_backups,
+                                               encoding="utf-8", delay=True)
+        else:
+            # neue Datei ab log_max_bytes, bisher wurde die Datei bei jedem Start überschrieben
+            handler = RotatingFileHandler(config.log_datei, maxBytes=config.log_max_bytes,
+                                          backupCount=config.log_backups, encoding="utf-8", delay=True)
+        if config.log_format == "json":
+            handler.setFormatter(JSONFormatter())
+        else:
+            handler.setFormatter(logging.Formatter(TEXT_FORMAT, DATUM_FORMAT))
+        self._datei_handler = handler
+        self._queue_handler = QueueHandler(self.warteschlange)
+        self._queue_handler.addFilter(AnfrageFilter())
+        wurzel = logging.getLogger()
+        wurzel.setLevel(config.log_level)
+        wurzel.addHandler(self._queue_handler)
+        self._starten()
+
+    def _starten(self):
+        """ Startet den Hintergrund-Thread, der die Warteschlange in die Datei schreibt """
+        self._listener = QueueListener(self.warteschlange, self._datei_handler)
+        self._listener.start()
+
+    def nach_fork(self):
+        """ Threads überleben fork nicht (gunicorn --preload) - jeder Worker startet seinen eigenen Schreiber """
+        if self._listener is not None:
+            # die Datei des Masters nicht weiterverwenden, der Worker öffnet sie beim ersten Eintrag selbst
+            self._datei_handler.stream = None
+            self.warteschlange = self._queue_handler.queue = queue.SimpleQueue()
+            self._starten()
+
+    def beenden(self):
+        """ Schreibt alle wartenden Einträge und entfernt die Handler """
+        if self._listener is None:
+            return
+        self._listener.stop()
+        self._listener = None
+        logging.getLogger().removeHandler(self._queue_handler)
+        self._datei_handler.close()
+
+    @staticmethod
+    def level_setzen(level: str):
+        """ Ändert das Log-Level zur Laufzeit (neu geladene Konfiguration) """
+        logging.getLogger().setLevel(level)
+
+
+# gemeinsame Protokollierung des Prozesses
+protokoll = Protokoll()
+atexit.register(protokoll.beenden)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=protokoll.nach_fork)
@@ -0,0 +1,59 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from klassen.domain.studiengang import Studiengang
+from klassen.repository.interface import IAsyncStudiengangRepository, IStudiengangRepository
+
+
+class StudiengangAsyncData(IAsyncStudiengangRepository):
+    """ Asynchrone Sicht auf ein Repository: Dateizugriffe laufen in einem Thread-Pool,
+    gleichzeitige gleiche Lesezugriffe werden zu einem gebündelt """
+
+    def __init__(self, speicher: IStudiengangRepository, threads: int = 8):
+        self.speicher = speicher
+        self._pool = ThreadPoolExecutor(threads, thread_name_prefix="repository")
+        # laufende Lesezugriffe: (Art, Mandant) -> Future - gehört zur Ereignisschleife des Servers
+        self._laufend = {}
+        # Zähler: tatsächlich ausgeführte und an laufende Zugriffe angehängte Lesezugriffe
+        self.ausgefuehrt = 0
+        self.gebuendelt = 0
+
+    async def im_thread(self, funktion, *args):
+        """ Führt eine blockierende Funktion im Thread-Pool aus, ohne die Ereignisschleife zu blockieren """
+        return await asyncio.get_running_loop().run_in_executor(self._pool, funktion, *args)
+
+    async def _gebuendelt(self, art: str, mandant: str | None, funktion):
+        """ Startet den Lesezugriff nur, wenn nicht bereits ein gleicher läuft - alle Aufrufer erhalten dasselbe Ergebnis """
+        schluessel = (art, mandant)
+        future = self._laufend.get(schluessel)
+        if future is None:
+            self.ausgefuehrt += 1
+            future = asyncio.get_running_loop().run_in_executor(self._pool, funktion, mandant)
+            self._laufend[schluessel] = future
+            future.add_done_callback(lambda _: self._laufend.pop(schluessel, None))
+        else:
+            self.gebuendelt += 1
+        # shield: bricht ein Aufrufer ab (z.B. Verbindung getrennt), läuft der Zugriff für die übrigen weiter
+        return await asyncio.shield(future)
+
+    async def laden(self, mandant: str | None = None):
+        """ Lädt den Studiengang - gleichzeitige Aufrufe für denselben Mandanten lösen nur einen Lesezugriff aus """
+        studiengang = await self.lesen(mandant)
+        # jeder Aufrufer bekommt eine eigene Kopie, da er den Studiengang verändern darf
+        return None if studiengang is None else studiengang.kopieren()
+
+    async def lesen(self, mandant: str | None = None):
+        """ Wie laden, aber ohne Kopie - alle gleichzeitigen Aufrufer teilen sich den Stand und dürfen ihn nur lesen """
+        return await self._gebuendelt("lesen", mandant, self.speicher.lesen)
+
+    async def version(self, mandant: str | None = None):
+        """ Gibt die gespeicherte Version zurück, gleichzeitige Aufrufe werden gebündelt """
+        return await self._gebuendelt("version", mandant, self.speicher.version)
+
+    async def speichern(self, studiengang: Studiengang, mandant: str | None = None):
+        """ Speichert den Studiengang im Thread-Pool - Schreibzugriffe werden nicht gebündelt """
+        await self.im_thread(self.speicher.speichern, studiengang, mandant)
+
+    def beenden(self):
+        """ Beendet den Thread-Pool """
+        self._pool.shutdown(wait=False)
@@ -0,0 +1,137 @@
+import datetime
+import math
+import struct
+
+from klassen.domain.modul import Modul
+from klassen.domain.pruefungsart import Pruefungsart
+from klassen.domain.pruefungsleistung import Pruefungsleistung
+from klassen.domain.semester import Semester
+from klassen.domain.studiengang import Studiengang
+from klassen.domain.ziel_note import NotenZiel
+from klassen.domain.ziel_zeit import ZeitZiel
+from klassen.domain.ziele import ZIELTYPEN
+from klassen.metriken import converter_dauer, zeitmessung
+
+# Kennung am Dateianfang, daran wird das Format beim Laden erkannt (JSON beginnt immer mit "{")
+MAGIC = b"IUSG"
+# wird erhöht, wenn sich der Aufbau ändert - ältere Versionen bleiben lesbar
+FORMAT_VERSION = 2
+
+# Aufbau (little-endian):
+# Kopf | Stringtabelle | Semestertabelle | Modultabelle | Zieltabelle (ab Version 2)
+# Kopf: Magic, Formatversion, Version des Studiengangs, Titel und Startdatum als Index in die Stringtabelle,
+#       Zeitziel in Tagen, Notenziel, Anzahl Strings, Anzahl Semester, Anzahl Module
+KOPF = struct.Struct("<4sHQIIidIII")
+# Länge eines Strings in Bytes, danach folgen die UTF-8-Bytes
+STRING_LAENGE = struct.Struct("<I")
+# Semester: Nummer, Anzahl Module
+SEMESTER = struct.Struct("<iI")
+# Modul: Titel (Index), Prüfungsart (Index), ECTS, Note (NaN = keine Note), anerkannt (0 = None, 1 = False, 2 = True)
+MODUL = struct.Struct("<IIidB")
+# Zieltabelle: Anzahl der optionalen Ziele, danach je Ziel Typ (Index) und Zielwert - Pflichtziele stehen im Kopf
+ZIEL_ANZAHL = struct.Struct("<I")
+ZIEL = struct.Struct("<Id")
+
+ANERKANNT_CODES = {None: 0, False: 1, True: 2}
+ANERKANNT_WERTE = (None, False, True)
+
+
+class StudiengangBinaerConverter:
+    """ Kompaktes Binärformat für Snapshots eines Studiengangs, Titel und Prüfungsarten stehen einmal in einer Stringtabelle """
+
+    @staticmethod
+    def ist_binaer(daten: bytes):
+        """ Prüft anhand der Kennung, ob die Daten im Binärformat vorliegen """
+        return daten[:len(MAGIC)] == MAGIC
+
+    @staticmethod
+    @zeitmessung(converter_dauer, format="binaer", richtung="serialisieren")
+    def serialisieren(studiengang: Studiengang) -> bytes:
+        """ Serialisiert einen Studiengang in das Binärformat """
+        strings = {}
+
+        def index(text):
+            # jeder Text wird nur einmal in die Stringtabelle aufgenommen
+            return strings.setdefault(str(text), len(strings))
+
+        titel = index(studiengang.titel)
+        start_datum = index(studiengang.start_datum.isoformat())
+        semester_teile = []
+        modul_teile = []
+        for semester in studiengang.semester:
+            semester_teile.append(SEMESTER.pack(semester.nummer, len(semester.module)))
+            for modul in semester.module:
+                pl = modul.pruefungsleistung
+                modul_teile.append(MODUL.pack(index(modul.titel), index(pl.pruefungsart), modul.credits,
+                                              math.nan if pl.note is None else pl.note,
+                                              ANERKANNT_CODES[pl.modul_anerkannt]))
+        ziel_teile = [ZIEL.pack(index(typ), ziel.wert) for typ, ziel in studiengang.ziele.items()
+                      if not ZIELTYPEN[typ].pflicht]
+        kopf = KOPF.pack(MAGIC, FORMAT_VERSION, studiengang.version, titel, start_datum,
+                         studiengang.ziele['zeit'].zeitziel_in_tagen, studiengang.ziele['note'].notendurchschnitt,
+                         len(strings), len(semester_teile), len(modul_teile))
+        teile = [kopf]
+        for text in strings:
+            kodiert = text.encode('utf-8')
+            teile.append(STRING_LAENGE.pack(len(kodiert)))
+            teile.append(kodiert)
+        teile.append(b"".join(semester_teile + modul_teile))
+        teile.append(ZIEL_ANZAHL.pack(len(ziel_teile)))
+        return b"".join(teile + ziel_teile)
+
+    @staticmethod
+    @zeitmessung(converter_dauer, format="binaer", richtung="deserialisieren")
+    def deserialisieren(daten: bytes) -> Studiengang:
+        """ Erstellt einen Studiengang aus Daten im Binärformat """
+        (magic, format_version, version, titel, start_datum, zeit_tage, noten_schnitt,
+         anzahl_strings, anzahl_semester, anzahl_module) = KOPF.unpack_from(daten, 0)
+        if magic != MAGIC:
+            raise ValueError("Keine Binärdaten eines Studiengangs.")
+        if format_version > FORMAT_VERSION:
+            raise ValueError(f"Binärformat {format_version} wird nicht unterstützt.")
+        position = KOPF.size
+        # Stringtabelle einlesen - gleiche Titel teilen sich danach dasselbe String-Objekt
+        strings = []
+        for _ in range(anzahl_strings):
+            (laenge,) = STRING_LAENGE.unpack_from(daten, position)
+            position += STRING_LAENGE.size
+            strings.append(daten[position:position + laenge].decode('utf-8'))
+            position += laenge
+        # Prüfungsarten werden erst beim Zugriff in Enum-Mitglieder umgewandelt, jeder Index nur einmal
+        pruefungsarten = {}
+        semester_ende = position + anzahl_semester * SEMESTER.size
+        module_ende = semester_ende + anzahl_module * MODUL.size
+        if len(daten) < module_ende:
+            raise ValueError("Binärdaten des Studiengangs sind unvollständig.")
+        # Modultabelle in einem Durchlauf entpacken
+        module = MODUL.iter_unpack(daten[semester_ende:module_ende])
+        semester_liste = []
+        for nummer, anzahl in SEMESTER.iter_unpack(daten[position:semester_ende]):
+            modul_liste = []
+            for _ in range(anzahl):
+                titel_index, art_index, credits, note, anerkannt = next(module)
+                art = pruefungsarten.get(art_index)
+                if art is None:
+                    art = pruefungsarten[art_index] = Pruefungsart.aus_text(strings[art_index])
+                pruefungsleistung = Pruefungsleistung(art, None if math.isnan(note) else note, ANERKANNT_WERTE[anerkannt])
+                modul_liste.append(Modul(strings[titel_index], credits, pruefungsleistung))
+            semester_liste.append(Semester(nummer, modul_liste))
+        ziele_dict = {
+            "zeit": ZeitZiel(zeit_tage),
+            "note": NotenZiel(noten_schnitt)
+        }
+        # Version 1 hat noch keine Zieltabelle
+        if format_version >= 2:
+            if len(daten) < module_ende + ZIEL_ANZAHL.size:
+                raise ValueError("Binärdaten des Studiengangs sind unvollständig.")
+            (anzahl_ziele,) = ZIEL_ANZAHL.unpack_from(daten, module_ende)
+            ziele_start = module_ende + ZIEL_ANZAHL.size
+            if len(daten) < ziele_start + anzahl_ziele * ZIEL.size:
+                raise ValueError("Binärdaten des Studiengangs sind unvollständig.")
+            for typ_index, wert in ZIEL.iter_unpack(daten[ziele_start:ziele_start + anzahl_ziele * ZIEL.size]):
+                klasse = ZIELTYPEN.get(strings[typ_index])
+                # Ziele eines nicht mehr vorhandenen Zieltyps werden übersprungen
+                if klasse is not None:
+                    ziele_dict[klasse.typ] = klasse.aus_wert(wert)
+        return Studiengang(strings[titel], datetime.datetime.fromisoformat(strings[start_datum]), semester_liste,
+                           ziele_dict, version)
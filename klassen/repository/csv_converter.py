@@ -1,5 +1,6 @@
 import datetime
 import logging
+import sys
 
 from klassen.domain.modul import Modul
 from klassen.domain.pruefungsleistung import Pruefungsleistung
@@ -7,13 +8,70 @@ from klassen.domain.semester import Semester
 from klassen.domain.studiengang import Studiengang
 from klassen.domain.ziel_note import NotenZiel
 from klassen.domain.ziel_zeit import ZeitZiel
+from klassen.metriken import converter_dauer, zeitmessung
+
+# Spalten des Studienablaufplans, Note und Anerkennung sind optional
+SPALTEN = ["Semester", "Modul", "ECTS", "Pruefungsleistung"]
+NOTEN_SPALTEN = ["Note", "Anerkannt"]
+# Schreibweisen der Spalte Anerkannt - leer bedeutet: nicht angegeben
+ANERKANNT_TEXTE = {"ja": True, "true": True, "1": True, "nein": False, "false": False, "0": False}
 
 
 class StudiengangCSVConverter:
     """ Erstellt einen Studiengang, liest optional eine CSV-Datei ein """
     @staticmethod
-    def deserialisieren(csv_read):
-        """ Wandelt Daten aus CSV-Datei in Module um """
+    def zeile_deserialisieren(zeile):
+        """ Wandelt eine Zeile der CSV-Datei in Semesternummer und Modul um """
+        # Moduldaten zeilenweise einlesen, fehlende Spalten sind None
+        sem_num = int(zeile['Semester'])
+        mod_titel = zeile['Modul']
+        mod_credits = int(zeile['ECTS'])
+        mod_pruefung_str = zeile['Pruefungsleistung']
+        if not mod_titel or not mod_pruefung_str:
+            raise ValueError("Modul und Pruefungsleistung dürfen nicht leer sein.")
+        # Prüfungsleistung erstellen
+        pruefungsleistung = Pruefungsleistung(mod_pruefung_str)
+        # Note und Anerkennung nur, wenn die Spalten vorhanden und gefüllt sind (z.B. aus einem Export)
+        note = (zeile.get('Note') or "").strip()
+        if note:
+            pruefungsleistung.setze_note(float(note.replace(",", ".")))
+        anerkannt = (zeile.get('Anerkannt') or "").strip().lower()
+        if anerkannt:
+            if anerkannt not in ANERKANNT_TEXTE:
+                raise ValueError(f"Ungültiger Wert für Anerkannt: {anerkannt!r}")
+            pruefungsleistung.setze_anerkannt(ANERKANNT_TEXTE[anerkannt])
+        # Modul mit interniertem Titel erstellen
+        return sem_num, Modul(sys.intern(mod_titel), mod_credits, pruefungsleistung)
+
+    @staticmethod
+    def zeile_serialisieren(sem_num: int, modul: Modul, mit_noten: bool = False):
+        """ Wandelt ein Modul in eine Zeile der CSV-Datei um (Liste in Reihenfolge der Spalten) """
+        pl = modul.pruefungsleistung
+        zeile = [sem_num, modul.titel, modul.credits, str(pl.pruefungsart)]
+        if mit_noten:
+            anerkannt = "" if pl.modul_anerkannt is None else ("ja" if pl.modul_anerkannt else "nein")
+            zeile += ["" if pl.note is None else pl.note, anerkannt]
+        return zeile
+
+    @staticmethod
+    def serialisieren(studiengang: Studiengang, mit_noten: bool = False, mandant: str | None = None):
+        """ Liefert die Zeilen eines Studiengangs einzeln (ohne Überschrift) - mit Mandant steht dieser in der
+        ersten Spalte, damit mehrere Studiengänge in eine Datei passen """
+        for semester in studiengang.semester:
+            for modul in semester.module:
+                zeile = StudiengangCSVConverter.zeile_serialisieren(semester.nummer, modul, mit_noten)
+                yield zeile if mandant is None else [mandant] + zeile
+
+    @staticmethod
+    def kopfzeile(mit_noten: bool = False, mit_mandant: bool = False):
+        """ Spaltenüberschriften passend zu serialisieren """
+        return (["Mandant"] if mit_mandant else []) + SPALTEN + (NOTEN_SPALTEN if mit_noten else [])
+
+    @staticmethod
+    @zeitmessung(converter_dauer, format="csv", richtung="deserialisieren")
+    def deserialisieren(csv_read, fehler: list | None = None):
+        """ Wandelt Daten aus CSV-Datei in Module um
+        Ist eine Fehlerliste übergeben, werden fehlerhafte Zeilen darin gesammelt und übersprungen, sonst wird abgebrochen """
         # Standardwerte setzen, welche nicht in der CSV-Datei stehen (müssen im Webinterface angepasst werden)
         start_datum = datetime.datetime.now() # Aktuelles Datum als Start-Datum setzen
         # Ziele auf 0 setzen
@@ -29,16 +87,16 @@ class StudiengangCSVConverter:
         # Wenn Daten erhalten dann Zeile für Zeile auslesen
         if csv_read:
             logging.info("Erstelle Studiengang aus CSV-Datei.")
-            for zeile in csv_read:
+            # Zeilennummer beginnt bei 2, Zeile 1 enthält die Spaltenüberschriften
+            for zeilennummer, zeile in enumerate(csv_read, start=2):
                 # Moduldaten zeilenweise einlesen und in einem Dictionary zwischenspeichern
-                sem_num = int(zeile['Semester'])
-                mod_titel = zeile['Modul']
-                mod_credits = int(zeile['ECTS'])
-                mod_pruefung_str = zeile['Pruefungsleistung']
-                # Prüfungsleistung erstellen
-                pruefungsleistung = Pruefungsleistung(mod_pruefung_str)
-                # Modul erstellen
-                modul = Modul(mod_titel, mod_credits, pruefungsleistung)
+                try:
+                    sem_num, modul = StudiengangCSVConverter.zeile_deserialisieren(zeile)
+                except (KeyError, TypeError, ValueError) as e:
+                    if fehler is None:
+                        raise
+                    fehler.append({"zeile": zeilennummer, "fehler": str(e)})
+                    continue
                 # Semester als Liste anlegen, wenn es nicht existiert
                 if sem_num not in semester_dict:
                     semester_dict[sem_num] = []
@@ -1,16 +1,15 @@
 import csv
+import io
+import itertools
 import logging
 import os
 
-from dotenv import dotenv_values
-
+from klassen.konfiguration import konfiguration
+from klassen.metriken import repository_dauer, zeitmessung
 from klassen.repository.csv_converter import StudiengangCSVConverter
+from klassen.repository.dateisperre import atomar_schreiben, dateisperre
 from klassen.repository.interface import IStudiengangRepository
 
-# Konfigurationsdatei laden
-config = dotenv_values("app.config")
-# Dateinamen der CSV-Datei aus Konfiguration lesen
-csv_filename = config["CSV_FILE"]
 # Konverter initialisieren
 converter = StudiengangCSVConverter()
 
@@ -18,22 +17,60 @@ converter = StudiengangCSVConverter()
 class StudiengangCSVData(IStudiengangRepository):
     """ Liest Daten aus CSV-Datei aus """
 
-    def speichern(self, studiengang):
-        """ Speichern in CSV-Datei. Nicht erlaubt. """
-        # Funktion ist nicht implementiert.
-        return NotImplemented
-
-    def laden(self):
-        """ Module aus CSV-Datei auslesen """
-        logging.info("Versuche CSV-Datei " + str(csv_filename) + " einzulesen.")
-        # Liste für Daten erstellen
-        data = []
-        if os.path.exists(csv_filename):
-            # Datei öffnen, wenn vorhanden
-            with open(csv_filename, newline='', encoding='utf-8') as csv_file:
-                # CSV Daten auslesen
-                csv_read = csv.DictReader(csv_file, delimiter="|")
-                # Daten in die Liste schreiben
-                data = list(csv_read)
+    def __init__(self, dateiname: str | None = None, mit_noten: bool = False):
+        # Dateiname aus Konfiguration, falls keiner übergeben wurde
+        self.dateiname = dateiname or konfiguration.aktuell.csv_datei
+        # Note und Anerkennung mitschreiben - ohne bleibt die Datei ein reiner Studienablaufplan
+        self.mit_noten = mit_noten
+
+    @zeitmessung(repository_dauer, speicher="csv", operation="speichern")
+    def speichern(self, studiengang, mandant=None):
+        """ Speichert die Module in der CSV-Datei, laden liest sie unverändert wieder ein - Titel, Startdatum und
+        Ziele stehen nicht im Studienablaufplan, der für alle Mandanten gleich ist """
+        # Inhalt außerhalb der Sperre aufbauen, dieselbe Formatierung wie beim gestreamten Export
+        zeilen = itertools.chain([converter.kopfzeile(self.mit_noten)],
+                                 converter.serialisieren(studiengang, self.mit_noten))
+        inhalt = "".join(self.text_bloecke(zeilen)).encode('utf-8')
+        # temporäre Datei mit fsync, dann in einem Schritt ersetzen
+        with dateisperre(self.dateiname):
+            atomar_schreiben(self.dateiname, inhalt)
+
+    @staticmethod
+    def text_bloecke(zeilen, zeilen_je_block: int = 256):
+        """ Formatiert Zeilen als CSV-Text und liefert ihn in Blöcken - für Antworten, die gestreamt werden,
+        ohne die ganze Datei im Speicher zu halten """
+        puffer = io.StringIO()
+        writer = csv.writer(puffer, delimiter="|")
+        anzahl = 0
+        for zeile in zeilen:
+            writer.writerow(zeile)
+            anzahl += 1
+            if anzahl == zeilen_je_block:
+                yield puffer.getvalue()
+                puffer.seek(0)
+                puffer.truncate()
+                anzahl = 0
+        if puffer.tell():
+            yield puffer.getvalue()
+
+    @staticmethod
+    def zeilen(dateiname):
+        """ Liefert die Zeilen einer CSV-Datei einzeln, ohne die ganze Datei in den Speicher zu laden """
+        # Datei öffnen und Zeile für Zeile weitergeben, die Datei bleibt geöffnet bis alle Zeilen gelesen sind
+        with open(dateiname, newline='', encoding='utf-8') as csv_file:
+            yield from csv.DictReader(csv_file, delimiter="|")
+
+    @staticmethod
+    def datei_einlesen(dateiname, fehler: list | None = None):
+        """ Erstellt einen Studiengang aus einer beliebigen CSV-Datei, fehlerhafte Zeilen landen optional in fehler """
+        return converter.deserialisieren(StudiengangCSVData.zeilen(dateiname), fehler)
+
+    @zeitmessung(repository_dauer, speicher="csv", operation="laden")
+    def laden(self, mandant=None):
+        """ Module aus CSV-Datei auslesen - der Studienablaufplan ist für alle Mandanten gleich """
+        logging.info("Versuche CSV-Datei %s einzulesen.", self.dateiname)
+        if os.path.exists(self.dateiname):
+            # Datei zeilenweise an den Konverter übergeben, wenn vorhanden
+            return self.datei_einlesen(self.dateiname)
         # Rückgabe der konvertierten Daten nach Aufruf des Konverters (Studiengang-Objekt)
-        return converter.deserialisieren(data)
\ No newline at end of file
+        return converter.deserialisieren([])
\ No newline at end of file
@@ -0,0 +1,60 @@
+import contextlib
+import os
+import threading
+
+try:
+    # fcntl gibt es nur auf Unix-Systemen
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Sperren innerhalb des Prozesses, zusätzlich zur Dateisperre - und einziger Schutz, wenn fcntl fehlt (Windows)
+_prozess_sperren = {}
+_prozess_sperren_sperre = threading.Lock()
+
+
+def _prozess_sperre(pfad):
+    """ Gibt die prozessweite Sperre für eine Datei zurück """
+    with _prozess_sperren_sperre:
+        return _prozess_sperren.setdefault(os.path.abspath(pfad), threading.Lock())
+
+
+@contextlib.contextmanager
+def dateisperre(pfad):
+    """ Exklusive, beratende Sperre für Schreibzugriffe auf eine Datei über eine daneben liegende .lock-Datei """
+    with _prozess_sperre(pfad):
+        if fcntl is None:
+            yield
+            return
+        # Sperrdatei wird nie gelöscht, damit alle Prozesse dieselbe Inode sperren
+        with open(pfad + ".lock", "a") as sperrdatei:
+            fcntl.flock(sperrdatei.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(sperrdatei.fileno(), fcntl.LOCK_UN)
+
+
+def atomar_schreiben(pfad, daten: bytes):
+    """ Schreibt in eine temporäre Datei, synchronisiert sie und ersetzt die Zieldatei in einem Schritt """
+    verzeichnis = os.path.dirname(os.path.abspath(pfad))
+    temp_pfad = f"{pfad}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp_pfad, "wb") as datei:
+            datei.write(daten)
+            datei.flush()
+            os.fsync(datei.fileno())
+        # os.replace ist atomar - Leser sehen entweder die alte oder die neue Datei, nie eine halb geschriebene
+        os.replace(temp_pfad, pfad)
+    except BaseException:
+        # temporäre Datei bei Fehlern nicht liegen lassen
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(temp_pfad)
+        raise
+    # Verzeichniseintrag synchronisieren, damit die Umbenennung einen Absturz übersteht (nicht unter Windows möglich)
+    if hasattr(os, "O_DIRECTORY"):
+        verzeichnis_fd = os.open(verzeichnis, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(verzeichnis_fd)
+        finally:
+            os.close(verzeichnis_fd)
@@ -1,14 +1,114 @@
 from abc import ABC, abstractmethod
 
+from klassen.domain.semester import Semester
 from klassen.domain.studiengang import Studiengang
 
 
+class VersionsKonflikt(Exception):
+    """ Der Studiengang wurde seit dem Laden von einer anderen Anfrage gespeichert """
+
+
 class IStudiengangRepository(ABC):
     """ Interface zum Speichern und Laden von Daten"""
     # Interface zum Speichern und Laden von Daten. Methoden müssen von Kindklasse überschrieben werden.
+    # mandant identifiziert den Studiengang eines Nutzers, None steht für den Standard-Studiengang
+    # speichern muss VersionsKonflikt auslösen, wenn studiengang.version nicht dem gespeicherten Stand entspricht
+    @abstractmethod
+    def speichern(self, studiengang: Studiengang, mandant: str | None = None) -> None:
+        pass
+    @abstractmethod
+    def laden(self, mandant: str | None = None):
+        pass
+
+    def lesen(self, mandant: str | None = None):
+        """ Gibt den Studiengang nur zum Lesen zurück - der Aufrufer darf ihn nicht verändern """
+        # Standardumsetzung über Laden - Repositories mit Cache geben den gespeicherten Stand ohne Kopie heraus
+        return self.laden(mandant)
+
+    def mandanten(self) -> list:
+        """ Gibt die Schlüssel aller gespeicherten Mandanten zurück """
+        # Repositories ohne Mandanten-Verzeichnis (z.B. CSV) kennen keine Mandanten
+        return []
+
+    def version(self, mandant: str | None = None) -> int | None:
+        """ Gibt die gespeicherte Version zurück - None, wenn kein Studiengang existiert """
+        # Standardumsetzung über Laden - Repositories können die Version günstiger ermitteln
+        studiengang = self.laden(mandant)
+        return None if studiengang is None else studiengang.version
+
+    def speichern_mehrere(self, eintraege: list) -> dict:
+        """ Speichert mehrere (mandant, studiengang)-Paare und gibt die Fehler je Mandant zurück """
+        # Standardumsetzung speichert einzeln - Repositories können einen Stapel gemeinsam schreiben
+        fehler = {}
+        for mandant, studiengang in eintraege:
+            try:
+                self.speichern(studiengang, mandant)
+            # Konflikt (Mandant existiert bereits) oder ungültiger Mandant
+            except (VersionsKonflikt, ValueError) as e:
+                fehler[mandant] = str(e)
+        return fehler
+
+    def modul_aktualisieren(self, semester_nummer: int, index: int, aenderungen: dict, version: int | None = None,
+                            mandant: str | None = None) -> int:
+        """ Ändert einzelne Felder eines Moduls und gibt die neue Version zurück """
+        # Standardumsetzung über Laden und Speichern - Repositories können nur die Änderung schreiben
+        studiengang = self.laden(mandant)
+        if studiengang is None:
+            raise LookupError("Kein Studiengang vorhanden.")
+        if version is not None and version != studiengang.version:
+            raise VersionsKonflikt(f"Version {version} ist veraltet, gespeichert ist Version {studiengang.version}.")
+        studiengang.hole_modul(semester_nummer, index).aendern(aenderungen)
+        self.speichern(studiengang, mandant)
+        return studiengang.version
+
+    def kopf_laden(self, mandant: str | None = None):
+        """ Gibt den Kopf (Studiengang ohne Semester) und je Semester (Nummer, Anzahl Module) zurück - None ohne Studiengang """
+        # Standardumsetzung über Laden - Repositories können nur den Kopf lesen
+        studiengang = self.laden(mandant)
+        if studiengang is None:
+            return None
+        return studiengang.kopf_kopieren(), [(semester.nummer, len(semester.module)) for semester in studiengang.semester]
+
+    def semester_laden(self, nummer: int, start: int = 0, anzahl: int | None = None,
+                       mandant: str | None = None) -> Semester | None:
+        """ Gibt die Module start bis start+anzahl eines Semesters zurück - None ohne Studiengang """
+        # Standardumsetzung über Laden - Repositories können nur die Module des Semesters lesen
+        studiengang = self.laden(mandant)
+        if studiengang is None:
+            return None
+        return studiengang.hole_semester(nummer, start, anzahl)
+
+    def semester_speichern(self, kopf: Studiengang, nummer: int, module: list, start: int = 0,
+                           anzahl: int | None = None, mandant: str | None = None) -> int:
+        """ Speichert den Kopf und ersetzt die Module start bis start+anzahl eines Semesters, die übrigen Semester
+        bleiben unverändert - kopf.version ist der Stand, auf dem die Änderung basiert. Gibt die neue Version zurück """
+        # Standardumsetzung über Laden und Speichern - Repositories können nur das Semester schreiben
+        studiengang = self.laden(mandant)
+        if studiengang is None:
+            raise LookupError("Kein Studiengang vorhanden.")
+        if kopf.version != studiengang.version:
+            raise VersionsKonflikt(f"Version {kopf.version} ist veraltet, gespeichert ist Version {studiengang.version}.")
+        studiengang.kopf_uebernehmen(kopf)
+        studiengang.module_ersetzen(nummer, module, start, anzahl)
+        self.speichern(studiengang, mandant)
+        return studiengang.version
+
+
+class IAsyncStudiengangRepository(ABC):
+    """ Asynchrones Interface zum Speichern und Laden von Daten - laden und speichern sind Coroutinen """
+    # gleiche Bedeutung von mandant und VersionsKonflikt wie bei IStudiengangRepository
     @abstractmethod
-    def speichern(self, studiengang: Studiengang) -> None:
+    async def speichern(self, studiengang: Studiengang, mandant: str | None = None) -> None:
         pass
     @abstractmethod
-    def laden(self):
+    async def laden(self, mandant: str | None = None):
         pass
+
+    async def lesen(self, mandant: str | None = None):
+        """ Gibt den Studiengang nur zum Lesen zurück - der Aufrufer darf ihn nicht verändern """
+        return await self.laden(mandant)
+
+    async def version(self, mandant: str | None = None) -> int | None:
+        """ Gibt die gespeicherte Version zurück - None, wenn kein Studiengang existiert """
+        studiengang = await self.laden(mandant)
+        return None if studiengang is None else studiengang.version
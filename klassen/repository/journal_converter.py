@@ -0,0 +1,129 @@
+import datetime
+
+from klassen.domain.semester import Semester
+from klassen.domain.studiengang import Studiengang
+from klassen.repository.json_converter import StudiengangJSONConverter
+
+# Felder eines Moduls, die als Einzeländerung im Journal stehen können
+MODUL_FELDER = ("titel", "credits", "pruefungsart", "note", "anerkannt")
+
+
+class StudiengangJournalConverter:
+    """ Ermittelt Änderungen zwischen zwei Ständen eines Studiengangs und spielt sie wieder ein """
+
+    @staticmethod
+    def _modul_felder(modul):
+        """ Gibt die vergleichbaren Felder eines Moduls zurück """
+        pl = modul.pruefungsleistung
+        return {"titel": modul.titel, "credits": modul.credits, "pruefungsart": pl.pruefungsart,
+                "note": pl.note, "anerkannt": pl.modul_anerkannt}
+
+    @staticmethod
+    def _modul_aenderungen(nummer, index, alt, neu):
+        """ Einzeländerung eines Moduls, nur geänderte Felder - None, wenn das Modul gleich geblieben ist """
+        alte_felder = StudiengangJournalConverter._modul_felder(alt)
+        neue_felder = StudiengangJournalConverter._modul_felder(neu)
+        felder = {feld: wert for feld, wert in neue_felder.items() if alte_felder[feld] != wert}
+        if not felder:
+            return None
+        return {"op": "modul", "semester": nummer, "index": index, "felder": felder}
+
+    @staticmethod
+    def _semester_aenderungen(nummer, alte_module, neue_module):
+        """ Vergleicht die Module eines Semesters und gibt die Änderungen als Liste zurück """
+        alte_titel = [modul.titel for modul in alte_module]
+        neue_titel = [modul.titel for modul in neue_module]
+        aenderungen = []
+        # gleiche Anzahl Module - nur Felder vergleichen
+        if len(alte_module) == len(neue_module):
+            paare = zip(range(len(neue_module)), alte_module, neue_module)
+        # Module wurden am Ende hinzugefügt
+        elif len(neue_module) > len(alte_module) and neue_titel[:len(alte_titel)] == alte_titel:
+            paare = zip(range(len(alte_module)), alte_module, neue_module)
+            for modul in neue_module[len(alte_module):]:
+                aenderungen.append({"op": "modul_neu", "semester": nummer,
+                                    "modul": StudiengangJSONConverter.modul_serialisieren(modul)})
+        # genau ein Modul wurde entfernt
+        elif len(neue_module) == len(alte_module) - 1 and any(
+                alte_titel[:i] + alte_titel[i + 1:] == neue_titel for i in range(len(alte_titel))):
+            entfernt = next(i for i in range(len(alte_titel)) if alte_titel[:i] + alte_titel[i + 1:] == neue_titel)
+            aenderungen.append({"op": "modul_entfernt", "semester": nummer, "index": entfernt})
+            paare = zip(range(len(neue_module)), alte_module[:entfernt] + alte_module[entfernt + 1:], neue_module)
+        # alles andere (z.B. umsortiert) - Semester vollständig ersetzen
+        else:
+            return [{"op": "semester", "nummer": nummer,
+                     "module": [StudiengangJSONConverter.modul_serialisieren(modul) for modul in neue_module]}]
+        for index, alt, neu in paare:
+            aenderung = StudiengangJournalConverter._modul_aenderungen(nummer, index, alt, neu)
+            if aenderung is not None:
+                aenderungen.append(aenderung)
+        return aenderungen
+
+    @staticmethod
+    def aenderungen_ermitteln(alt: Studiengang, neu: Studiengang):
+        """ Gibt die Liste der Änderungen zurück, die aus dem alten den neuen Stand machen """
+        aenderungen = []
+        # Titel und Studienbeginn
+        if alt.titel != neu.titel or alt.start_datum != neu.start_datum:
+            aenderungen.append({"op": "kopf", "titel": neu.titel, "start_datum": neu.start_datum.isoformat()})
+        # Ziele
+        alte_ziele = StudiengangJSONConverter.ziele_serialisieren(alt.ziele)
+        neue_ziele = StudiengangJSONConverter.ziele_serialisieren(neu.ziele)
+        if alte_ziele != neue_ziele:
+            aenderungen.append({"op": "ziele", "ziele": neue_ziele})
+        # Semester über ihre Nummer vergleichen
+        alte_semester = {semester.nummer: semester for semester in alt.semester}
+        neue_semester = {semester.nummer: semester for semester in neu.semester}
+        for nummer in sorted(alte_semester.keys() | neue_semester.keys()):
+            if nummer not in neue_semester:
+                aenderungen.append({"op": "semester", "nummer": nummer, "module": None})
+            elif nummer not in alte_semester:
+                aenderungen.append({"op": "semester", "nummer": nummer, "module": [
+                    StudiengangJSONConverter.modul_serialisieren(modul) for modul in neue_semester[nummer].module]})
+            # von einer Teilkopie geteilte Semester sind unverändert
+            elif alte_semester[nummer] is not neue_semester[nummer]:
+                aenderungen.extend(StudiengangJournalConverter._semester_aenderungen(
+                    nummer, alte_semester[nummer].module, neue_semester[nummer].module))
+        return aenderungen
+
+    @staticmethod
+    def _semester(studiengang: Studiengang, nummer: int):
+        """ Sucht das Semester mit der Nummer und legt es bei Bedarf sortiert an """
+        for position, semester in enumerate(studiengang.semester):
+            if semester.nummer == nummer:
+                return semester
+            if semester.nummer > nummer:
+                neues_semester = Semester(nummer, [])
+                studiengang.semester.insert(position, neues_semester)
+                return neues_semester
+        neues_semester = Semester(nummer, [])
+        studiengang.semester.append(neues_semester)
+        return neues_semester
+
+    @staticmethod
+    def aenderungen_anwenden(studiengang: Studiengang, aenderungen):
+        """ Spielt eine Liste von Änderungen auf einen Studiengang ein """
+        for aenderung in aenderungen:
+            op = aenderung["op"]
+            if op == "kopf":
+                studiengang.titel = aenderung["titel"]
+                studiengang.start_datum = datetime.datetime.fromisoformat(aenderung["start_datum"])
+            elif op == "ziele":
+                studiengang.ziele = StudiengangJSONConverter.ziele_deserialisieren(aenderung["ziele"])
+            elif op == "modul":
+                studiengang.hole_modul(aenderung["semester"], aenderung["index"]).aendern(aenderung["felder"])
+            elif op == "modul_neu":
+                semester = StudiengangJournalConverter._semester(studiengang, aenderung["semester"])
+                semester.module.append(StudiengangJSONConverter.modul_deserialisieren(aenderung["modul"]))
+            elif op == "modul_entfernt":
+                semester = StudiengangJournalConverter._semester(studiengang, aenderung["semester"])
+                del semester.module[aenderung["index"]]
+            elif op == "semester":
+                semester = StudiengangJournalConverter._semester(studiengang, aenderung["nummer"])
+                if aenderung["module"] is None:
+                    studiengang.semester.remove(semester)
+                else:
+                    semester.module = [StudiengangJSONConverter.modul_deserialisieren(mod_data)
+                                       for mod_data in aenderung["module"]]
+            else:
+                raise ValueError(f"Unbekannte Journal-Operation: {op}")
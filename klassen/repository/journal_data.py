@@ -0,0 +1,185 @@
+import datetime
+import logging
+import os
+import threading
+
+from flask import json
+
+from klassen.domain.studiengang import Studiengang
+from klassen.konfiguration import konfiguration
+from klassen.repository.dateisperre import dateisperre
+from klassen.repository.journal_converter import StudiengangJournalConverter
+from klassen.repository.json_data import StudiengangJSONData
+
+# Konverter initialisieren
+journal_converter = StudiengangJournalConverter()
+
+
+class StudiengangJournalData(StudiengangJSONData):
+    """ JSON-Speicher mit Änderungsjournal: Snapshot (data.json) plus angehängte Änderungen (data.json.journal) """
+
+    def __init__(self, max_bytes: int | None = None, format: str | None = None, dateiname: str | None = None,
+                 cache_groesse: int | None = None, archive: int | None = None):
+        super().__init__(format, dateiname, cache_groesse)
+        # ab dieser Größe des Journals in Bytes wird es in einen neuen Snapshot eingearbeitet
+        self.max_bytes = konfiguration.aktuell.journal_max_bytes if max_bytes is None else max_bytes
+        # so viele verdichtete Journale bleiben erhalten, ältere werden beim Verdichten gelöscht
+        self.archive = konfiguration.aktuell.journal_archive if archive is None else archive
+        # Pfade, für die gerade eine Verdichtung im Hintergrund läuft
+        self._verdichtungen = set()
+        self._verdichtungen_sperre = threading.Lock()
+
+    @staticmethod
+    def _journalpfad(pfad):
+        """ Dateiname des Journals zum Snapshot """
+        return pfad + ".journal"
+
+    def _dateischluessel(self, pfad):
+        """ Schlüssel aus Snapshot und Journal - None, wenn noch kein Snapshot existiert """
+        snapshot = StudiengangJSONData._dateischluessel(pfad)
+        if snapshot is None:
+            return None
+        return snapshot, StudiengangJSONData._dateischluessel(self._journalpfad(pfad))
+
+    def _journal_lesen(self, pfad):
+        """ Liest alle vollständigen Einträge des Journals """
+        try:
+            # binär lesen - eine abgebrochene Zeile kann mitten in einem UTF-8-Zeichen enden
+            with open(self._journalpfad(pfad), 'rb') as journal_file:
+                zeilen = journal_file.readlines()
+        except FileNotFoundError:
+            return []
+        eintraege = []
+        for nummer, zeile in enumerate(zeilen, 1):
+            # eine noch nicht vollständig geschriebene letzte Zeile wird ignoriert
+            if not zeile.endswith(b"\n"):
+                break
+            try:
+                eintraege.append(json.loads(zeile.decode('utf-8')))
+            except ValueError as e:
+                # spätere Einträge bauen auf diesem auf - nur den Stand bis zur beschädigten Zeile verwenden
+                logging.error("Journal %s: Zeile %d nicht lesbar, folgende Einträge werden ignoriert: %s",
+                              self._journalpfad(pfad), nummer, e)
+                break
+        return eintraege
+
+    def _einlesen(self, pfad):
+        """ Lädt den Snapshot und spielt die neueren Einträge des Journals ein """
+        # Journal vor dem Snapshot lesen: eine gleichzeitige Verdichtung schreibt zuerst den Snapshot
+        # und verschiebt danach das Journal, so fehlt nie ein Eintrag
+        eintraege = self._journal_lesen(pfad)
+        studiengang = super()._einlesen(pfad)
+        for eintrag in eintraege:
+            # Einträge, die bereits im Snapshot enthalten sind, überspringen
+            if eintrag["version"] <= studiengang.version:
+                continue
+            journal_converter.aenderungen_anwenden(studiengang, eintrag["aenderungen"])
+            studiengang.version = eintrag["version"]
+        return studiengang
+
+    def _anhaengen(self, pfad, version: int, aenderungen: list):
+        """ Hängt eine gespeicherte Version als eine Zeile an das Journal an """
+        eintrag = {"version": version, "zeit": datetime.datetime.now().isoformat(timespec="seconds"),
+                   "aenderungen": aenderungen}
+        zeile = (json.dumps(eintrag, ensure_ascii=False) + "\n").encode('utf-8')
+        # ein einzelner write-Aufruf im Anhängemodus, Leser sehen die Zeile ganz oder gar nicht vollständig
+        deskriptor = os.open(self._journalpfad(pfad), os.O_RDWR | os.O_APPEND | os.O_CREAT | getattr(os, "O_BINARY", 0),
+                             0o644)
+        try:
+            # Rest eines abgebrochenen Schreibvorgangs entfernen, sonst würde die neue Zeile an ihn angehängt
+            self._unvollstaendige_zeile_entfernen(deskriptor, pfad)
+            os.write(deskriptor, zeile)
+            os.fsync(deskriptor)
+        finally:
+            os.close(deskriptor)
+        # Verdichtung anstoßen, sobald das Journal zu groß wird
+        if os.path.getsize(self._journalpfad(pfad)) > self.max_bytes:
+            self._verdichtung_starten(pfad)
+
+    def _unvollstaendige_zeile_entfernen(self, deskriptor: int, pfad):
+        """ Kürzt das Journal auf die letzte vollständige Zeile - nur unter der Dateisperre aufrufen """
+        groesse = os.fstat(deskriptor).st_size
+        if groesse == 0:
+            return
+        os.lseek(deskriptor, groesse - 1, os.SEEK_SET)
+        if os.read(deskriptor, 1) == b"\n":
+            return
+        # rückwärts in Blöcken nach dem letzten Zeilenende suchen
+        ende, neue_groesse = groesse - 1, 0
+        while ende > 0:
+            start = max(ende - 4096, 0)
+            os.lseek(deskriptor, start, os.SEEK_SET)
+            position = os.read(deskriptor, ende - start).rfind(b"\n")
+            if position >= 0:
+                neue_groesse = start + position + 1
+                break
+            ende = start
+        logging.warning("Journal %s: unvollständige letzte Zeile entfernt (%d Bytes).", self._journalpfad(pfad),
+                        groesse - neue_groesse)
+        os.ftruncate(deskriptor, neue_groesse)
+
+    def _schreiben(self, pfad, alter_stand: Studiengang | None, studiengang: Studiengang, aenderungen: list | None = None):
+        """ Schreibt nur die Änderungen gegenüber dem alten Stand - ohne Snapshot wird vollständig geschrieben """
+        if alter_stand is None:
+            super()._schreiben(pfad, alter_stand, studiengang)
+            return
+        # bekannte Änderungen (z.B. ein einzelnes Modul) direkt übernehmen, sonst durch Vergleich ermitteln
+        if aenderungen is None:
+            aenderungen = journal_converter.aenderungen_ermitteln(alter_stand, studiengang)
+        self._anhaengen(pfad, studiengang.version, aenderungen)
+
+    def _verdichtung_starten(self, pfad):
+        """ Startet die Verdichtung im Hintergrund, höchstens eine gleichzeitig pro Datei """
+        with self._verdichtungen_sperre:
+            if pfad in self._verdichtungen:
+                return
+            self._verdichtungen.add(pfad)
+        threading.Thread(target=self._verdichten_im_hintergrund, args=(pfad,), name="journal-verdichtung",
+                         daemon=True).start()
+
+    def _verdichten_im_hintergrund(self, pfad):
+        """ Führt die Verdichtung aus und protokolliert Fehler, statt den Thread abstürzen zu lassen """
+        try:
+            self.verdichten(pfad)
+        except Exception as e:
+            logging.error("Verdichtung des Journals %s fehlgeschlagen: %s", pfad, e)
+        finally:
+            with self._verdichtungen_sperre:
+                self._verdichtungen.discard(pfad)
+
+    def _archive_aufraeumen(self, pfad):
+        """ Löscht alle verdichteten Journale bis auf die neuesten - nur unter der Dateisperre aufrufen """
+        journalpfad = self._journalpfad(pfad)
+        verzeichnis = os.path.dirname(journalpfad) or "."
+        praefix = os.path.basename(journalpfad) + "."
+        # Archive heißen <journal>.<version>, sortiert nach Version
+        versionen = sorted(int(name[len(praefix):]) for name in os.listdir(verzeichnis)
+                           if name.startswith(praefix) and name[len(praefix):].isdigit())
+        veraltet = versionen[:-self.archive] if self.archive > 0 else versionen
+        for version in veraltet:
+            try:
+                os.remove(f"{journalpfad}.{version}")
+            except FileNotFoundError:
+                pass
+        if veraltet:
+            logging.info("Journal %s: %d ältere Archive gelöscht, %d behalten.", journalpfad, len(veraltet),
+                         len(versionen) - len(veraltet))
+
+    def verdichten(self, pfad):
+        """ Schreibt den aktuellen Stand als neuen Snapshot und archiviert das eingearbeitete Journal """
+        journalpfad = self._journalpfad(pfad)
+        # Schreiber warten während der Verdichtung, Leser laufen ungehindert weiter
+        with dateisperre(pfad):
+            studiengang = self._aktueller_stand(pfad)
+            if studiengang is None or not os.path.exists(journalpfad):
+                return
+            # erst den Snapshot schreiben, dann das Journal verschieben - bei einem Absturz dazwischen
+            # werden die bereits enthaltenen Einträge beim Laden anhand der Version übersprungen
+            StudiengangJSONData._schreiben(self, pfad, None, studiengang)
+            # das eingearbeitete Journal bleibt als Änderungsprotokoll erhalten, nur die neuesten Archive
+            os.replace(journalpfad, f"{journalpfad}.{studiengang.version}")
+            self._archive_aufraeumen(pfad)
+            schluessel = self._dateischluessel(pfad)
+            with self._cache_sperre:
+                self._cache_ablegen(pfad, schluessel, studiengang)
+        logging.info("Journal %s bis Version %d verdichtet.", journalpfad, studiengang.version)
@@ -1,85 +1,102 @@
 import datetime
 import logging
+import sys
 
 from klassen.domain.modul import Modul
 from klassen.domain.pruefungsleistung import Pruefungsleistung
 from klassen.domain.semester import Semester
 from klassen.domain.studiengang import Studiengang
-from klassen.domain.ziel_note import NotenZiel
-from klassen.domain.ziel_zeit import ZeitZiel
+from klassen.domain.ziele import ZIELTYPEN
+from klassen.metriken import converter_dauer, zeitmessung
 
 
 class StudiengangJSONConverter:
     """ Konvertiert JSON-Daten in Dictionary und vice-versa """
     @staticmethod
+    def modul_deserialisieren(mod_data):
+        """ Erstellt ein Modul samt Prüfungsleistung aus den JSON-Daten eines Moduls """
+        # Prüfungsleistung erstellen und Daten hinzufügen
+        pruefungsleistung = Pruefungsleistung(mod_data['pruefungsleistung'])
+        # Prüfung, ob eine Note eingetragen ist
+        if mod_data['note'] is not None:
+            pruefungsleistung.setze_note(float(mod_data['note'])) # Wenn eine Note in den JSON-Daten eingetragen ist, wird diese in float gewandelt und gesetzt
+        else:
+            pruefungsleistung.setze_note(mod_data['note']) # Wenn keine Note vorhanden ist, None übernehmen und setzen
+        # festlegen, ob das Modul anerkannt ist
+        pruefungsleistung.setze_anerkannt(bool(mod_data['anerkannt']))
+        # Modul aus JSON-Daten und Prüfungsleistung erstellen
+        # Modultitel internieren, gleiche Titel vieler Studiengänge teilen sich einen String
+        return Modul(sys.intern(mod_data['titel']), int(mod_data['ects']), pruefungsleistung)
+
+    @staticmethod
+    def ziele_deserialisieren(ziele_daten):
+        """ Erstellt das Dictionary der Ziele aus den JSON-Daten """
+        ziele = {}
+        for typ, klasse in ZIELTYPEN.items():
+            # Pflichtziele müssen vorhanden sein (KeyError wie bisher), optionale Ziele nur, wenn gesetzt
+            if klasse.pflicht or klasse.schluessel in ziele_daten:
+                ziele[typ] = klasse.aus_wert(ziele_daten[klasse.schluessel])
+        return ziele
+
+    @staticmethod
+    @zeitmessung(converter_dauer, format="json", richtung="deserialisieren")
     def deserialisieren(daten):
         """ Deserialisieren der JSON-Daten. Bekommt Daten und erstellt einen Studiengang. """
         # Semester Liste erstellen
         semester_liste = []
         # Durch Semester-Liste aus JSON Daten iterieren
         for sem_data in daten['semester']:
-            # Modul-Liste erstellen
-            modul_liste = []
-            # Durch Modul-Liste innerhalb der Semester-Liste aus JSON Daten iterieren
-            for mod_data in sem_data['module']:
-                # Objekte anlegen und an Modul-Liste anhängen
-                # Prüfungsleistung erstellen und Daten hinzufügen
-                pruefungsleistung = Pruefungsleistung(mod_data['pruefungsleistung'])
-                # Prüfung, ob eine Note eingetragen ist
-                if mod_data['note'] is not None:
-                    pruefungsleistung.setze_note(float(mod_data['note'])) # Wenn eine Note in den JSON-Daten eingetragen ist, wird diese in float gewandelt und gesetzt
-                else:
-                    pruefungsleistung.setze_note(mod_data['note']) # Wenn keine Note vorhanden ist, None übernehmen und setzen
-                # festlegen, ob das Modul anerkannt ist
-                pruefungsleistung.setze_anerkannt(bool(mod_data['anerkannt']))
-                # Modul aus JSON-Daten und Prüfungsleistung erstellen
-                mod = Modul(mod_data['titel'], int(mod_data['ects']), pruefungsleistung)
-                # Modul an Modul-Liste anhängen
-                modul_liste.append(mod)
+            # Durch Modul-Liste innerhalb der Semester-Liste aus JSON Daten iterieren, Objekte anlegen und an Modul-Liste anhängen
+            modul_liste = [StudiengangJSONConverter.modul_deserialisieren(mod_data) for mod_data in sem_data['module']]
             # Modul-Liste an Semester anhängen
             semester_liste.append(Semester(sem_data['nummer'], modul_liste))
         # Start Datum lesen konvertieren
         start_datum = datetime.datetime.fromisoformat(daten['start_datum'])
         # Ziel-Daten lesen, Standard Werte nutzen, falls keine vorhanden und in ziele_dict eintragen
         ziele_daten = daten.get("ziele", {"zeit_tage": 2190, "noten_schnitt": 2.5})
-        ziele_dict = {
-            "zeit": ZeitZiel(int(ziele_daten["zeit_tage"])),
-            "note": NotenZiel(float(ziele_daten["noten_schnitt"]))
-        }
+        ziele_dict = StudiengangJSONConverter.ziele_deserialisieren(ziele_daten)
         logging.info("Studiengang aus JSON-Datei geladen.")
         # Studiengang erstellen und zurückgeben
-        return Studiengang(daten['titel'],start_datum, semester_liste, ziele_dict)
+        # Dateien aus älteren Versionen haben noch keine Versionsnummer
+        return Studiengang(daten['titel'],start_datum, semester_liste, ziele_dict, int(daten.get('version', 0)))
+
+    @staticmethod
+    def modul_serialisieren(modul: Modul):
+        """ Serialisiert ein Modul samt Prüfungsleistung zu einem Dictionary """
+        return {
+            "titel": modul.titel,
+            "ects": modul.credits,
+            "note": modul.pruefungsleistung.note,
+            "anerkannt": modul.pruefungsleistung.modul_anerkannt,
+            "pruefungsleistung": modul.pruefungsleistung.pruefungsart
+        }
+
+    @staticmethod
+    def ziele_serialisieren(ziele: dict):
+        """ Serialisiert das Dictionary der Ziele """
+        # Schlüssel aus dem Register der Zieltypen, z.B. "zeit_tage" und "noten_schnitt"
+        return {ZIELTYPEN[typ].schluessel: ziel.wert for typ, ziel in ziele.items()}
 
     @staticmethod
+    @zeitmessung(converter_dauer, format="json", richtung="serialisieren")
     def serialisieren(studiengang: Studiengang):
         """ Serialisiert einen Studiengang zu einem Dictionary zur Speicherung als JSON """
         # JSON-String als Dictionary vorbereiten, Titel, Start Datum, Ziele und leere Semester Liste eintragen
         json_data = {
+            "version": studiengang.version,
             "titel": studiengang.titel,
             "start_datum": studiengang.start_datum.isoformat(),
-            "ziele": {
-                "zeit_tage": studiengang.ziele['zeit'].zeitziel_in_tagen,
-                "noten_schnitt": studiengang.ziele['note'].notendurchschnitt,
-            },
+            "ziele": StudiengangJSONConverter.ziele_serialisieren(studiengang.ziele),
             "semester": []
         }
         # Modul- und Semesterdaten in das Dictionary schreiben, dazu über Semester aus Studiengang Objekt iterieren
         for semester in studiengang.semester:
-            # Daten aus Semester in Dictionary schreiben, Semester Nummer und leere Liste für Module
-            semester_data = {"nummer": semester.nummer, "module": []}
-            # Über Module aus dem Semester Objekt iterieren
-            for modul in semester.module:
-                # Dictionary erstellen und mit Daten des Moduls füllen
-                modul_data = {
-                    "titel": modul.titel,
-                    "ects": modul.credits,
-                    "note": modul.pruefungsleistung.note,
-                    "anerkannt": modul.pruefungsleistung.modul_anerkannt,
-                    "pruefungsleistung": modul.pruefungsleistung.pruefungsart
-                }
-                # Modul Daten an das Semester Dictionary anhängen
-                semester_data["module"].append(modul_data)
+            # Daten aus Semester in Dictionary schreiben, Semester Nummer und Liste der Modul-Daten
+            semester_data = {
+                "nummer": semester.nummer,
+                "module": [StudiengangJSONConverter.modul_serialisieren(modul) for modul in semester.module]
+            }
             # Semester an das Dictionary anhängen
             json_data["semester"].append(semester_data)
         # JSON-String in Datei schreiben
-        return json_data
\ No newline at end of file
+        return json_data
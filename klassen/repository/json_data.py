@@ -1,41 +1,239 @@
-import logging
-import os
-
-from dotenv import dotenv_values
-from flask import json
-
-from klassen.domain.studiengang import Studiengang
-from klassen.repository.interface import IStudiengangRepository
-from klassen.repository.json_converter import StudiengangJSONConverter
-# Konfigurationsdatei laden
-config = dotenv_values("app.config")
-# Dateinamen der JSON-Datei aus Konfiguration lesen
-json_filename = config["JSON_FILE"]
-# Konverter initialisieren
-converter = StudiengangJSONConverter()
-
-
-class StudiengangJSONData(IStudiengangRepository):
-    """ Übernimmt das Speichern und Laden einer JSON-Datei """
-
-    def speichern(self, studiengang: Studiengang):
-        """ Speichert den serialisierten Studiengang in eine Datei """
-        # Konverter aufrufen und Rückgabe-Daten in data speichern
-        data = converter.serialisieren(studiengang)
-        # JSON-Datei öffnen, wenn nicht vorhanden, erzeugen
-        with open(json_filename, 'w', encoding='utf-8') as json_file:
-            # Daten mit der Funktion json.dump() in die Datei schreiben.
-            json.dump(data, json_file, indent=4, ensure_ascii=False) # indent=4 -> bessere lesbarkeit, ensure_ascii=False -> keine Unicode Konvertierung
-            logging.info("Studiengang in JSON-Datei gespeichert.")
-
-    def laden(self):
-        """ Lädt Studiengang aus einer JSON-Datei """
-        # Prüfen ob JSON-Datei existiert, wenn nicht abbrechen und None zurückgeben
-        if not os.path.exists(json_filename):
-            return None
-        # JSON-Datei laden und inhalt in daten speichern
-        with open(json_filename, 'r', encoding='utf-8') as json_file:
-            daten = json.load(json_file)
-        # Konverter zum deserialiseren aufrufen und Rückgabe der von Konverter erhaltenen Daten (Studiengang Objekt)
-        return converter.deserialisieren(daten)
-
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from flask import json
+
+from klassen.domain.studiengang import Studiengang
+from klassen.konfiguration import konfiguration
+from klassen.metriken import repository_dauer, zeitmessung
+from klassen.repository.binaer_converter import StudiengangBinaerConverter
+from klassen.repository.dateisperre import atomar_schreiben, dateisperre
+from klassen.repository.interface import IStudiengangRepository, VersionsKonflikt
+from klassen.repository.json_converter import StudiengangJSONConverter
+# Konverter initialisieren
+converter = StudiengangJSONConverter()
+binaer_converter = StudiengangBinaerConverter()
+# erlaubte Zeichen für Mandanten-Schlüssel, da diese Teil des Dateinamens werden
+mandant_muster = re.compile(r"[A-Za-z0-9][A-Za-z0-9_.-]{0,127}")
+
+
+class StudiengangJSONData(IStudiengangRepository):
+    """ Übernimmt das Speichern und Laden einer JSON-Datei """
+
+    def __init__(self, format: str | None = None, dateiname: str | None = None, cache_groesse: int | None = None):
+        # Dateiname und Format, in dem Snapshots geschrieben werden: json (lesbar) oder binaer (kompakt) - gelesen werden
+        # immer beide; ohne Angabe aus der Konfiguration
+        self.dateiname = dateiname or konfiguration.aktuell.json_datei
+        self.format = konfiguration.aktuell.snapshot_format if format is None else format
+        if self.format not in ("json", "binaer"):
+            raise ValueError(f"Unbekanntes Snapshot-Format: {self.format}")
+        # Cache der geladenen Studiengänge: Dateipfad -> (Dateischlüssel, Studiengang), Reihenfolge entspricht der
+        # letzten Nutzung - bei vielen Mandanten werden die am längsten nicht genutzten verdrängt (LRU)
+        self._cache = OrderedDict()
+        self.cache_groesse = konfiguration.aktuell.repository_cache_groesse if cache_groesse is None else cache_groesse
+        # schützt den Cache, wenn mehrere Threads gleichzeitig laden oder speichern
+        self._cache_sperre = threading.Lock()
+        # Zähler für Cache-Treffer und -Fehlschläge
+        self.cache_treffer = 0
+        self.cache_fehlschlaege = 0
+
+    @staticmethod
+    def _dateischluessel(pfad):
+        """ Ermittelt Änderungszeit, Größe und Inode der Datei - None, wenn die Datei nicht existiert """
+        try:
+            status = os.stat(pfad)
+        except FileNotFoundError:
+            return None
+        return status.st_mtime_ns, status.st_size, status.st_ino
+
+    def _dateipfad(self, mandant: str | None):
+        """ Ermittelt den Dateinamen des Mandanten - ohne Mandant wird die Datei aus der Konfiguration genutzt """
+        if mandant is None:
+            return self.dateiname
+        # ungültige Schlüssel ablehnen, damit kein Pfad außerhalb des Datenverzeichnisses entstehen kann
+        if not mandant_muster.fullmatch(mandant):
+            raise ValueError(f"Ungültiger Mandant: {mandant!r}")
+        # aus data.json wird z.B. data_mandant.json
+        stamm, endung = os.path.splitext(self.dateiname)
+        return f"{stamm}_{mandant}{endung}"
+
+    def cache_statistik(self):
+        """ Gibt die Zähler des Caches zurück """
+        return {"treffer": self.cache_treffer, "fehlschlaege": self.cache_fehlschlaege, "eintraege": len(self._cache)}
+
+    def cache_leeren(self):
+        """ Verwirft alle zwischengespeicherten Studiengänge - das nächste Laden liest wieder von der Platte """
+        with self._cache_sperre:
+            self._cache.clear()
+
+    def _cache_ablegen(self, pfad, schluessel, studiengang: Studiengang):
+        """ Legt einen Stand im Cache ab und verdrängt bei Bedarf den ältesten Eintrag - nur mit _cache_sperre aufrufen """
+        self._cache[pfad] = (schluessel, studiengang)
+        self._cache.move_to_end(pfad)
+        while len(self._cache) > self.cache_groesse:
+            self._cache.popitem(last=False)
+
+    @staticmethod
+    def datei_einlesen(pfad):
+        """ Liest einen Snapshot im JSON- oder Binärformat ein, das Format wird an der Kennung am Dateianfang erkannt """
+        with open(pfad, 'rb') as snapshot_file:
+            inhalt = snapshot_file.read()
+        if binaer_converter.ist_binaer(inhalt):
+            return binaer_converter.deserialisieren(inhalt)
+        # JSON-Daten laden und Konverter zum deserialiseren aufrufen, Rückgabe ist ein Studiengang Objekt
+        return converter.deserialisieren(json.loads(inhalt.decode('utf-8')))
+
+    def _einlesen(self, pfad):
+        """ Liest die Datei ein und gibt den Studiengang zurück """
+        return self.datei_einlesen(pfad)
+
+    def _schreiben(self, pfad, alter_stand: Studiengang | None, studiengang: Studiengang, aenderungen: list | None = None):
+        """ Schreibt den Studiengang vollständig - studiengang.version ist bereits die neue Version, die Liste der
+        Änderungen (falls bekannt) nutzt nur das Journal """
+        if self.format == "binaer":
+            atomar_schreiben(pfad, binaer_converter.serialisieren(studiengang))
+            return
+        # Konverter aufrufen und Rückgabe-Daten in data speichern
+        data = converter.serialisieren(studiengang)
+        # in temporäre Datei schreiben und diese anschließend atomar umbenennen
+        inhalt = json.dumps(data, indent=4, ensure_ascii=False) # indent=4 -> bessere lesbarkeit, ensure_ascii=False -> keine Unicode Konvertierung
+        atomar_schreiben(pfad, inhalt.encode('utf-8'))
+
+    def _aktueller_stand(self, pfad):
+        """ Gibt den gespeicherten Studiengang aus dem Cache oder der Datei zurück - None, wenn keine Datei existiert """
+        # Der zurückgegebene Studiengang gehört dem Cache und darf nicht verändert werden
+        schluessel = self._dateischluessel(pfad)
+        if schluessel is None:
+            return None
+        # Ist die Datei seit dem letzten Laden unverändert, wird der Studiengang aus dem Cache verwendet
+        with self._cache_sperre:
+            eintrag = self._cache.get(pfad)
+            if eintrag is not None and eintrag[0] == schluessel:
+                # als zuletzt genutzt markieren
+                self._cache.move_to_end(pfad)
+                self.cache_treffer += 1
+                return eintrag[1]
+            self.cache_fehlschlaege += 1
+        studiengang = self._einlesen(pfad)
+        # geladenen Stand im Cache ablegen
+        with self._cache_sperre:
+            self._cache_ablegen(pfad, schluessel, studiengang)
+        return studiengang
+
+    @zeitmessung(repository_dauer, speicher="json", operation="speichern")
+    def speichern(self, studiengang: Studiengang, mandant: str | None = None):
+        """ Speichert den serialisierten Studiengang in eine Datei """
+        pfad = self._dateipfad(mandant)
+        # Schreiber werden über eine Dateisperre nacheinander ausgeführt, Leser werden nicht blockiert
+        with dateisperre(pfad):
+            # nur speichern, wenn der Studiengang auf dem zuletzt gespeicherten Stand basiert
+            alter_stand = self._aktueller_stand(pfad)
+            gespeicherte_version = 0 if alter_stand is None else alter_stand.version
+            if studiengang.version != gespeicherte_version:
+                raise VersionsKonflikt(f"Version {studiengang.version} ist veraltet, gespeichert ist Version {gespeicherte_version}.")
+            # Version erhöhen und schreiben, bei einem Fehler bleibt die alte Version erhalten
+            studiengang.version = gespeicherte_version + 1
+            try:
+                self._schreiben(pfad, alter_stand, studiengang)
+            except BaseException:
+                studiengang.version = gespeicherte_version
+                raise
+            logging.info("Studiengang gespeichert (Format %s).", self.format)
+            # Cache direkt mit dem gespeicherten Stand aktualisieren, damit der nächste Aufruf die Datei nicht neu einlesen muss
+            # Kopie ablegen, damit spätere Änderungen des Aufrufers den Cache nicht verändern
+            schluessel = self._dateischluessel(pfad)
+            with self._cache_sperre:
+                self._cache_ablegen(pfad, schluessel, studiengang.kopieren())
+
+    def _aendern(self, mandant: str | None, version: int | None, aendern, aenderungen: list | None = None):
+        """ Ändert eine Teilkopie des gespeicherten Stands (aendern(alter_stand) gibt den neuen Stand zurück), schreibt
+        sie und legt sie im Cache ab - ohne vollständiges Laden und Kopieren. Gibt die neue Version zurück """
+        pfad = self._dateipfad(mandant)
+        with dateisperre(pfad):
+            alter_stand = self._aktueller_stand(pfad)
+            if alter_stand is None:
+                raise LookupError("Kein Studiengang vorhanden.")
+            if version is not None and version != alter_stand.version:
+                raise VersionsKonflikt(f"Version {version} ist veraltet, gespeichert ist Version {alter_stand.version}.")
+            # Änderung zuerst an der Teilkopie prüfen, damit ungültige Positionen nicht geschrieben werden
+            studiengang = aendern(alter_stand)
+            studiengang.version = alter_stand.version + 1
+            self._schreiben(pfad, alter_stand, studiengang, aenderungen)
+            # der neue Stand teilt unveränderte Semester mit dem alten - beide werden nicht mehr verändert
+            schluessel = self._dateischluessel(pfad)
+            with self._cache_sperre:
+                self._cache_ablegen(pfad, schluessel, studiengang)
+        return studiengang.version
+
+    @zeitmessung(repository_dauer, speicher="json", operation="modul_aktualisieren")
+    def modul_aktualisieren(self, semester_nummer: int, index: int, aenderungen: dict, version: int | None = None,
+                            mandant: str | None = None) -> int:
+        """ Ändert ein Modul - kopiert wird nur die Modulliste seines Semesters """
+        def aendern(alter_stand: Studiengang):
+            studiengang = alter_stand.teilkopie(semester_nummer)
+            studiengang.modul_aendern(semester_nummer, index, aenderungen)
+            return studiengang
+        return self._aendern(mandant, version, aendern, [
+            {"op": "modul", "semester": semester_nummer, "index": index, "felder": aenderungen}])
+
+    @zeitmessung(repository_dauer, speicher="json", operation="semester_speichern")
+    def semester_speichern(self, kopf: Studiengang, nummer: int, module: list, start: int = 0,
+                           anzahl: int | None = None, mandant: str | None = None) -> int:
+        """ Übernimmt Kopf und Module eines Semesters - kopiert wird nur die Modulliste dieses Semesters """
+        def aendern(alter_stand: Studiengang):
+            studiengang = alter_stand.teilkopie(nummer)
+            studiengang.kopf_uebernehmen(kopf)
+            studiengang.module_ersetzen(nummer, module, start, anzahl)
+            return studiengang
+        return self._aendern(mandant, kopf.version, aendern)
+
+    def mandanten(self):
+        """ Sucht alle Mandanten-Dateien neben der konfigurierten JSON-Datei - None steht für die Datei selbst """
+        stamm, endung = os.path.splitext(self.dateiname)
+        verzeichnis = os.path.dirname(os.path.abspath(self.dateiname))
+        praefix = os.path.basename(stamm) + "_"
+        mandanten = [None] if os.path.exists(self.dateiname) else []
+        for name in sorted(os.listdir(verzeichnis)):
+            if name.startswith(praefix) and name.endswith(endung):
+                mandant = name[len(praefix):-len(endung)] if endung else name[len(praefix):]
+                if mandant_muster.fullmatch(mandant):
+                    mandanten.append(mandant)
+        return mandanten
+
+    def version(self, mandant: str | None = None):
+        """ Gibt die gespeicherte Version ohne Kopie des Studiengangs zurück """
+        studiengang = self._aktueller_stand(self._dateipfad(mandant))
+        return None if studiengang is None else studiengang.version
+
+    def kopf_laden(self, mandant: str | None = None):
+        """ Kopf und Semesterübersicht direkt aus dem Cache, ohne den ganzen Studiengang zu kopieren """
+        studiengang = self._aktueller_stand(self._dateipfad(mandant))
+        if studiengang is None:
+            return None
+        return studiengang.kopf_kopieren(), [(semester.nummer, len(semester.module)) for semester in studiengang.semester]
+
+    def semester_laden(self, nummer: int, start: int = 0, anzahl: int | None = None, mandant: str | None = None):
+        """ Kopiert nur die angeforderten Module eines Semesters aus dem Cache """
+        studiengang = self._aktueller_stand(self._dateipfad(mandant))
+        if studiengang is None:
+            return None
+        return studiengang.hole_semester(nummer, start, anzahl)
+
+    @zeitmessung(repository_dauer, speicher="json", operation="laden")
+    def laden(self, mandant: str | None = None):
+        """ Lädt Studiengang aus einer JSON-Datei """
+        # Prüfen ob JSON-Datei existiert, wenn nicht None zurückgeben
+        studiengang = self._aktueller_stand(self._dateipfad(mandant))
+        if studiengang is None:
+            return None
+        # Kopie an den Aufrufer zurückgeben, damit der Cache unverändert bleibt
+        return studiengang.kopieren()
+
+    @zeitmessung(repository_dauer, speicher="json", operation="lesen")
+    def lesen(self, mandant: str | None = None):
+        """ Gibt den Stand aus dem Cache ohne Kopie zurück - nur zum Lesen (Anzeige, Export, Auswertungen) """
+        # gespeicherte Stände werden im Cache nie verändert, sondern ersetzt - der Aufrufer behält einen gültigen Stand
+        return self._aktueller_stand(self._dateipfad(mandant))
@@ -0,0 +1,367 @@
+import datetime
+import logging
+import sqlite3
+import sys
+import threading
+
+from klassen.domain.modul import Modul
+from klassen.domain.pruefungsleistung import Pruefungsleistung
+from klassen.domain.semester import Semester
+from klassen.domain.studiengang import Studiengang
+from klassen.domain.ziel_note import NotenZiel
+from klassen.domain.ziel_zeit import ZeitZiel
+from klassen.domain.ziele import ZIELTYPEN
+from klassen.konfiguration import konfiguration
+from klassen.metriken import repository_dauer, zeitmessung
+from klassen.repository.interface import IStudiengangRepository, VersionsKonflikt
+from klassen.repository.json_data import StudiengangJSONData
+
+# Mandant, der genutzt wird, wenn kein Mandant übergeben wird
+standard_mandant = "standard"
+
+# Tabellen in normalisierter Form: Studiengang -> Semester -> Modul -> Prüfungsleistung
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS studiengang (
+    id INTEGER PRIMARY KEY,
+    mandant TEXT NOT NULL,
+    titel TEXT NOT NULL,
+    start_datum TEXT NOT NULL,
+    ziel_zeit_tage INTEGER NOT NULL,
+    ziel_noten_schnitt REAL NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_studiengang_mandant ON studiengang (mandant);
+CREATE TABLE IF NOT EXISTS semester (
+    id INTEGER PRIMARY KEY,
+    studiengang_id INTEGER NOT NULL REFERENCES studiengang (id) ON DELETE CASCADE,
+    nummer INTEGER NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_semester_studiengang ON semester (studiengang_id, nummer);
+CREATE TABLE IF NOT EXISTS modul (
+    id INTEGER PRIMARY KEY,
+    semester_id INTEGER NOT NULL REFERENCES semester (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    titel TEXT NOT NULL,
+    ects INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_modul_semester ON modul (semester_id, position);
+CREATE TABLE IF NOT EXISTS pruefungsleistung (
+    modul_id INTEGER PRIMARY KEY REFERENCES modul (id) ON DELETE CASCADE,
+    pruefungsart TEXT NOT NULL,
+    note REAL,
+    anerkannt INTEGER
+);
+CREATE TABLE IF NOT EXISTS ziel (
+    studiengang_id INTEGER NOT NULL REFERENCES studiengang (id) ON DELETE CASCADE,
+    typ TEXT NOT NULL,
+    wert REAL NOT NULL,
+    PRIMARY KEY (studiengang_id, typ)
+);
+"""
+
+# SQL-Anweisungen als Konstanten, damit sqlite3 die vorbereiteten Anweisungen pro Verbindung wiederverwendet
+SQL_KOPF_LADEN = "SELECT id, titel, start_datum, ziel_zeit_tage, ziel_noten_schnitt, version FROM studiengang WHERE mandant = ?"
+SQL_VERSION_LADEN = "SELECT version FROM studiengang WHERE mandant = ?"
+SQL_MANDANTEN = "SELECT mandant FROM studiengang ORDER BY mandant"
+SQL_MODULE_LADEN = """
+SELECT s.nummer, m.titel, m.ects, p.pruefungsart, p.note, p.anerkannt
+FROM semester s
+LEFT JOIN modul m ON m.semester_id = s.id
+LEFT JOIN pruefungsleistung p ON p.modul_id = m.id
+WHERE s.studiengang_id = ?
+ORDER BY s.nummer, m.position
+"""
+# aktualisiert nur, wenn die gespeicherte Version der geladenen entspricht - sonst wird keine Zeile zurückgegeben
+SQL_KOPF_SPEICHERN = """
+INSERT INTO studiengang (mandant, titel, start_datum, ziel_zeit_tage, ziel_noten_schnitt, version) VALUES (?, ?, ?, ?, ?, ? + 1)
+ON CONFLICT (mandant) DO UPDATE SET titel = excluded.titel, start_datum = excluded.start_datum,
+    ziel_zeit_tage = excluded.ziel_zeit_tage, ziel_noten_schnitt = excluded.ziel_noten_schnitt, version = excluded.version
+    WHERE studiengang.version = excluded.version - 1
+RETURNING id, version
+"""
+SQL_SEMESTER_LOESCHEN = "DELETE FROM semester WHERE studiengang_id = ?"
+SQL_SEMESTER_SPEICHERN = "INSERT INTO semester (studiengang_id, nummer) VALUES (?, ?)"
+SQL_MODUL_SPEICHERN = "INSERT INTO modul (semester_id, position, titel, ects) VALUES (?, ?, ?, ?)"
+SQL_PRUEFUNG_SPEICHERN = "INSERT INTO pruefungsleistung (modul_id, pruefungsart, note, anerkannt) VALUES (?, ?, ?, ?)"
+# Einzeländerungen: Version erhöhen (optional nur bei passender Version), Modul suchen und nur geänderte Spalten schreiben
+SQL_VERSION_ERHOEHEN = "UPDATE studiengang SET version = version + 1 WHERE mandant = ? AND (? IS NULL OR version = ?) RETURNING id, version"
+SQL_MODUL_ID = """
+SELECT m.id FROM modul m JOIN semester s ON s.id = m.semester_id
+WHERE s.studiengang_id = ? AND s.nummer = ? AND m.position = ?
+"""
+# Bearbeiten einzelner Semester: Übersicht, Ausschnitt der Module, Kopf mit Versionsprüfung, Module verschieben
+SQL_SEMESTER_UEBERSICHT = """
+SELECT s.nummer, COUNT(m.id) FROM semester s LEFT JOIN modul m ON m.semester_id = s.id
+WHERE s.studiengang_id = ? GROUP BY s.id ORDER BY s.nummer
+"""
+# LIMIT -1 bedeutet in SQLite ohne Begrenzung
+SQL_SEMESTER_MODULE = """
+SELECT m.titel, m.ects, p.pruefungsart, p.note, p.anerkannt
+FROM semester s
+JOIN modul m ON m.semester_id = s.id
+LEFT JOIN pruefungsleistung p ON p.modul_id = m.id
+WHERE s.studiengang_id = ? AND s.nummer = ?
+ORDER BY m.position LIMIT ? OFFSET ?
+"""
+SQL_ID_LADEN = "SELECT id FROM studiengang WHERE mandant = ?"
+SQL_KOPF_AENDERN = """
+UPDATE studiengang SET titel = ?, start_datum = ?, ziel_zeit_tage = ?, ziel_noten_schnitt = ?, version = version + 1
+WHERE mandant = ? AND version = ?
+RETURNING id, version
+"""
+SQL_SEMESTER_ID = "SELECT id FROM semester WHERE studiengang_id = ? AND nummer = ?"
+SQL_MODULE_ENTFERNEN = "DELETE FROM modul WHERE semester_id = ? AND position >= ? AND position < ?"
+SQL_MODULE_VERSCHIEBEN = "UPDATE modul SET position = position + ? WHERE semester_id = ? AND position >= ?"
+SQL_SEMESTER_LEER_LOESCHEN = "DELETE FROM semester WHERE id = ? AND NOT EXISTS (SELECT 1 FROM modul WHERE semester_id = ?)"
+# Pflichtziele stehen in der Tabelle studiengang, optionale Ziele (z.B. ECTS pro Semester) je eine Zeile in ziel
+SQL_ZIELE_LADEN = "SELECT typ, wert FROM ziel WHERE studiengang_id = ?"
+SQL_ZIELE_LOESCHEN = "DELETE FROM ziel WHERE studiengang_id = ?"
+SQL_ZIEL_SPEICHERN = "INSERT INTO ziel (studiengang_id, typ, wert) VALUES (?, ?, ?)"
+SQL_FELD_AENDERN = {
+    "titel": "UPDATE modul SET titel = ? WHERE id = ?",
+    "credits": "UPDATE modul SET ects = ? WHERE id = ?",
+    "pruefungsart": "UPDATE pruefungsleistung SET pruefungsart = ? WHERE modul_id = ?",
+    "note": "UPDATE pruefungsleistung SET note = ? WHERE modul_id = ?",
+    "anerkannt": "UPDATE pruefungsleistung SET anerkannt = ? WHERE modul_id = ?"
+}
+
+
+class StudiengangSQLiteData(IStudiengangRepository):
+    """ Speichert und lädt die Studiengänge vieler Mandanten in einer SQLite-Datenbank """
+
+    def __init__(self, dateiname: str | None = None):
+        # Dateiname aus Konfiguration, falls keiner übergeben wurde
+        self.dateiname = dateiname or konfiguration.aktuell.sqlite_datei
+        # jede Thread bekommt eine eigene Verbindung (sqlite3-Verbindungen dürfen nicht zwischen Threads geteilt werden)
+        self._verbindungen = threading.local()
+        # Schema beim Start einmalig anlegen
+        with self._verbindung() as verbindung:
+            verbindung.executescript(SCHEMA)
+            # Datenbanken ohne Versionsspalte nachrüsten
+            spalten = [zeile[1] for zeile in verbindung.execute("PRAGMA table_info(studiengang)")]
+            if "version" not in spalten:
+                verbindung.execute("ALTER TABLE studiengang ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+    def _verbindung(self) -> sqlite3.Connection:
+        """ Gibt die Verbindung des aktuellen Threads zurück und öffnet sie bei Bedarf """
+        verbindung = getattr(self._verbindungen, "verbindung", None)
+        if verbindung is None:
+            # cached_statements hält die vorbereiteten Anweisungen der Verbindung vor
+            verbindung = sqlite3.connect(self.dateiname, cached_statements=64)
+            # WAL erlaubt gleichzeitiges Lesen während geschrieben wird
+            verbindung.execute("PRAGMA journal_mode=WAL")
+            verbindung.execute("PRAGMA synchronous=NORMAL")
+            verbindung.execute("PRAGMA foreign_keys=ON")
+            self._verbindungen.verbindung = verbindung
+        return verbindung
+
+    def schliessen(self):
+        """ Schließt die Verbindung des aktuellen Threads """
+        verbindung = getattr(self._verbindungen, "verbindung", None)
+        if verbindung is not None:
+            verbindung.close()
+            self._verbindungen.verbindung = None
+
+    @zeitmessung(repository_dauer, speicher="sqlite", operation="speichern")
+    def speichern(self, studiengang: Studiengang, mandant: str | None = None):
+        """ Speichert den Studiengang des Mandanten, vorhandene Semester werden ersetzt """
+        mandant = mandant or standard_mandant
+        verbindung = self._verbindung()
+        # alle Änderungen in einer Transaktion, Leser sehen entweder den alten oder den neuen Stand
+        with verbindung:
+            self._schreiben(verbindung, studiengang, mandant)
+        logging.info("Studiengang von Mandant %s in SQLite gespeichert.", mandant)
+
+    @zeitmessung(repository_dauer, speicher="sqlite", operation="speichern_mehrere")
+    def speichern_mehrere(self, eintraege: list) -> dict:
+        """ Speichert einen Stapel von (mandant, studiengang)-Paaren in einer gemeinsamen Transaktion """
+        fehler = {}
+        verbindung = self._verbindung()
+        with verbindung:
+            for mandant, studiengang in eintraege:
+                try:
+                    self._schreiben(verbindung, studiengang, mandant or standard_mandant)
+                # der Konflikt wird vor dem ersten Schreibzugriff erkannt, die übrigen Einträge bleiben gültig
+                except VersionsKonflikt as e:
+                    fehler[mandant] = str(e)
+        logging.info("%d Studiengänge in SQLite gespeichert.", len(eintraege) - len(fehler))
+        return fehler
+
+    def _schreiben(self, verbindung, studiengang: Studiengang, mandant: str):
+        """ Schreibt einen Studiengang innerhalb einer offenen Transaktion """
+        zeile = verbindung.execute(SQL_KOPF_SPEICHERN, (
+            mandant,
+            studiengang.titel,
+            studiengang.start_datum.isoformat(),
+            studiengang.ziele['zeit'].zeitziel_in_tagen,
+            studiengang.ziele['note'].notendurchschnitt,
+            studiengang.version
+        )).fetchone()
+        # keine Zeile bedeutet, dass ein anderer Schreiber zwischenzeitlich gespeichert hat - es wurde nichts geschrieben
+        if zeile is None:
+            raise VersionsKonflikt(f"Version {studiengang.version} von Mandant {mandant} ist veraltet.")
+        studiengang_id, neue_version = zeile
+        self._ziele_schreiben(verbindung, studiengang_id, studiengang.ziele)
+        # Semester werden samt Modulen und Prüfungsleistungen gelöscht (ON DELETE CASCADE) und neu angelegt
+        verbindung.execute(SQL_SEMESTER_LOESCHEN, (studiengang_id,))
+        for semester in studiengang.semester:
+            semester_id = verbindung.execute(SQL_SEMESTER_SPEICHERN, (studiengang_id, semester.nummer)).lastrowid
+            for position, modul in enumerate(semester.module):
+                modul_id = verbindung.execute(SQL_MODUL_SPEICHERN,
+                                              (semester_id, position, modul.titel, modul.credits)).lastrowid
+                pl = modul.pruefungsleistung
+                verbindung.execute(SQL_PRUEFUNG_SPEICHERN, (modul_id, pl.pruefungsart, pl.note, pl.modul_anerkannt))
+        studiengang.version = neue_version
+
+    @staticmethod
+    def _ziele_schreiben(verbindung, studiengang_id: int, ziele: dict):
+        """ Ersetzt die optionalen Ziele des Studiengangs innerhalb einer offenen Transaktion """
+        verbindung.execute(SQL_ZIELE_LOESCHEN, (studiengang_id,))
+        verbindung.executemany(SQL_ZIEL_SPEICHERN, [(studiengang_id, typ, ziel.wert) for typ, ziel in ziele.items()
+                                                    if not ZIELTYPEN[typ].pflicht])
+
+    @staticmethod
+    def _ziele_lesen(verbindung, studiengang_id: int, ziel_zeit_tage: int, ziel_noten_schnitt: float):
+        """ Dictionary der Ziele aus den Spalten des Studiengangs und den Zeilen der Tabelle ziel """
+        ziele_dict = {
+            "zeit": ZeitZiel(ziel_zeit_tage),
+            "note": NotenZiel(ziel_noten_schnitt)
+        }
+        for typ, wert in verbindung.execute(SQL_ZIELE_LADEN, (studiengang_id,)):
+            klasse = ZIELTYPEN.get(typ)
+            # Ziele eines nicht mehr vorhandenen Zieltyps werden übersprungen
+            if klasse is None:
+                logging.warning("Unbekannter Zieltyp %s in SQLite.", typ)
+                continue
+            ziele_dict[typ] = klasse.aus_wert(wert)
+        return ziele_dict
+
+    def modul_aktualisieren(self, semester_nummer: int, index: int, aenderungen: dict, version: int | None = None,
+                            mandant: str | None = None) -> int:
+        """ Schreibt nur die geänderten Felder eines Moduls, unabhängig von der Größe des Studiengangs """
+        mandant = mandant or standard_mandant
+        verbindung = self._verbindung()
+        with verbindung:
+            zeile = verbindung.execute(SQL_VERSION_ERHOEHEN, (mandant, version, version)).fetchone()
+            if zeile is None:
+                # Mandant fehlt oder Version ist veraltet
+                if verbindung.execute(SQL_VERSION_LADEN, (mandant,)).fetchone() is None:
+                    raise LookupError(f"Kein Studiengang für Mandant {mandant} vorhanden.")
+                raise VersionsKonflikt(f"Version {version} von Mandant {mandant} ist veraltet.")
+            studiengang_id, neue_version = zeile
+            modul = verbindung.execute(SQL_MODUL_ID, (studiengang_id, semester_nummer, index)).fetchone()
+            # Exception verwirft die Transaktion, die Version bleibt dann unverändert
+            if modul is None:
+                raise LookupError(f"Modul {index} in Semester {semester_nummer} nicht vorhanden.")
+            for feld, wert in aenderungen.items():
+                verbindung.execute(SQL_FELD_AENDERN[feld], (wert, modul[0]))
+        return neue_version
+
+    def kopf_laden(self, mandant: str | None = None):
+        """ Lädt nur den Kopf und die Anzahl der Module je Semester """
+        verbindung = self._verbindung()
+        kopf = verbindung.execute(SQL_KOPF_LADEN, (mandant or standard_mandant,)).fetchone()
+        if kopf is None:
+            return None
+        studiengang_id, titel, start_datum, ziel_zeit_tage, ziel_noten_schnitt, version = kopf
+        ziele_dict = self._ziele_lesen(verbindung, studiengang_id, ziel_zeit_tage, ziel_noten_schnitt)
+        uebersicht = verbindung.execute(SQL_SEMESTER_UEBERSICHT, (studiengang_id,)).fetchall()
+        return Studiengang(titel, datetime.datetime.fromisoformat(start_datum), [], ziele_dict, version), uebersicht
+
+    def semester_laden(self, nummer: int, start: int = 0, anzahl: int | None = None, mandant: str | None = None):
+        """ Lädt nur die angeforderten Module eines Semesters """
+        verbindung = self._verbindung()
+        zeile = verbindung.execute(SQL_ID_LADEN, (mandant or standard_mandant,)).fetchone()
+        if zeile is None:
+            return None
+        module = []
+        for titel, ects, pruefungsart, note, anerkannt in verbindung.execute(
+                SQL_SEMESTER_MODULE, (zeile[0], nummer, -1 if anzahl is None else anzahl, start)):
+            pruefungsleistung = Pruefungsleistung(pruefungsart, note, None if anerkannt is None else bool(anerkannt))
+            module.append(Modul(sys.intern(titel), ects, pruefungsleistung))
+        return Semester(nummer, module)
+
+    def semester_speichern(self, kopf: Studiengang, nummer: int, module: list, start: int = 0,
+                           anzahl: int | None = None, mandant: str | None = None) -> int:
+        """ Schreibt den Kopf und ersetzt nur die Module start bis start+anzahl des Semesters """
+        mandant = mandant or standard_mandant
+        verbindung = self._verbindung()
+        with verbindung:
+            zeile = verbindung.execute(SQL_KOPF_AENDERN, (
+                kopf.titel,
+                kopf.start_datum.isoformat(),
+                kopf.ziele['zeit'].zeitziel_in_tagen,
+                kopf.ziele['note'].notendurchschnitt,
+                mandant,
+                kopf.version
+            )).fetchone()
+            if zeile is None:
+                if verbindung.execute(SQL_VERSION_LADEN, (mandant,)).fetchone() is None:
+                    raise LookupError(f"Kein Studiengang für Mandant {mandant} vorhanden.")
+                raise VersionsKonflikt(f"Version {kopf.version} von Mandant {mandant} ist veraltet.")
+            studiengang_id, neue_version = zeile
+            self._ziele_schreiben(verbindung, studiengang_id, kopf.ziele)
+            semester = verbindung.execute(SQL_SEMESTER_ID, (studiengang_id, nummer)).fetchone()
+            if semester is None:
+                semester_id = verbindung.execute(SQL_SEMESTER_SPEICHERN, (studiengang_id, nummer)).lastrowid
+            else:
+                semester_id = semester[0]
+                # Ausschnitt entfernen und die folgenden Module um die Differenz verschieben
+                if anzahl is None:
+                    verbindung.execute(SQL_MODULE_ENTFERNEN, (semester_id, start, sys.maxsize))
+                else:
+                    verbindung.execute(SQL_MODULE_ENTFERNEN, (semester_id, start, start + anzahl))
+                    if len(module) != anzahl:
+                        verbindung.execute(SQL_MODULE_VERSCHIEBEN, (len(module) - anzahl, semester_id, start + anzahl))
+            for position, modul in enumerate(module, start):
+                modul_id = verbindung.execute(SQL_MODUL_SPEICHERN,
+                                              (semester_id, position, modul.titel, modul.credits)).lastrowid
+                pl = modul.pruefungsleistung
+                verbindung.execute(SQL_PRUEFUNG_SPEICHERN, (modul_id, pl.pruefungsart, pl.note, pl.modul_anerkannt))
+            # ein Semester ohne Module wird wie beim vollständigen Speichern entfernt
+            verbindung.execute(SQL_SEMESTER_LEER_LOESCHEN, (semester_id, semester_id))
+        return neue_version
+
+    def mandanten(self):
+        """ Gibt alle Mandanten der Datenbank zurück """
+        return [zeile[0] for zeile in self._verbindung().execute(SQL_MANDANTEN)]
+
+    def version(self, mandant: str | None = None):
+        """ Gibt die gespeicherte Version des Mandanten zurück - None, wenn keiner existiert """
+        zeile = self._verbindung().execute(SQL_VERSION_LADEN, (mandant or standard_mandant,)).fetchone()
+        return None if zeile is None else zeile[0]
+
+    @zeitmessung(repository_dauer, speicher="sqlite", operation="laden")
+    def laden(self, mandant: str | None = None):
+        """ Lädt den Studiengang des Mandanten - None, wenn keiner existiert """
+        mandant = mandant or standard_mandant
+        verbindung = self._verbindung()
+        kopf = verbindung.execute(SQL_KOPF_LADEN, (mandant,)).fetchone()
+        if kopf is None:
+            return None
+        studiengang_id, titel, start_datum, ziel_zeit_tage, ziel_noten_schnitt, version = kopf
+        # Semester in einer Abfrage laden, Zeilen sind nach Semester und Position sortiert
+        semester_liste = []
+        aktuelles_semester = None
+        for nummer, mod_titel, ects, pruefungsart, note, anerkannt in verbindung.execute(SQL_MODULE_LADEN, (studiengang_id,)):
+            if aktuelles_semester is None or aktuelles_semester.nummer != nummer:
+                aktuelles_semester = Semester(nummer, [])
+                semester_liste.append(aktuelles_semester)
+            # Semester ohne Module liefern eine Zeile mit NULL-Werten
+            if mod_titel is None:
+                continue
+            pruefungsleistung = Pruefungsleistung(pruefungsart, note, None if anerkannt is None else bool(anerkannt))
+            aktuelles_semester.module.append(Modul(sys.intern(mod_titel), ects, pruefungsleistung))
+        ziele_dict = self._ziele_lesen(verbindung, studiengang_id, ziel_zeit_tage, ziel_noten_schnitt)
+        return Studiengang(titel, datetime.datetime.fromisoformat(start_datum), semester_liste, ziele_dict, version)
+
+    def importieren_aus_json(self, json_datei: str, mandant: str | None = None):
+        """ Migriert einen Studiengang aus einer bestehenden JSON-Datei (oder einem Binär-Snapshot) in die Datenbank """
+        # Datei mit dem vorhandenen Repository einlesen, damit alle Formate dieselben Standardwerte nutzen
+        studiengang = StudiengangJSONData.datei_einlesen(json_datei)
+        # ein vorhandener Stand des Mandanten wird bei der Migration bewusst überschrieben
+        zeile = self._verbindung().execute(SQL_VERSION_LADEN, (mandant or standard_mandant,)).fetchone()
+        studiengang.version = zeile[0] if zeile else 0
+        self.speichern(studiengang, mandant)
+        logging.info("JSON-Datei %s nach SQLite migriert (Mandant %s).", json_datei, mandant or standard_mandant)
+        return studiengang
@@ -0,0 +1,170 @@
+import datetime
+import math
+import os
+import struct
+import time
+
+import numpy as np
+
+from klassen.domain.studiengang import Studiengang
+from klassen.domain.ziele import ZIELTYPEN
+from klassen.metriken import repository_dauer, zeitmessung
+from klassen.repository.dateisperre import dateisperre
+from klassen.repository.json_data import mandant_muster
+from klassen.repository.sqlite_data import standard_mandant
+
+# Kennung am Dateianfang und Version des Aufbaus
+MAGIC = b"SGVL"
+FORMAT_VERSION = 1
+# Kopf (128 Bytes): Magic, Formatversion, Größe eines Eintrags, danach die Zieltypen der Bits als "zeit,note,..."
+KOPF = struct.Struct("<4sHH120s")
+# Eintrag fester Breite (little-endian, 24 Bytes) - Notendurchschnitt NaN, solange keine Note eingetragen ist,
+# Bit i der Zielmasken gehört zum i-ten Zieltyp im Kopf
+EINTRAG = np.dtype([
+    ("zeit", "<f8"), # Zeitpunkt des Speicherns (Unix-Zeit)
+    ("version", "<u4"),
+    ("notendurchschnitt", "<f4"),
+    ("erreichte_credits", "<u2"),
+    ("abgeschlossene_module", "<u2"),
+    ("ziele_gesetzt", "<u2"),
+    ("ziele_erreicht", "<u2"),
+])
+
+
+class StudiengangVerlauf:
+    """ Verlauf der Kennzahlen je Mandant: jede gespeicherte Änderung hängt einen Eintrag fester Breite an eine Datei
+    an (O(1)), Abfragen lesen die Datei als Memory-Map, ohne JSON zu parsen """
+
+    def __init__(self, verzeichnis: str):
+        self.verzeichnis = verzeichnis
+
+    def _dateipfad(self, mandant: str | None):
+        """ Datei des Mandanten im Verlaufsverzeichnis """
+        mandant = mandant or standard_mandant
+        # ungültige Schlüssel ablehnen, damit kein Pfad außerhalb des Verzeichnisses entstehen kann
+        if not mandant_muster.fullmatch(mandant):
+            raise ValueError(f"Ungültiger Mandant: {mandant!r}")
+        return os.path.join(self.verzeichnis, f"{mandant}.verlauf")
+
+    def anzahl(self, mandant: str | None = None):
+        """ Anzahl der Einträge aus der Dateigröße, ohne die Datei zu lesen """
+        try:
+            groesse = os.path.getsize(self._dateipfad(mandant))
+        except FileNotFoundError:
+            return 0
+        return max(groesse - KOPF.size, 0) // EINTRAG.itemsize
+
+    @staticmethod
+    def _kopf_lesen(datei):
+        """ Liest den Kopf und gibt die Zieltypen der Bits zurück """
+        daten = datei.read(KOPF.size)
+        if len(daten) < KOPF.size:
+            return None
+        magic, format_version, groesse, typen = KOPF.unpack(daten)
+        if magic != MAGIC or groesse != EINTRAG.itemsize:
+            raise ValueError("Keine Verlaufsdatei oder unbekannter Aufbau.")
+        typen = typen.rstrip(b"\0").decode("ascii")
+        return typen.split(",") if typen else []
+
+    @staticmethod
+    def _platz(typen: list):
+        """ Zieltypen, die in den Kopf passen - höchstens 16, da die Masken 16 Bit breit sind """
+        while len(typen) > 16 or len(",".join(typen)) > 120:
+            typen = typen[:-1]
+        return typen
+
+    @staticmethod
+    def _kopf(typen: list):
+        """ Kopf mit den Zieltypen der Bits """
+        return KOPF.pack(MAGIC, FORMAT_VERSION, EINTRAG.itemsize, ",".join(typen).encode("ascii"))
+
+    @staticmethod
+    def eintrag(studiengang: Studiengang, typen: list, zeit: float | None = None):
+        """ Verdichtet den Stand eines Studiengangs zu einem Eintrag """
+        kennzahlen = studiengang.berechne_kennzahlen()
+        gesetzt = erreicht = 0
+        for bit, typ in enumerate(typen):
+            ziel = studiengang.ziele.get(typ)
+            if ziel is None:
+                continue
+            gesetzt |= 1 << bit
+            if ziel.ist_ziel_erreicht(studiengang, kennzahlen):
+                erreicht |= 1 << bit
+        eintrag = np.zeros(1, dtype=EINTRAG)
+        eintrag[0] = (time.time() if zeit is None else zeit, studiengang.version,
+                      kennzahlen.notendurchschnitt if kennzahlen.benotete_module else np.nan,
+                      kennzahlen.erreichte_credits, kennzahlen.abgeschlossene_module, gesetzt, erreicht)
+        return eintrag
+
+    @zeitmessung(repository_dauer, speicher="verlauf", operation="speichern")
+    def anhaengen(self, studiengang: Studiengang, mandant: str | None = None, zeit: float | None = None):
+        """ Hängt den aktuellen Stand an den Verlauf des Mandanten an """
+        pfad = self._dateipfad(mandant)
+        os.makedirs(self.verzeichnis, exist_ok=True)
+        # Sperre auch über Prozesse, damit Kopf und Einträge nicht verschränkt geschrieben werden
+        with dateisperre(pfad), open(pfad, "a+b") as datei:
+            datei.seek(0)
+            typen = self._kopf_lesen(datei)
+            if typen is None:
+                typen = self._platz(list(ZIELTYPEN))
+                datei.truncate(0)
+                datei.write(self._kopf(typen))
+            elif any(typ not in typen for typ in studiengang.ziele):
+                # neu registrierte Zieltypen bekommen die nächsten freien Bits, ältere Einträge bleiben gültig
+                erweitert = self._platz(typen + [typ for typ in ZIELTYPEN if typ not in typen])
+                if erweitert != typen:
+                    typen = erweitert
+                    with open(pfad, "r+b") as kopf:
+                        kopf.write(self._kopf(typen))
+            # im Anhängemodus landet der Eintrag immer am Dateiende
+            datei.write(self.eintrag(studiengang, typen, zeit).tobytes())
+
+    @zeitmessung(repository_dauer, speicher="verlauf", operation="laden")
+    def abfragen(self, mandant: str | None = None, von: float | None = None, bis: float | None = None,
+                 punkte: int = 200):
+        """ Verlauf im Zeitraum von-bis (Unix-Zeit), auf höchstens punkte Einträge verdichtet - jeder Punkt ist der
+        Stand am Ende seines Abschnitts. Gibt (Anzahl Einträge im Zeitraum, Einträge, Zieltypen) zurück. """
+        pfad = self._dateipfad(mandant)
+        try:
+            with open(pfad, "rb") as datei:
+                typen = self._kopf_lesen(datei)
+        except FileNotFoundError:
+            typen = None
+        anzahl = (os.path.getsize(pfad) - KOPF.size) // EINTRAG.itemsize if typen is not None else 0
+        if anzahl <= 0:
+            return 0, np.zeros(0, dtype=EINTRAG), typen or []
+        # nur vollständige Einträge abbilden - ein gerade geschriebener Eintrag könnte noch unvollständig sein
+        eintraege = np.memmap(pfad, dtype=EINTRAG, mode="r", offset=KOPF.size, shape=(anzahl,))
+        # Einträge werden in zeitlicher Reihenfolge angehängt, der Zeitraum ergibt sich per Binärsuche
+        zeiten = eintraege["zeit"]
+        start = 0 if von is None else int(np.searchsorted(zeiten, von, side="left"))
+        ende = anzahl if bis is None else int(np.searchsorted(zeiten, bis, side="right"))
+        anzahl = max(ende - start, 0)
+        if anzahl <= punkte:
+            auswahl = np.array(eintraege[start:ende])
+        else:
+            # gleich viele Einträge je Abschnitt, vom letzten Eintrag jedes Abschnitts - der neueste Stand ist immer dabei
+            grenzen = np.linspace(start, ende, punkte + 1).astype(np.int64)
+            auswahl = np.array(eintraege[grenzen[1:] - 1])
+        del eintraege
+        return anzahl, auswahl, typen
+
+    @staticmethod
+    def als_dict(eintraege: np.ndarray, typen: list):
+        """ Spaltenweise Darstellung für die API - Zielstatus je Typ: True/False, None solange das Ziel nicht gesetzt war """
+        noten = eintraege["notendurchschnitt"].astype(np.float64)
+        ziele = {}
+        for bit, typ in enumerate(typen):
+            gesetzt = (eintraege["ziele_gesetzt"] >> bit) & 1
+            erreicht = (eintraege["ziele_erreicht"] >> bit) & 1
+            if gesetzt.any():
+                ziele[typ] = [bool(e) if g else None for g, e in zip(gesetzt.tolist(), erreicht.tolist())]
+        return {
+            "zeit": [datetime.datetime.fromtimestamp(zeit).isoformat(timespec="seconds")
+                     for zeit in eintraege["zeit"].tolist()],
+            "version": eintraege["version"].tolist(),
+            "notendurchschnitt": [None if math.isnan(note) else round(note, 2) for note in noten.tolist()],
+            "erreichte_credits": eintraege["erreichte_credits"].tolist(),
+            "abgeschlossene_module": eintraege["abgeschlossene_module"].tolist(),
+            "ziele": ziele,
+        }
@@ -0,0 +1,178 @@
+import asyncio
+import datetime
+import json
+import logging
+
+
+class _Verbindung:
+    """ Eine offene SSE-Verbindung: Version, die der Client kennt, und Puffer für genau ein Ereignis """
+    __slots__ = ("version", "heute", "queue")
+
+    def __init__(self, version: int | None):
+        self.version = version
+        self.heute = datetime.date.today()
+        # nur der neueste Stand zählt - ein noch nicht abgeholtes Ereignis wird ersetzt
+        self.queue = asyncio.Queue(maxsize=1)
+
+
+class EreignisVerteiler:
+    """ Server-Sent Events: ein einziger Task je Server erkennt Änderungen, berechnet die Kennzahlen einmal und verteilt
+    sie an alle offenen Verbindungen. Eine wartende Verbindung kostet nur eine Queue, keinen Thread. """
+
+    def __init__(self, speicher_async, manager, service, intervall: float = 2.0, heartbeat: float = 15.0):
+        self.speicher_async = speicher_async
+        self.manager = manager
+        self.service = service
+        self.intervall = intervall # Abfrage der Version - erkennt auch Änderungen anderer Prozesse
+        self.heartbeat = heartbeat # Kommentarzeile, damit Proxys die Verbindung nicht schließen
+        # Mandant -> offene Verbindungen, wird nur in der Ereignisschleife verändert
+        self._verbindungen = {}
+        # Mandant -> (Version, Datum, Kennzahlen) des zuletzt verteilten Stands
+        self._stand = {}
+        self._loop = None
+        self._geweckt = None
+        self._task = None
+        self.gesendet = 0
+
+    @property
+    def anzahl(self):
+        """ Anzahl offener Verbindungen """
+        return sum(len(verbindungen) for verbindungen in self._verbindungen.values())
+
+    def melden(self, mandant: str | None, version: int):
+        """ Beobachter des Managers, aus beliebigem Thread - weckt den Verteiler sofort statt beim nächsten Intervall """
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._geweckt.set)
+
+    async def ereignisse(self, mandant: str | None = None, version: int | None = None):
+        """ Asynchroner Generator mit den SSE-Nachrichten einer Verbindung, version ist der Stand der geladenen Seite """
+        self._starten()
+        verbindung = _Verbindung(version)
+        self._verbindungen.setdefault(mandant, set()).add(verbindung)
+        # sofort prüfen, ob die Seite schon veraltet ist
+        self._geweckt.set()
+        try:
+            # Wartezeit des Browsers bis zum erneuten Verbinden
+            yield b"retry: 5000\n\n"
+            while True:
+                try:
+                    nachricht = await asyncio.wait_for(verbindung.queue.get(), self.heartbeat)
+                except TimeoutError:
+                    yield b": ping\n\n"
+                    continue
+                # None: Server wird beendet
+                if nachricht is None:
+                    return
+                yield nachricht
+        finally:
+            verbindungen = self._verbindungen.get(mandant)
+            if verbindungen is not None:
+                verbindungen.discard(verbindung)
+                if not verbindungen:
+                    del self._verbindungen[mandant]
+
+    def _starten(self):
+        """ Startet den Verteiler-Task in der laufenden Ereignisschleife, falls er noch nicht läuft """
+        if self._task is None or self._task.done():
+            self._loop = asyncio.get_running_loop()
+            self._geweckt = asyncio.Event()
+            self._task = self._loop.create_task(self._verteilen())
+
+    async def _verteilen(self):
+        """ Wartet auf eine Meldung oder das Intervall und prüft dann alle Mandanten mit offenen Verbindungen """
+        while True:
+            try:
+                await asyncio.wait_for(self._geweckt.wait(), self.intervall)
+            except TimeoutError:
+                pass
+            self._geweckt.clear()
+            for mandant in list(self._verbindungen):
+                try:
+                    await self._pruefen(mandant)
+                except Exception as e:
+                    logging.error("Verteilen der Kennzahlen für Mandant %s fehlgeschlagen: %s", mandant, e)
+
+    async def _pruefen(self, mandant: str | None):
+        """ Lädt bei neuer Version (oder neuem Tag) den Studiengang einmal und verteilt die Kennzahlen """
+        heute = datetime.date.today()
+        version = await self.speicher_async.version(mandant)
+        if version is None:
+            return
+        stand = self._stand.get(mandant)
+        if stand is None or stand[:2] != (version, heute):
+            studiengang = await self.speicher_async.lesen(mandant)
+            if studiengang is None:
+                return
+            stand = (studiengang.version, heute, self._kennzahlen(studiengang, mandant))
+            vorher = self._stand.get(mandant)
+            self._stand[mandant] = stand
+        else:
+            vorher = None
+        version, heute, daten = stand
+        # Nachrichten werden nur einmal formatiert: vollständig oder nur die geänderten Werte
+        nachrichten = {}
+        for verbindung in self._verbindungen.get(mandant, ()):
+            if (verbindung.version, verbindung.heute) == (version, heute):
+                continue
+            # kennt der Client den vorigen Stand, reichen die geänderten Werte
+            nur_aenderungen = vorher is not None and (verbindung.version, verbindung.heute) == vorher[:2]
+            nachricht = nachrichten.get(nur_aenderungen)
+            if nachricht is None:
+                nachricht = nachrichten[nur_aenderungen] = self._nachricht(
+                    version, self._aenderungen(vorher[2], daten) if nur_aenderungen else daten)
+            verbindung.version, verbindung.heute = version, heute
+            self._einreihen(verbindung.queue, nachricht)
+            self.gesendet += 1
+
+    def _kennzahlen(self, studiengang, mandant: str | None = None):
+        """ Werte für die Karten der Dashboard-Seite, einmal je Stand berechnet """
+        kennzahlen = self.service.kennzahlen_berechnen(studiengang)
+        daten = self.service.kennzahlen_daten(studiengang, kennzahlen, mandant)
+        # Balkenfarben wie auf der Seite, damit der Browser nichts nachrechnen muss
+        daten["farben"] = {ziel: self.service.ziel_fortschritt_farbe(ziel, studiengang, kennzahlen, mandant)
+                           for ziel in studiengang.ziele}
+        return daten
+
+    @staticmethod
+    def _aenderungen(vorher: dict, daten: dict):
+        """ Nur die geänderten Werte, die Version ist immer enthalten """
+        aenderungen = {name: wert for name, wert in daten.items() if vorher.get(name) != wert}
+        aenderungen["version"] = daten["version"]
+        return aenderungen
+
+    @staticmethod
+    def _nachricht(version: int, daten: dict):
+        """ Formatiert ein Ereignis im SSE-Format, die Version dient als Ereignis-ID """
+        text = json.dumps(daten, ensure_ascii=False, separators=(",", ":"))
+        return f"event: kennzahlen\nid: {version}\ndata: {text}\n\n".encode("utf-8")
+
+    @staticmethod
+    def _einreihen(queue: asyncio.Queue, nachricht):
+        """ Legt die Nachricht ab - ein noch nicht gesendetes älteres Ereignis wird ersetzt """
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(nachricht)
+
+    def zuruecksetzen(self):
+        """ Vergisst die zuletzt verteilten Stände und prüft sofort neu (z.B. nach dem Wechsel des Repositorys),
+        aus beliebigem Thread """
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._zuruecksetzen)
+
+    def _zuruecksetzen(self):
+        self._stand.clear()
+        # Clients erhalten den vollständigen Stand, da ihre Version zum bisherigen Repository gehört
+        for verbindungen in self._verbindungen.values():
+            for verbindung in verbindungen:
+                verbindung.version = None
+        self._geweckt.set()
+
+    def beenden(self):
+        """ Beendet alle Verbindungen und den Verteiler-Task (beim Herunterfahren des Servers) """
+        for verbindungen in self._verbindungen.values():
+            for verbindung in verbindungen:
+                self._einreihen(verbindung.queue, None)
+        if self._task is not None:
+            self._task.cancel()
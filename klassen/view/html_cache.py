@@ -0,0 +1,43 @@
+import datetime
+import threading
+from collections import OrderedDict
+
+
+class HTMLCache:
+    """ Zwischenspeicher für fertig gerenderte Seiten mit Verdrängung der am längsten nicht genutzten Einträge (LRU) """
+
+    def __init__(self, max_eintraege: int = 256):
+        self.max_eintraege = max_eintraege
+        # Schlüssel -> (HTML, Zeitpunkt der Erstellung), Reihenfolge entspricht der letzten Nutzung
+        self._eintraege = OrderedDict()
+        self._sperre = threading.Lock()
+        self.treffer = 0
+        self.fehlschlaege = 0
+
+    def holen(self, schluessel):
+        """ Gibt (HTML, erstellt) zurück oder None, wenn die Seite nicht zwischengespeichert ist """
+        with self._sperre:
+            eintrag = self._eintraege.get(schluessel)
+            if eintrag is None:
+                self.fehlschlaege += 1
+                return None
+            # als zuletzt genutzt markieren
+            self._eintraege.move_to_end(schluessel)
+            self.treffer += 1
+            return eintrag
+
+    def ablegen(self, schluessel, html: str):
+        """ Speichert eine gerenderte Seite und verdrängt bei Bedarf den ältesten Eintrag """
+        # HTTP-Zeitangaben haben nur Sekundengenauigkeit
+        eintrag = (html, datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0))
+        with self._sperre:
+            self._eintraege[schluessel] = eintrag
+            self._eintraege.move_to_end(schluessel)
+            while len(self._eintraege) > self.max_eintraege:
+                self._eintraege.popitem(last=False)
+        return eintrag
+
+    def leeren(self):
+        """ Verwirft alle Seiten (z.B. nach dem Wechsel des Repositorys, die Versionen sind dann nicht vergleichbar) """
+        with self._sperre:
+            self._eintraege.clear()
@@ -0,0 +1,113 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+
+from flask import abort, send_file, send_from_directory
+from werkzeug.security import safe_join
+
+from klassen.repository.dateisperre import atomar_schreiben
+
+try:
+    # Brotli ist optional - ohne das Paket werden nur gzip-Varianten erzeugt
+    import brotli
+except ImportError:
+    brotli = None
+
+# Antworten mit Fingerabdruck im Namen ändern sich nie - ein Jahr speichern, ohne nachzufragen
+UNVERAENDERLICH = "public, max-age=31536000, immutable"
+# kleinere Dateien werden nicht komprimiert, der Aufwand lohnt sich nicht
+MIN_GROESSE = 256
+# Dateitypen, die sich komprimieren lassen (Bilder wie PNG sind bereits komprimiert)
+KOMPRIMIERBAR = (".css", ".js", ".svg", ".html", ".json", ".txt")
+
+
+class StatischeDateien:
+    """ Statische Dateien mit Fingerabdruck im Namen (style_dash.css -> style_dash.1a2b3c4d5e6f.css) und vorab
+    komprimierten Varianten. url_for('static', ...) liefert über das Manifest den Namen mit Fingerabdruck. """
+
+    def __init__(self, quelle: str, ziel: str):
+        self.quelle = quelle # static-Verzeichnis der App
+        self.ziel = ziel # Ausgabe: Dateien mit Fingerabdruck, .gz/.br-Varianten und manifest.json
+        # Originalname -> Name mit Fingerabdruck
+        self.manifest = {}
+        # Name mit Fingerabdruck -> vorhandene Kodierungen, z.B. ("br", "gzip")
+        self._varianten = {}
+
+    @staticmethod
+    def _fingerabdruck(name: str, daten: bytes):
+        """ Hängt die ersten 12 Zeichen des SHA-256 des Inhalts vor die Endung """
+        stamm, endung = os.path.splitext(name)
+        return f"{stamm}.{hashlib.sha256(daten).hexdigest()[:12]}{endung}"
+
+    def erstellen(self):
+        """ Erzeugt Fingerabdrücke, komprimierte Varianten und Manifest - vorhandene Dateien mit gleichem Namen haben
+        denselben Inhalt und werden nicht neu geschrieben (schneller Start, auch mehrere Prozesse gleichzeitig) """
+        manifest, varianten = {}, {}
+        for verzeichnis, _, dateien in os.walk(self.quelle):
+            for dateiname in sorted(dateien):
+                pfad = os.path.join(verzeichnis, dateiname)
+                name = os.path.relpath(pfad, self.quelle).replace(os.sep, "/")
+                with open(pfad, "rb") as datei:
+                    daten = datei.read()
+                neu = self._fingerabdruck(name, daten)
+                manifest[name] = neu
+                varianten[neu] = self._schreiben(neu, daten)
+        os.makedirs(self.ziel, exist_ok=True)
+        atomar_schreiben(os.path.join(self.ziel, "manifest.json"),
+                         json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8"))
+        self.manifest, self._varianten = manifest, varianten
+        return manifest
+
+    def _schreiben(self, name: str, daten: bytes):
+        """ Schreibt die Datei und ihre komprimierten Varianten, gibt die erzeugten Kodierungen zurück """
+        pfad = os.path.join(self.ziel, name)
+        os.makedirs(os.path.dirname(pfad), exist_ok=True)
+        if not os.path.exists(pfad):
+            atomar_schreiben(pfad, daten)
+        kodierungen = []
+        if len(daten) < MIN_GROESSE or not name.endswith(KOMPRIMIERBAR):
+            return tuple(kodierungen)
+        komprimierer = [("gzip", ".gz", lambda d: gzip.compress(d, 9, mtime=0))]
+        if brotli is not None:
+            komprimierer.insert(0, ("br", ".br", lambda d: brotli.compress(d, quality=11)))
+        for kodierung, endung, komprimieren in komprimierer:
+            if not os.path.exists(pfad + endung):
+                komprimiert = komprimieren(daten)
+                # nur behalten, was tatsächlich kleiner ist
+                if len(komprimiert) >= len(daten):
+                    continue
+                atomar_schreiben(pfad + endung, komprimiert)
+            kodierungen.append(kodierung)
+        return tuple(kodierungen)
+
+    def url_ersetzen(self, endpoint, werte):
+        """ url_defaults-Hook: url_for('static', filename=...) zeigt auf den Namen mit Fingerabdruck """
+        if endpoint == "static" and "filename" in werte:
+            werte["filename"] = self.manifest.get(werte["filename"], werte["filename"])
+
+    def ausliefern(self, filename, request):
+        """ Liefert eine Datei aus - mit Fingerabdruck unveränderlich und, wenn der Browser es annimmt, komprimiert,
+        sonst wie bisher aus dem static-Verzeichnis (z.B. alte, fest eingetragene Links) """
+        kodierungen = self._varianten.get(filename)
+        pfad = safe_join(self.ziel, filename)
+        if kodierungen is None:
+            # Fingerabdruck eines früheren Stands (z.B. Seite aus dem Browser-Cache nach einem Update) - liegt weiter
+            # im Ziel-Verzeichnis, der Inhalt passt weiterhin zum Namen
+            if pfad is None or filename == "manifest.json" or not os.path.isfile(pfad):
+                return send_from_directory(self.quelle, filename)
+            kodierungen = ()
+        elif not os.path.isfile(pfad):
+            abort(404)
+        mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        kodierung = next((kodierung for kodierung in kodierungen if request.accept_encodings[kodierung]), None)
+        if kodierung is None:
+            antwort = send_file(pfad, mimetype=mimetype, conditional=True)
+        else:
+            antwort = send_file(pfad + (".br" if kodierung == "br" else ".gz"), mimetype=mimetype, conditional=True)
+            antwort.headers["Content-Encoding"] = kodierung
+        if kodierungen:
+            antwort.vary.add("Accept-Encoding")
+        antwort.headers["Cache-Control"] = UNVERAENDERLICH
+        return antwort
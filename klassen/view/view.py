@@ -1,45 +1,277 @@
+import datetime
 import logging
+import math
+import os
 
-from flask import render_template, redirect, url_for, flash
-from werkzeug.security import check_password_hash
+from flask import render_template, redirect, url_for, flash, jsonify, make_response, Response, stream_with_context
+from werkzeug.http import is_resource_modified
+
+from klassen.controller.service.anmeldung import Ueberlastet
+from klassen.domain.ziele import ZIELTYPEN
+from klassen.repository.csv_converter import StudiengangCSVConverter
+from klassen.repository.csv_data import StudiengangCSVData
+from klassen.repository.interface import VersionsKonflikt
+from klassen.repository.json_converter import StudiengangJSONConverter
+from klassen.repository.json_data import mandant_muster
+from klassen.repository.sqlite_data import standard_mandant
+
+
+# Felder der Kennzahlen-API, entsprechen StudiengangService.kennzahlen_daten
+KENNZAHLEN_FELDER = ("version", "stichtag", "vergangene_tage", "ziel_tage", "zeit_fortschritt", "abgeschlossene_module",
+                     "gesamt_module", "modul_fortschritt", "erreichte_credits", "gesamt_credits", "credit_fortschritt",
+                     "notendurchschnitt", "ziel_notendurchschnitt", "ziele", "zielwerte", "prognosen")
+# Punkte der Verlaufs-API: Standard und Obergrenze, unabhängig davon wie viele Einträge der Verlauf hat
+VERLAUF_PUNKTE = 200
+VERLAUF_PUNKTE_MAX = 2000
 
 
 class StudiengangAnsicht:
     @staticmethod
-    def dashboard(manager, service):
-        """ Gibt die Dashboard-Seite aus """
-        # Studiengang laden
-        studiengang = manager.studiengang_laden()
+    def dashboard(manager, service, request=None, session=None, html_cache=None, mandant=None):
+        """ Gibt die Dashboard-Seite aus - mit ETag/Last-Modified und zwischengespeichertem HTML """
+        # ohne Cache oder mit anstehender Flash-Nachricht (einmalige Ausgabe) wird immer neu gerendert
+        if html_cache is None or session.get('_flashes'):
+            return StudiengangAnsicht._dashboard_rendern(manager.studiengang_lesen(mandant), service, mandant)
+        # die Seite hängt vom gespeicherten Stand und vom Datum ab (vergangene Tage)
+        heute = datetime.date.today()
+        version = manager.studiengang_version(mandant)
+        eintrag, antwort = StudiengangAnsicht._aus_cache(request, html_cache, mandant, version, heute)
+        if antwort is not None:
+            return antwort
+        if eintrag is None:
+            studiengang = manager.studiengang_lesen(mandant)
+            # Version des tatsächlich geladenen Stands verwenden, falls zwischenzeitlich gespeichert wurde
+            version = studiengang.version
+            eintrag = html_cache.ablegen((mandant, version, heute),
+                                         StudiengangAnsicht._dashboard_rendern(studiengang, service, mandant))
+        return StudiengangAnsicht._dashboard_antwort(eintrag, mandant, version, heute)
+
+    @staticmethod
+    async def dashboard_async(speicher_async, manager, service, request, session, html_cache=None, mandant=None):
+        """ Wie dashboard, aber Repository-Zugriffe als Coroutinen - gleichzeitige Anfragen teilen sich einen Lesezugriff """
+        if html_cache is None or session.get('_flashes'):
+            studiengang = await StudiengangAnsicht._laden_async(speicher_async, manager, mandant)
+            return StudiengangAnsicht._dashboard_rendern(studiengang, service, mandant)
+        heute = datetime.date.today()
+        version = await speicher_async.version(mandant)
+        eintrag, antwort = StudiengangAnsicht._aus_cache(request, html_cache, mandant, version, heute)
+        if antwort is not None:
+            return antwort
+        if eintrag is None:
+            studiengang = await StudiengangAnsicht._laden_async(speicher_async, manager, mandant)
+            version = studiengang.version
+            eintrag = html_cache.ablegen((mandant, version, heute),
+                                         StudiengangAnsicht._dashboard_rendern(studiengang, service, mandant))
+        return StudiengangAnsicht._dashboard_antwort(eintrag, mandant, version, heute)
+
+    @staticmethod
+    async def _laden_async(speicher_async, manager, mandant):
+        """ Liest den Studiengang asynchron - existiert noch keiner, legt ihn der Manager im Thread-Pool an """
+        studiengang = await speicher_async.lesen(mandant)
+        if studiengang is None:
+            studiengang = await speicher_async.im_thread(manager.studiengang_laden, mandant)
+        return studiengang
+
+    @staticmethod
+    def _aus_cache(request, html_cache, mandant, version, heute):
+        """ Sucht die Seite im Cache - Rückgabe: (Cache-Eintrag oder None, 304-Antwort oder None) """
+        if version is None:
+            return None, None
+        eintrag = html_cache.holen((mandant, version, heute))
+        # unveränderte Seite: 304 ohne Laden und Rendern
+        etag = StudiengangAnsicht._etag(mandant, version, heute)
+        if not is_resource_modified(request.environ, etag=etag, last_modified=eintrag[1] if eintrag else None):
+            antwort = make_response('', 304)
+            antwort.set_etag(etag)
+            return eintrag, antwort
+        return eintrag, None
+
+    @staticmethod
+    def _dashboard_antwort(eintrag, mandant, version, heute):
+        """ Antwort aus einem Cache-Eintrag mit ETag und Last-Modified """
+        antwort = make_response(eintrag[0])
+        antwort.set_etag(StudiengangAnsicht._etag(mandant, version, heute))
+        antwort.last_modified = eintrag[1]
+        # Browser und Proxys dürfen speichern, müssen aber vor jeder Nutzung nachfragen
+        antwort.cache_control.no_cache = True
+        return antwort
+
+    @staticmethod
+    def _etag(mandant, version, heute):
+        """ ETag aus Mandant, gespeicherter Version und Datum """
+        etag = f"v{version}-{heute.isoformat()}"
+        return etag if mandant is None else f"{mandant}-{etag}"
+
+    @staticmethod
+    def studiengang_api(manager, request, mandant=None):
+        """ Gibt den Studiengang als JSON aus - ETag je Version, mit ?felder=titel,ziele nur ausgewählte Felder """
+        try:
+            felder = StudiengangAnsicht._felder(request, ("version", "titel", "start_datum", "ziele", "semester"))
+        except ValueError as e:
+            return jsonify(fehler=str(e)), 400
+        # der Studiengang ändert sich nur mit der Version, das Datum spielt keine Rolle
+        antwort = StudiengangAnsicht._nicht_geaendert(request, mandant, f"sg-v{manager.studiengang_version(mandant)}", felder)
+        if antwort is not None:
+            return antwort
+        studiengang = manager.studiengang_lesen(mandant)
+        return StudiengangAnsicht._json_antwort(StudiengangJSONConverter.serialisieren(studiengang), felder, mandant,
+                                                f"sg-v{studiengang.version}")
+
+    @staticmethod
+    def kennzahlen_api(manager, service, request, mandant=None):
+        """ Gibt die Kennzahlen der Dashboard-Seite als JSON aus - ETag je Version und Tag, Feldauswahl über ?felder= """
+        try:
+            felder = StudiengangAnsicht._felder(request, KENNZAHLEN_FELDER)
+        except ValueError as e:
+            return jsonify(fehler=str(e)), 400
+        heute = datetime.date.today()
+        antwort = StudiengangAnsicht._nicht_geaendert(
+            request, mandant, f"kz-v{manager.studiengang_version(mandant)}-{heute.isoformat()}", felder)
+        if antwort is not None:
+            return antwort
+        studiengang = manager.studiengang_lesen(mandant)
+        return StudiengangAnsicht._json_antwort(service.kennzahlen_daten(studiengang, mandant=mandant), felder, mandant,
+                                                f"kz-v{studiengang.version}-{heute.isoformat()}")
+
+    @staticmethod
+    def verlauf_api(manager, request, mandant=None):
+        """ Gibt den Verlauf der Kennzahlen als JSON aus - ?punkte=200 begrenzt die Anzahl der Punkte, ?von= und ?bis=
+        (ISO-Datum) den Zeitraum. Die Antwort bleibt gleich groß, egal wie lang der Verlauf ist. """
+        try:
+            punkte = int(request.args.get('punkte', VERLAUF_PUNKTE))
+            if not 2 <= punkte <= VERLAUF_PUNKTE_MAX:
+                raise ValueError(f"punkte muss zwischen 2 und {VERLAUF_PUNKTE_MAX} liegen")
+            von = StudiengangAnsicht._zeitpunkt(request.args.get('von'))
+            bis = StudiengangAnsicht._zeitpunkt(request.args.get('bis'), tagesende=True)
+        except ValueError as e:
+            return jsonify(fehler=str(e)), 400
+        verlauf = manager.verlauf
+        if verlauf is None:
+            return jsonify(fehler="Es wird kein Verlauf geführt."), 404
+        # Einträge werden im Hintergrund angehängt - der ETag folgt ihrer Anzahl, nicht der Version des Studiengangs
+        etag = f"vl-{verlauf.anzahl(mandant)}-{punkte}-{von}-{bis}"
+        antwort = StudiengangAnsicht._nicht_geaendert(request, mandant, etag, None)
+        if antwort is not None:
+            return antwort
+        anzahl, eintraege, typen = verlauf.abfragen(mandant, von, bis, punkte)
+        daten = verlauf.als_dict(eintraege, typen)
+        daten["eintraege"] = anzahl
+        return StudiengangAnsicht._json_antwort(daten, None, mandant, etag)
+
+    @staticmethod
+    def _zeitpunkt(text, tagesende=False):
+        """ ISO-Datum oder -Zeitpunkt als Unix-Zeit - ein reines Datum als bis-Grenze schließt den ganzen Tag ein """
+        if not text:
+            return None
+        try:
+            zeitpunkt = datetime.datetime.fromisoformat(text)
+        except ValueError:
+            raise ValueError(f"Ungültiges Datum: {text!r}")
+        if tagesende and len(text) == 10:
+            zeitpunkt += datetime.timedelta(days=1, microseconds=-1)
+        return zeitpunkt.timestamp()
+
+    @staticmethod
+    def _felder(request, erlaubt):
+        """ Liest die Feldauswahl aus ?felder=a,b - None bedeutet alle Felder, unbekannte Felder lösen ValueError aus """
+        auswahl = request.args.get('felder')
+        if not auswahl:
+            return None
+        felder = sorted({feld.strip() for feld in auswahl.split(',') if feld.strip()})
+        unbekannt = [feld for feld in felder if feld not in erlaubt]
+        if unbekannt:
+            raise ValueError(f"Unbekannte Felder: {', '.join(unbekannt)}")
+        return felder
+
+    @staticmethod
+    def _api_etag(mandant, etag, felder):
+        """ ETag einer API-Antwort - die Feldauswahl gehört dazu, da sie den Inhalt ändert """
+        if felder:
+            etag = f"{etag}-{'.'.join(felder)}"
+        return etag if mandant is None else f"{mandant}-{etag}"
+
+    @staticmethod
+    def _nicht_geaendert(request, mandant, etag, felder):
+        """ 304-Antwort, wenn der Client den aktuellen Stand bereits hat - sonst None """
+        # "vNone" heißt: noch kein Studiengang gespeichert, er wird beim Laden erst angelegt
+        if "vNone" in etag:
+            return None
+        etag = StudiengangAnsicht._api_etag(mandant, etag, felder)
+        if is_resource_modified(request.environ, etag=etag):
+            return None
+        antwort = make_response('', 304)
+        antwort.set_etag(etag)
+        return antwort
+
+    @staticmethod
+    def _json_antwort(daten, felder, mandant, etag):
+        """ Kompakte JSON-Antwort mit ETag, bei Feldauswahl nur mit den gewünschten Feldern """
+        if felder:
+            daten = {feld: daten[feld] for feld in felder}
+        antwort = jsonify(daten)
+        antwort.set_etag(StudiengangAnsicht._api_etag(mandant, etag, felder))
+        # Clients dürfen speichern, müssen aber vor jeder Nutzung mit dem ETag nachfragen
+        antwort.cache_control.no_cache = True
+        return antwort
+
+    @staticmethod
+    def _dashboard_rendern(studiengang, service, mandant=None):
+        """ Rendert die Dashboard-Seite für einen Studiengang """
+        # alle Kennzahlen einmalig berechnen, alle Werte der Seite beziehen sich auf diesen Schnappschuss
+        kennzahlen = service.kennzahlen_berechnen(studiengang)
+        # alle Ziele in einem Durchlauf auswerten - die Farben der Balken nutzen dasselbe (zwischengespeicherte) Ergebnis
+        ergebnisse = service.ziel_auswertung.auswerten(studiengang, kennzahlen, mandant)
         # Werte zu Variablen zuordnen die in dem HTML Template genutzt werden
         return render_template(
             'dashboard.html',
             sg=studiengang,
-            tage_vergangen=studiengang.berechne_vergangene_tage(),
+            tage_vergangen=kennzahlen.vergangene_tage,
             tage_ziel=studiengang.ziele['zeit'].zeitziel_in_tagen,
-            zeitbalken_fortschritt=service.zeit_fortschritt(studiengang),
-            zeitbalken_farbe=service.ziel_fortschritt_farbe('zeit', studiengang),
-            module_abgeschlossen=studiengang.berechne_abgeschlossene_module(),
-            erreichte_credits=studiengang.berechne_erreichte_credits(),
-            notendurchschnitt_aktuell=f"{studiengang.berechne_notendurchschnitt():.1f}".replace('.', ','),
+            zeitbalken_fortschritt=service.zeit_fortschritt(studiengang, kennzahlen),
+            zeitbalken_farbe=service.ziel_fortschritt_farbe('zeit', studiengang, kennzahlen, mandant),
+            module_abgeschlossen=kennzahlen.abgeschlossene_module,
+            erreichte_credits=kennzahlen.erreichte_credits,
+            notendurchschnitt_aktuell=f"{kennzahlen.notendurchschnitt:.1f}".replace('.', ','),
             notendurchschnitt_ziel=f"{studiengang.ziele['note'].notendurchschnitt:.1f}".replace('.', ','),
-            notenbalken_farbe=service.ziel_fortschritt_farbe('note', studiengang),
-            credit_fortschritt=service.credits_fortschritt(studiengang),
-            module_fortschritt=service.modul_fortschritt(studiengang)
+            notenbalken_farbe=service.ziel_fortschritt_farbe('note', studiengang, kennzahlen, mandant),
+            credit_fortschritt=service.credits_fortschritt(studiengang, kennzahlen),
+            module_fortschritt=service.modul_fortschritt(studiengang, kennzahlen),
+            # optionale Ziele (z.B. ECTS pro Semester) als zusätzliche Karten, Prognosen aller Ziele
+            weitere_ziele=[(ZIELTYPEN[typ], ziel, ergebnisse[typ]) for typ, ziel in studiengang.ziele.items()
+                           if not ZIELTYPEN[typ].pflicht],
+            prognosen={typ: ergebnis.prognose for typ, ergebnis in ergebnisse.items()}
         )
 
     @staticmethod
-    def login(session, request, password):
-        """ Login mit Passwortabfrage """
+    def login(session, request, pruefer, drossel):
+        """ Login mit Passwortabfrage - Prüfung im Prozess-Pool, Fehlversuche je Client gedrosselt """
         error = None
         if request.method == 'POST':
+            client = request.remote_addr or "unbekannt"
+            # zu viele Fehlversuche: sofort ablehnen, ohne einen Hash zu berechnen
+            wartezeit = drossel.wartezeit(client)
+            if wartezeit > 0:
+                logging.warning("Anmeldung gedrosselt: %s", client)
+                antwort = make_response(render_template('login.html', error='Zu viele Fehlversuche, bitte später erneut versuchen'), 429)
+                antwort.headers['Retry-After'] = str(math.ceil(wartezeit))
+                return antwort
             # Kennwortabfrage wenn "Login" gedrückt wird
-            if check_password_hash(password, request.form['password']):
+            try:
+                passwort_korrekt = pruefer.pruefen(request.form['password'])
+            except Ueberlastet:
+                logging.warning("Passwortprüfung überlastet.")
+                antwort = make_response(render_template('login.html', error='Anmeldung derzeit überlastet, bitte erneut versuchen'), 503)
+                antwort.headers['Retry-After'] = "1"
+                return antwort
+            if passwort_korrekt:
                 # Wenn das eingegebene Kennwort mit dem Hash übereinstimmt, wird ein Session-Cookie gesetzt und an die Seite zum Bearbeiten weitergeleitet.
+                drossel.erfolg(client)
                 session['logged_in'] = True
                 logging.info("Benutzer erfolgreich eingeloggt.")
                 return redirect(url_for('bearbeiten'))
             else:
-                # Wenn Kennwort nicht stimmt, Variable error setzen und Fehler ausgeben.
+                # Wenn Kennwort nicht stimmt, Fehlversuch zählen, Variable error setzen und Fehler ausgeben.
+                drossel.fehlversuch(client)
                 error = 'Falsches Passwort'
                 logging.warning("Benutzer hat ein falsches Passwort verwendet.")
         return render_template('login.html', error=error)
@@ -53,36 +285,160 @@ class StudiengangAnsicht:
         return redirect(url_for('dashboard'))
 
     @staticmethod
-    def bearbeiten(session, request, handler, manager):
-        """ Dashboard-Daten bearbeiten """
+    def bearbeiten(session, request, handler, manager, seitengroesse: int = 50):
+        """ Dashboard-Daten bearbeiten - je Seite ein Semester bzw. höchstens seitengroesse Module davon """
         # wenn kein Session-Cookie vorhanden ist, weiterleitung an Login Seite
         if not session.get('logged_in'):
             return redirect(url_for('login'))
-        # Studiengang laden
-        studiengang = manager.studiengang_laden()
         if request.method == 'POST':
-            # Nach drücken auf Speichern wird versucht den Studiengang aus den Formulardaten zu aktualisieren.
+            # Nach drücken auf Speichern wird versucht Kopfdaten und das angezeigte Semester aus den Formulardaten zu aktualisieren.
             # Tritt kein Fehler auf wird eine positive Meldung gespeichert und auf der Hauptseite angezeigt.
             try:
-                # Aufruf der Methode aktualisieren_aus_formular mit Übergabe des aktuellen Studiengang-Objekts, den Daten aus dem Webformular und dem manager damit gespeichert werden kann
-                handler.aktualisieren_aus_formular(studiengang, request.form, manager)
+                # Aufruf der Methode semester_aus_formular mit den Daten aus dem Webformular und dem manager damit gespeichert werden kann
+                handler.semester_aus_formular(request.form, manager)
                 flash("Änderungen erfolgreich gespeichert!", "success")
                 return redirect(url_for('dashboard')) # Dashboard anzeigen
+            # Wurde der Studiengang seit dem Öffnen des Formulars geändert, wird nicht überschrieben.
+            # Die Seite wird mit dem aktuellen Stand und Status 409 (Conflict) erneut ausgegeben.
+            except VersionsKonflikt as e:
+                flash("Der Studiengang wurde zwischenzeitlich geändert. Bitte die Änderungen erneut eintragen.", 'danger')
+                logging.warning("Veraltetes Formular abgelehnt: %s", e)
+                return StudiengangAnsicht._bearbeiten_rendern(request, manager, seitengroesse), 409
             # Bei Fehler wird eine negative Meldung gespeichert und ausgegeben. Der Fehler wird in die Log-Datei geschrieben.
             except Exception as e:
                 fehlermeldung = f"Speichern fehlgeschlagen: dashboard.log überprüfen."
                 flash(fehlermeldung, 'danger') # Fehlermeldung
-                logging.error({str(e)}) # Ausgabe des Fehlers in der Log-Datei
-                # erneutes ausgeben der bearbeiten.html mit den alten Werten.
-                return render_template(
-                    'bearbeiten.html',
-                    sg=studiengang,
-                    ziel_tage=studiengang.ziele['zeit'].zeitziel_in_tagen,
-                    ziel_note=studiengang.ziele['note'].notendurchschnitt
-                )
+                logging.error("Speichern fehlgeschlagen: %s", e) # Ausgabe des Fehlers in der Log-Datei
+                # erneutes ausgeben der bearbeiten.html mit den gespeicherten Werten.
+                return StudiengangAnsicht._bearbeiten_rendern(request, manager, seitengroesse)
+        return StudiengangAnsicht._bearbeiten_rendern(request, manager, seitengroesse)
+
+    @staticmethod
+    def _bearbeiten_rendern(request, manager, seitengroesse):
+        """ Rendert die Bearbeiten-Seite für ?semester=&seite= - geladen werden nur Kopf und die Module der Seite """
+        kopf, uebersicht = manager.kopf_laden()
+        anzahl_je_semester = dict(uebersicht)
+        # Semester aus Formular (POST) oder Adresse, sonst das erste vorhandene
+        nummer = request.values.get('semester', type=int)
+        if nummer is None:
+            nummer = uebersicht[0][0] if uebersicht else 1
+        seiten = max(1, math.ceil(anzahl_je_semester.get(nummer, 0) / seitengroesse))
+        seite = min(max(1, request.values.get('seite', 1, type=int)), seiten)
+        start = (seite - 1) * seitengroesse
+        semester = manager.semester_laden(nummer, start, seitengroesse)
         return render_template(
             'bearbeiten.html',
-            sg=studiengang,
-            ziel_tage=studiengang.ziele['zeit'].zeitziel_in_tagen,
-            ziel_note=studiengang.ziele['note'].notendurchschnitt
+            sg=kopf,
+            semester=semester,
+            uebersicht=uebersicht,
+            # Nummer für ein neues Semester hinter dem letzten
+            neues_semester=max(anzahl_je_semester, default=0) + 1,
+            seite=seite,
+            seiten=seiten,
+            start=start,
+            ziel_tage=kopf.ziele['zeit'].zeitziel_in_tagen,
+            ziel_note=kopf.ziele['note'].notendurchschnitt,
+            # Eingabefelder der optionalen Zieltypen, leer = Ziel nicht gesetzt
+            weitere_zieltypen=[(klasse, kopf.ziele.get(typ)) for typ, klasse in ZIELTYPEN.items() if not klasse.pflicht]
         )
+
+    @staticmethod
+    def modul_patch(session, request, handler, manager, semester_nummer, index):
+        """ Einzelnes Modul über JSON ändern (Inline-Speichern der Bearbeiten-Seite) """
+        if not session.get('logged_in'):
+            return jsonify(fehler="Nicht angemeldet"), 401
+        daten = request.get_json(silent=True)
+        if not isinstance(daten, dict):
+            return jsonify(fehler="JSON-Objekt erwartet"), 400
+        try:
+            version = handler.aktualisieren_aus_patch(semester_nummer, index, daten, manager)
+        except VersionsKonflikt as e:
+            logging.warning("Veraltete Einzeländerung abgelehnt: %s", e)
+            return jsonify(fehler="Der Studiengang wurde zwischenzeitlich geändert."), 409
+        except LookupError as e:
+            return jsonify(fehler=str(e)), 404
+        except (TypeError, ValueError, OverflowError) as e:
+            return jsonify(fehler=str(e)), 400
+        return jsonify(version=version)
+
+    @staticmethod
+    def import_starten(session, request, importer, import_verzeichnis):
+        """ Startet den Massenimport von CSV-Dateien aus dem Import-Verzeichnis im Hintergrund """
+        if not session.get('logged_in'):
+            return jsonify(fehler="Nicht angemeldet"), 401
+        daten = request.get_json(silent=True) or {}
+        # ohne Dateiliste werden alle CSV-Dateien des Import-Verzeichnisses importiert
+        dateinamen = daten.get('dateien')
+        if dateinamen is None:
+            if not os.path.isdir(import_verzeichnis):
+                return jsonify(fehler=f"Import-Verzeichnis {import_verzeichnis} nicht vorhanden"), 400
+            dateinamen = sorted(name for name in os.listdir(import_verzeichnis) if name.endswith('.csv'))
+        # nur Dateinamen ohne Pfadangabe zulassen, damit nichts außerhalb des Import-Verzeichnisses gelesen wird
+        if not isinstance(dateinamen, list) or any(not isinstance(name, str) or os.path.basename(name) != name
+                                                    for name in dateinamen):
+            return jsonify(fehler="dateien muss eine Liste von Dateinamen sein"), 400
+        auftrag = importer.starten([os.path.join(import_verzeichnis, name) for name in dateinamen])
+        logging.info("Import %s mit %d Dateien gestartet.", auftrag.id, len(dateinamen))
+        return jsonify(auftrag.als_dict()), 202, {'Location': url_for('import_status', auftrag_id=auftrag.id)}
+
+    @staticmethod
+    def import_status(session, importer, auftrag_id):
+        """ Gibt den Fortschritt eines Imports zurück """
+        if not session.get('logged_in'):
+            return jsonify(fehler="Nicht angemeldet"), 401
+        auftrag = importer.auftrag(auftrag_id)
+        if auftrag is None:
+            return jsonify(fehler="Import nicht gefunden"), 404
+        return jsonify(auftrag.als_dict())
+
+    @staticmethod
+    def kohorte(session, kohorten):
+        """ Auswertungen über die Studiengänge aller Mandanten - der Kohorten-Speicher bleibt zwischen den Anfragen
+        erhalten, eingelesen werden nur seitdem gespeicherte Studiengänge """
+        if not session.get('logged_in'):
+            return jsonify(fehler="Nicht angemeldet"), 401
+        return jsonify(kohorten.zusammenfassung())
+
+    @staticmethod
+    def csv_export(session, request, manager):
+        """ Exportiert Module (mit Note und Anerkennung, ohne bei ?noten=0) als CSV - ?mandanten=a,b oder =alle
+        exportiert mehrere Studiengänge mit Mandanten-Spalte. Die Antwort wird zeilenweise erzeugt und gestreamt,
+        es ist immer nur ein Studiengang geladen. """
+        if not session.get('logged_in'):
+            return jsonify(fehler="Nicht angemeldet"), 401
+        mit_noten = request.args.get('noten', '1') not in ('0', 'nein', 'false')
+        auswahl = request.args.get('mandanten')
+        # Repository einmal lesen, der Export bleibt beim selben Speicher, auch wenn er währenddessen getauscht wird
+        speicher = manager.speicher
+        if auswahl is None:
+            mandanten = None
+        elif auswahl == 'alle':
+            mandanten = speicher.mandanten()
+        else:
+            mandanten = [mandant.strip() for mandant in auswahl.split(',') if mandant.strip()]
+            unbekannt = [mandant for mandant in mandanten if not mandant_muster.fullmatch(mandant)]
+            if unbekannt or not mandanten:
+                return jsonify(fehler=f"Ungültige Mandanten: {', '.join(unbekannt)}"), 400
+
+        def zeilen():
+            yield StudiengangCSVConverter.kopfzeile(mit_noten, mandanten is not None)
+            if mandanten is None:
+                yield from StudiengangCSVConverter.serialisieren(manager.studiengang_lesen(), mit_noten)
+                return
+            for mandant in mandanten:
+                studiengang = speicher.lesen(mandant)
+                if studiengang is not None:
+                    yield from StudiengangCSVConverter.serialisieren(studiengang, mit_noten,
+                                                                     mandant or standard_mandant)
+
+        antwort = Response(stream_with_context(StudiengangCSVData.text_bloecke(zeilen())),
+                           mimetype='text/csv')
+        antwort.headers['Content-Disposition'] = 'attachment; filename="studiengang.csv"'
+        return antwort
+
+    @staticmethod
+    def metriken(metriken):
+        """ Gibt die gesammelten Messwerte im Prometheus-Textformat aus """
+        antwort = make_response(metriken.ausgeben())
+        antwort.content_type = "text/plain; version=0.0.4; charset=utf-8"
+        return antwort